@@ -5,6 +5,13 @@ from pathlib import Path
 
 import inquirer
 
+from task_commit.catalog import (
+    CatalogError,
+    compile_catalog,
+    compile_catalogs,
+    find_catalogs,
+)
+from task_commit.extract import write_pot
 from task_commit.utils import color_text, get_translator
 
 LOCALES_DIR = locale_dir = os.path.join(
@@ -109,8 +116,10 @@ def find_python_files(directory) -> list:
     """Walks through the directory and returns a list of all .py files."""
     python_files = []
     python_files.append(__file__.split('/')[-1])
-    for root, _, files in os.walk(directory):
-        for file in files:
+    # Sorted so the .pot file lists the messages in a stable order
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
             if file.endswith('.py'):
                 python_files.append(os.path.join(root, file))
     return python_files
@@ -131,6 +140,26 @@ def run_command(command) -> None:
         sys.exit(1)
 
 
+def extract_strings(source_files) -> bool:
+    """
+    Writes the .pot file, parsing only the files changed since last time.
+
+    Returns
+    -------
+    bool
+    True if the file was written, False if a source could not be parsed.
+    """
+    try:
+        parsed = write_pot(source_files, POT_FILE)
+    except SyntaxError as error:
+        message: str = _('Error executing command')
+        print(color_text(f'❌ {message}: {error}', 'red'))
+        return False
+    for file in parsed:
+        print(color_text(f'  🔎 {file}', 'green'))
+    return True
+
+
 def input_language() -> str:
     """Asks the user to input a language code and returns it."""
     languages_choices = [
@@ -162,7 +191,7 @@ def input_language() -> str:
         sys.exit(1)
 
 
-def update_translations() -> None:  # noqa: PLR0912, PLR0915
+def update_translations() -> None:  # noqa: PLR0911, PLR0912, PLR0915
     """Generates the POT file and updates the existing translations."""
     # Automatically discovers all Python files in the project
     args = sys.argv
@@ -217,9 +246,8 @@ def update_translations() -> None:  # noqa: PLR0912, PLR0915
                         print(color_text(f'⚠️ {message}', 'red'))
                         return
                     # Creating the .pot file
-                    run_command(
-                        f'xgettext -o {POT_FILE} {" ".join(source_files)}',
-                    )
+                    if not extract_strings(source_files):
+                        return 1
 
                     # Copying the .po file
 
@@ -241,7 +269,15 @@ def update_translations() -> None:  # noqa: PLR0912, PLR0915
                         'LC_MESSAGES',
                         'messages.mo',
                     )
-                    run_command(f'touch {mo_file}')
+                    compile_catalog(
+                        os.path.join(
+                            LOCALES_DIR,
+                            language,
+                            'LC_MESSAGES',
+                            'messages.po',
+                        ),
+                        mo_file,
+                    )
 
                     # Removing the .pot file
                     run_command(f'rm {POT_FILE}')
@@ -268,7 +304,8 @@ def update_translations() -> None:  # noqa: PLR0912, PLR0915
                 # Extracting new strings into the .pot file
                 message: str = _('Extracting strings to .pot file...')
                 print(color_text(f'📥 {message}', 'green'))
-                run_command(f'xgettext -o {POT_FILE} {" ".join(source_files)}')
+                if not extract_strings(source_files):
+                    return 1
 
                 # Updating the .po file without losing previous translations
                 if os.path.exists(
@@ -297,22 +334,20 @@ def update_translations() -> None:  # noqa: PLR0912, PLR0915
                         }'
                     )
 
-                # Compiling the .mo file
+                # Compiling the .mo files of the changed catalogs
                 message: str = _('Compiling .mo file...')
                 print(color_text(f'📦 {message}', 'green'))
-                po_files = find_file(
-                    'messages.po',
-                    LOCALES_DIR,
-                    list_return=True,
-                )
-                mo_files = find_file(
-                    'messages.mo',
-                    LOCALES_DIR,
-                    list_return=True,
-                )
-                for mo_file, po_file in zip(mo_files, po_files):
-                    print(color_text(f'📦 {mo_file}', 'green'))
-                    run_command(f'msgfmt -o {mo_file} {po_file}')
+                try:
+                    compiled = compile_catalogs(LOCALES_DIR)
+                except CatalogError as error:
+                    print(color_text(f'❌ {error}', 'red'))
+                    return 1
+                catalogs = find_catalogs(LOCALES_DIR)
+                for language in compiled:
+                    print(color_text(f'📦 {catalogs[language][1]}', 'green'))
+                if not compiled:
+                    message: str = _('Translations are up to date')
+                    print(color_text(f'✅ {message}', 'green'))
 
                 # Removing the .pot file
                 run_command(f'rm {POT_FILE}')
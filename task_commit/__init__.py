@@ -1,3 +1,10 @@
-from .core import git_commit
+__all__ = ['git_commit']  # noqa: F822 (loaded lazily by __getattr__)
 
-__all__ = ['git_commit']
+
+def __getattr__(name):
+    # Importing the package must not load the interactive commit flow
+    if name == 'git_commit':
+        from .core import git_commit  # noqa: PLC0415
+
+        return git_commit
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
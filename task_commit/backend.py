@@ -0,0 +1,341 @@
+import atexit
+import os
+import struct
+import subprocess
+import threading
+
+from .gitindex import GitIndex, StagedChange, read_staged
+from .repository import (
+    RepoPaths,
+    Unsupported,
+    abbrev_head,
+    discover,
+    get_common_dir,
+    normalize_key,
+    read_config,
+)
+from .status import RepoState, read_repo_state
+
+LOCATE_COMMAND = [
+    'git',
+    'rev-parse',
+    '--absolute-git-dir',
+    '--is-inside-work-tree',
+    '--show-cdup',
+]
+# Commands that can change the repository configuration
+CONFIG_COMMANDS = {'config', 'flow', 'remote', 'branch'}
+# Read the repository location, HEAD and configuration from the files
+# instead of asking Git ("0" always asks Git)
+READ_GIT_FILES = os.getenv('TASK_COMMIT_READ_GIT_FILES', '1') != '0'
+
+
+class GitBackend:
+    """
+    Git access shared by every query of a session.
+
+    Read-only facts are answered from long-lived helpers instead of one
+    `git` process per question: the repository location, HEAD and the
+    whole configuration are read from the files Git keeps them in (see
+    `repository`), falling back to `git rev-parse` and
+    `git config --list -z`, and objects are read through a single
+    `git cat-file --batch` process. Commands run through `run` invalidate
+    whatever they may have changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config: dict[str, list[str]] | None = None
+        self._config_files: list[str] | None = None
+        self._head: str | None = None
+        self._state: RepoState | None = None
+        self._staged: list[StagedChange] | None = None
+        self._paths: RepoPaths | None = None
+        self._cat_file: subprocess.Popen | None = None
+
+    def config_values(self, key: str) -> list[str]:
+        """
+        Gets every value of a configuration key.
+
+        Parameters
+        ----------
+        key : str
+        Configuration key, e.g. "user.name" (section and name are case
+        insensitive).
+
+        Returns
+        -------
+        list[str]
+        Values in the order Git reads them, empty if the key is not set.
+        """
+        with self._lock:
+            if self._config is None:
+                self._config, self._config_files = self._read_config()
+            return self._config.get(normalize_key(key), [])
+
+    def config(self, key: str, default: str | None = None) -> str | None:
+        """Gets the effective (last) value of a configuration key."""
+        values = self.config_values(key)
+        return values[-1] if values else default
+
+    def config_files(self) -> list[str] | None:
+        """
+        Gets the files the configuration was read from.
+
+        Returns
+        -------
+        list[str] or None
+        Every file looked for, included ones too, even those missing; None
+        if Git read the configuration (the files are then unknown).
+        """
+        with self._lock:
+            if self._config is None:
+                self._config, self._config_files = self._read_config()
+            return self._config_files
+
+    def _read_config(self) -> tuple[dict[str, list[str]], list[str] | None]:
+        if READ_GIT_FILES:
+            try:
+                paths = self._locate_unlocked()
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                paths = None
+            try:
+                return read_config(paths)
+            except Unsupported:
+                pass
+        output = subprocess.check_output(
+            ['git', 'config', '--list', '-z'], text=True
+        )
+        config: dict[str, list[str]] = {}
+        for entry in output.split('\0'):
+            if not entry:
+                continue
+            key, _sep, value = entry.partition('\n')
+            config.setdefault(normalize_key(key), []).append(value)
+        return config, None
+
+    def toplevel(self) -> str:
+        """
+        Gets the root directory of the working tree.
+
+        ------
+        subprocess.CalledProcessError
+        If not inside a working tree (e.g. in a bare repository).
+        """
+        with self._lock:
+            toplevel = self._locate_unlocked().toplevel
+        if toplevel is None:
+            raise subprocess.CalledProcessError(128, LOCATE_COMMAND)
+        return toplevel
+
+    def git_dir(self) -> str:
+        """
+        Gets the absolute path of the Git directory (`.git`).
+
+        ------
+        subprocess.CalledProcessError
+        If not inside a repository.
+        """
+        with self._lock:
+            return self._locate_unlocked().git_dir
+
+    def _locate_unlocked(self) -> RepoPaths:
+        if self._paths is None and READ_GIT_FILES:
+            self._paths = discover()
+        if self._paths is None:
+            git_dir, inside, *cdup = subprocess.check_output(
+                LOCATE_COMMAND, text=True, stderr=subprocess.DEVNULL
+            ).split('\n')
+            toplevel = None
+            if inside == 'true':
+                toplevel = os.path.abspath(cdup[0] or '.')
+            self._paths = RepoPaths(git_dir, get_common_dir(git_dir), toplevel)
+        return self._paths
+
+    def head(self) -> str:
+        """
+        Gets the abbreviated name of HEAD (the current branch).
+
+        ------
+        subprocess.CalledProcessError
+        If HEAD cannot be resolved.
+        """
+        with self._lock:
+            if self._head is None and READ_GIT_FILES:
+                try:
+                    self._head = abbrev_head(self._locate_unlocked().git_dir)
+                except (subprocess.CalledProcessError, FileNotFoundError):
+                    self._head = None
+            if self._head is None:
+                self._head = subprocess.check_output(
+                    ['git', 'rev-parse', '--abbrev-ref', 'HEAD'], text=True
+                ).strip()
+            return self._head
+
+    def status(self) -> RepoState:
+        """
+        Gets the repository snapshot, taken once until the next change.
+
+        ------
+        subprocess.CalledProcessError
+        If `git status` fails.
+        """
+        with self._lock:
+            if self._state is None:
+                self._state = read_repo_state()
+                if self._state.branch is not None:
+                    self._head = self._state.branch
+            return self._state
+
+    def staged(self) -> list[StagedChange]:
+        """
+        Lists the staged changes, until the next change.
+
+        They are read from the index (see `gitindex`), falling back to
+        `git diff --cached`; neither scans the working tree.
+
+        ------
+        subprocess.CalledProcessError
+        If `git diff` fails.
+        """
+        staged = self._staged
+        if staged is None:
+            if READ_GIT_FILES:
+                try:
+                    staged = self._read_index()
+                except (
+                    Unsupported,
+                    OSError,
+                    ValueError,
+                    IndexError,
+                    struct.error,
+                ):
+                    staged = None
+            if staged is None:
+                staged = self._diff_cached()
+            with self._lock:
+                self._staged = staged
+        return staged
+
+    def _read_index(self) -> list[StagedChange]:
+        with self._lock:
+            git_dir = self._locate_unlocked().git_dir
+        path = os.getenv('GIT_INDEX_FILE') or os.path.join(git_dir, 'index')
+        if not os.path.exists(path):
+            return []
+        sha256 = self.config('extensions.objectformat') == 'sha256'
+        head = self.cat_file('HEAD')
+        head_tree = None
+        if head is not None:
+            head_tree = head[1].split(b'\n', 1)[0].split()[1].decode('ascii')
+        with GitIndex(path, hash_size=32 if sha256 else 20) as index:
+            return read_staged(index, head_tree, self.cat_file)
+
+    @staticmethod
+    def _diff_cached() -> list[StagedChange]:
+        fields = subprocess.check_output(
+            ['git', 'diff', '--cached', '--name-status', '--no-renames', '-z'],
+            text=True,
+        ).split('\0')
+        return [
+            StagedChange(status, path)
+            for status, path in zip(fields[::2], fields[1::2], strict=False)
+        ]
+
+    def cat_file(self, rev: str) -> tuple[str, bytes] | None:
+        """
+        Reads an object through the shared `git cat-file --batch` process.
+
+        Parameters
+        ----------
+        rev : str
+        Any object name, e.g. a SHA or "HEAD^{tree}".
+
+        Returns
+        -------
+        tuple[str, bytes] or None
+        (object type, raw content), or None if the object does not exist.
+        """
+        with self._lock:
+            if self._cat_file is None or self._cat_file.poll() is not None:
+                self._cat_file = subprocess.Popen(
+                    ['git', 'cat-file', '--batch'],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                )
+            process = self._cat_file
+            process.stdin.write(rev.encode('utf-8') + b'\n')
+            process.stdin.flush()
+            header = process.stdout.readline().split()
+            if len(header) != 3:  # noqa: PLR2004
+                return None  # "<rev> missing" or "<rev> ambiguous"
+            _sha, object_type, size = header
+            content = process.stdout.read(int(size) + 1)[:-1]
+            return object_type.decode('ascii'), content
+
+    def run(self, args: list[str], **kwargs) -> subprocess.CompletedProcess:
+        """
+        Runs a Git command that may change the repository.
+
+        Parameters
+        ----------
+        args : list[str]
+        Arguments passed to `git`.
+        **kwargs
+        Passed to `subprocess.run`.
+        """
+        try:
+            return subprocess.run(['git', *args], **kwargs)  # noqa: PLW1510
+        finally:
+            self.invalidate(config=args[0] in CONFIG_COMMANDS)
+
+    def invalidate(self, config: bool = False) -> None:
+        """
+        Forgets the facts a repository change may have made stale.
+
+        The `git cat-file --batch` process is kept: objects never change,
+        and it resolves names against the current refs on every request.
+        """
+        with self._lock:
+            self._head = None
+            self._state = None
+            self._staged = None
+            if config:
+                self._config = None
+
+    def close(self) -> None:
+        """Stops the helper processes."""
+        with self._lock:
+            self._close_cat_file()
+
+    def _close_cat_file(self) -> None:
+        if self._cat_file is None:
+            return
+        self._cat_file.stdin.close()
+        self._cat_file.wait()
+        self._cat_file.stdout.close()
+        self._cat_file = None
+
+
+_backend: GitBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> GitBackend:
+    """Gets the backend shared by the whole process."""
+    global _backend  # noqa: PLW0603
+    with _backend_lock:
+        if _backend is None:
+            _backend = GitBackend()
+            atexit.register(_backend.close)
+        return _backend
+
+
+def reset_backend() -> None:
+    """Stops the shared backend so the next query starts from scratch."""
+    global _backend  # noqa: PLW0603
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            atexit.unregister(_backend.close)
+            _backend = None
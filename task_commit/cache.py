@@ -0,0 +1,144 @@
+import os
+import subprocess
+import tempfile
+
+from .backend import get_backend
+
+CACHE_DIR = 'task_commit'
+LINT_CACHE_FILE = 'lint-cache'
+MAX_ENTRIES = 500_000
+
+
+def get_git_dir() -> str | None:
+    """
+    Gets the absolute path of the `.git` directory of the current repository.
+
+    Returns
+    -------
+    str or None
+    Path of the Git directory if inside a repository, otherwise None.
+    """
+    try:
+        return get_backend().git_dir()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def get_cache_dir(git_dir: str | None = None) -> str | None:
+    """Gets (and creates) the task_commit cache directory inside `.git/`."""
+    git_dir = git_dir or get_git_dir()
+    if git_dir is None:
+        return None
+    cache_dir = os.path.join(git_dir, CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def write_atomic(path: str, data: str) -> None:
+    """Writes a file through a temporary file so readers never see half."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class LintCache:
+    """
+    Persistent lint verdicts keyed by commit SHA.
+
+    Commits are immutable, so a verdict only changes with the validator
+    (rule set, validation logic or language of the reasons): the whole
+    cache is discarded when `rules_hash` differs from the one it was
+    written with. Least recently used entries are evicted once there
+    are more than `max_entries`.
+
+    Parameters
+    ----------
+    path : str
+    File where the verdicts are stored.
+    rules_hash : str
+    Fingerprint of the validator the verdicts were computed with (see
+    `Validator.fingerprint`).
+    max_entries : int
+    Maximum number of verdicts kept on disk.
+    """
+
+    def __init__(self, path: str, rules_hash: str, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.rules_hash = rules_hash
+        self.max_entries = max_entries
+        self._entries: dict[str, tuple[str, str] | None] = {}
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def open(cls, rules_hash: str, git_dir: str | None = None):
+        """Opens the cache of the current repository, or None outside one."""
+        cache_dir = get_cache_dir(git_dir)
+        if cache_dir is None:
+            return None
+        return cls(os.path.join(cache_dir, LINT_CACHE_FILE), rules_hash)
+
+    def _load(self) -> None:
+        try:
+            # Only "\n" ends an entry: a subject may hold a stray "\r"
+            with open(self.path, encoding='utf-8', newline='') as cache_file:
+                lines = cache_file.read().split('\n')
+        except (FileNotFoundError, UnicodeDecodeError):
+            return
+        if not lines or lines[0] != self.rules_hash:
+            return
+        for line in lines[1:]:
+            if not line:
+                continue
+            sha, _sep, verdict = line.partition('\t')
+            if verdict:
+                reason, _sep, subject = verdict.partition('\t')
+                self._entries[sha] = (reason, subject)
+            else:
+                self._entries[sha] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, sha: str) -> bool:
+        return sha in self._entries
+
+    def get(self, sha: str) -> tuple[str, str] | None:
+        """
+        Gets the cached verdict of a commit and marks it as recently used.
+
+        A hit alone does not make the cache be written again: the new
+        order is only saved along with added entries.
+
+        Returns
+        -------
+        tuple[str, str] or None
+        (reason, subject) of a rejected commit, None for a valid one.
+        """
+        verdict = self._entries.pop(sha)
+        self._entries[sha] = verdict
+        return verdict
+
+    def put(self, sha: str, verdict: tuple[str, str] | None) -> None:
+        """Stores the verdict of a commit (see `get`)."""
+        self._entries.pop(sha, None)
+        self._entries[sha] = verdict
+        self._dirty = True
+
+    def save(self) -> None:
+        """Writes the most recently used verdicts back to disk."""
+        if not self._dirty:
+            return
+        if len(self._entries) > self.max_entries:
+            newest = list(self._entries.items())[-self.max_entries :]
+            self._entries = dict(newest)
+        lines = [self.rules_hash]
+        for sha, verdict in self._entries.items():
+            lines.append('\t'.join((sha, *verdict)) if verdict else sha)
+        write_atomic(self.path, '\n'.join(lines) + '\n')
+        self._dirty = False
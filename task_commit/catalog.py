@@ -0,0 +1,412 @@
+"""
+Compiles gettext catalogs (.po) into the binary format (.mo) Python loads.
+
+The output matches `msgfmt` byte for byte (same string order and hash
+table), so catalogs built here or with the gettext tools are
+interchangeable and builds are reproducible without gettext installed.
+A catalog is compiled again only when its .po content changed.
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+
+from .cache import get_cache_dir, write_atomic
+from .i18n import DOMAIN
+
+MO_MAGIC = 0x950412DE
+MO_HEADER = struct.Struct('<7I')
+CATALOG_CACHE_FILE = 'catalogs.json'
+# Version of the compiler, bumped when its output changes
+CATALOG_VERSION = 1
+# Header fields `msgfmt` leaves out so the output only changes with the
+# translations
+VOLATILE_HEADER_FIELDS = ('POT-Creation-Date',)
+VOLATILE_PO_LINES = tuple(
+    f'"{field}:'.encode('ascii') for field in VOLATILE_HEADER_FIELDS
+)
+CONTEXT_SEPARATOR = '\x04'
+# Entry attribute set by every .po keyword but msgstr
+FIELDS = {'msgctxt': 'context', 'msgid': 'msgid', 'msgid_plural': 'plural'}
+ESCAPES = {
+    'n': '\n',
+    't': '\t',
+    'r': '\r',
+    'a': '\a',
+    'b': '\b',
+    'f': '\f',
+    'v': '\v',
+    '"': '"',
+    '\\': '\\',
+}
+_ESCAPE = re.compile(r'\\(?:([0-7]{1,3})|x([0-9a-fA-F]+)|(.))')
+_KEYWORD = re.compile(r'(msgctxt|msgid_plural|msgid|msgstr(?:\[(\d+)\])?)\s')
+_CHARSET = re.compile(r'charset=([^\s;]+)', re.IGNORECASE)
+
+
+class CatalogError(ValueError):
+    """A .po file that cannot be compiled, with the line at fault."""
+
+
+def _unescape(match: re.Match) -> str:
+    octal, hexadecimal, char = match.groups()
+    if octal is not None:
+        return chr(int(octal, 8))
+    if hexadecimal is not None:
+        return chr(int(hexadecimal, 16))
+    return ESCAPES.get(char, char)
+
+
+def _parse_string(text: str, path: str, line_number: int) -> str:
+    text = text.strip()
+    if len(text) < 2 or text[0] != '"' or text[-1] != '"':  # noqa: PLR2004
+        raise CatalogError(f'{path}:{line_number}: expected a quoted string')
+    return _ESCAPE.sub(_unescape, text[1:-1])
+
+
+class _Entry:
+    """Message being read, one keyword at a time."""
+
+    def __init__(self):
+        self.fuzzy = False
+        self.context: str | None = None
+        self.msgid: str | None = None
+        self.plural: str | None = None
+        self.msgstr: dict[int, str] = {}
+
+    def key(self) -> str:
+        msgid = self.msgid
+        if self.plural is not None:
+            msgid += '\0' + self.plural
+        if self.context is not None:
+            return self.context + CONTEXT_SEPARATOR + msgid
+        return msgid
+
+    def translation(self) -> str:
+        return '\0'.join(self.msgstr[index] for index in sorted(self.msgstr))
+
+    def is_compiled(self) -> bool:
+        header = not self.msgid and self.context is None
+        return all(self.msgstr.values()) and (header or not self.fuzzy)
+
+    def set(self, keyword: str, index: str | None, value: str):
+        """Sets a field and returns where its continuation lines go."""
+        if not keyword.startswith('msgstr'):
+            field = FIELDS[keyword]
+            setattr(self, field, value)
+            return field, 0
+        if self.msgid is None:
+            raise ValueError('msgstr before msgid')
+        plural_index = int(index or 0)
+        self.msgstr[plural_index] = value
+        return 'msgstr', plural_index
+
+    def append(self, target: tuple[str, int], value: str) -> None:
+        field, index = target
+        if field == 'msgstr':
+            self.msgstr[index] += value
+        else:
+            setattr(self, field, getattr(self, field) + value)
+
+
+def parse_po(text: str, path: str = '<string>') -> dict[str, str]:
+    """
+    Reads the translated messages of a .po file.
+
+    Untranslated and fuzzy messages are left out, like `msgfmt` does
+    without `--use-fuzzy`, except the header (msgid "").
+
+    Parameters
+    ----------
+    text : str
+    Content of the .po file.
+    path : str
+    File name used in error messages.
+
+    Returns
+    -------
+    dict[str, str]
+    Translation by key: "msgid", "msgid\\0msgid_plural" for plurals
+    (their forms are NUL separated) and "msgctxt\\x04msgid" in a context.
+
+    ------
+    CatalogError
+    If the file is not a valid .po file.
+    """
+    messages: dict[str, str] = {}
+    entry = _Entry()
+    # Where continuation lines ("...") go: (field, plural index)
+    target: tuple[str, int] | None = None
+    for line_number, raw_line in enumerate(text.splitlines(), 1):
+        line = raw_line.strip()
+        if line.startswith('"') and target is not None:
+            entry.append(target, _parse_string(line, path, line_number))
+            continue
+        target = None
+        # A comment or a new msgid after a msgstr starts the next entry
+        if entry.msgstr and line.startswith(('#', 'msgctxt', 'msgid ')):
+            if entry.is_compiled():
+                messages[entry.key()] = entry.translation()
+            entry = _Entry()
+        if line.startswith('#,'):
+            flags = {flag.strip() for flag in line[2:].split(',')}
+            entry.fuzzy = entry.fuzzy or 'fuzzy' in flags
+        if not line or line.startswith('#'):
+            continue  # Obsolete entries (#~) are comments too
+        match = _KEYWORD.match(line + ' ')
+        if match is None:
+            raise CatalogError(f'{path}:{line_number}: invalid line')
+        keyword, index = match.groups()
+        value = _parse_string(line[len(keyword) :], path, line_number)
+        try:
+            target = entry.set(keyword, index, value)
+        except ValueError as error:
+            raise CatalogError(f'{path}:{line_number}: {error}') from None
+    if entry.msgstr and entry.is_compiled():
+        messages[entry.key()] = entry.translation()
+    return messages
+
+
+def _strip_header(header: str) -> str:
+    return ''.join(
+        line
+        for line in header.splitlines(keepends=True)
+        if line.split(':', 1)[0].strip() not in VOLATILE_HEADER_FIELDS
+    )
+
+
+def _hash_string(data: bytes) -> int:
+    # hashpjw, the hash of the gettext hash table, up to the first NUL
+    value = 0
+    for byte in data.split(b'\0', 1)[0]:
+        value = (value << 4) + byte
+        high = value & 0xF0000000
+        if high:
+            value ^= high >> 24
+            value ^= high
+    return value
+
+
+def _is_prime(number: int) -> bool:
+    return number > 1 and all(
+        number % divisor for divisor in range(2, int(number**0.5) + 1)
+    )
+
+
+def _hash_table_size(count: int) -> int:
+    size = max(count * 4 // 3, 3)
+    while not _is_prime(size):
+        size += 1
+    return size
+
+
+def _string_tables(
+    entries: list[tuple[bytes, bytes]], offset: int
+) -> tuple[bytes, bytes]:
+    # (length, offset) of every original, then of every translation,
+    # pointing into the NUL terminated strings that follow the tables
+    tables = bytearray()
+    strings = bytearray()
+    for index in (0, 1):
+        for entry in entries:
+            data = entry[index]
+            tables += struct.pack('<2I', len(data), offset + len(strings))
+            strings += data + b'\0'
+    return bytes(tables), bytes(strings)
+
+
+def _hash_table(keys: list[bytes], size: int) -> list[int]:
+    # Open addressing with double hashing, slots hold the entry number + 1
+    table = [0] * size
+    for number, key in enumerate(keys, 1):
+        value = _hash_string(key)
+        index = value % size
+        increment = 1 + value % (size - 2)
+        while table[index]:
+            index = (index + increment) % size
+        table[index] = number
+    return table
+
+
+def compile_mo(messages: dict[str, str]) -> bytes:
+    """
+    Builds a .mo file from the messages `parse_po` read.
+
+    Messages are sorted and hashed like `msgfmt` does, so the same
+    messages always give the same bytes.
+    """
+    header = messages.get('')
+    charset = 'utf-8'
+    if header is not None:
+        messages = {**messages, '': _strip_header(header)}
+        match = _CHARSET.search(header)
+        if match is not None and match.group(1).upper() != 'CHARSET':
+            charset = match.group(1)
+    entries = sorted(
+        (key.encode(charset), value.encode(charset))
+        for key, value in messages.items()
+    )
+    count = len(entries)
+    hash_size = _hash_table_size(count)
+    originals_offset = MO_HEADER.size
+    translations_offset = originals_offset + count * 8
+    hash_offset = translations_offset + count * 8
+    strings_offset = hash_offset + hash_size * 4
+    tables, strings = _string_tables(entries, strings_offset)
+    hash_table = _hash_table([key for key, _value in entries], hash_size)
+
+    return b''.join((
+        MO_HEADER.pack(
+            MO_MAGIC,
+            0,
+            count,
+            originals_offset,
+            translations_offset,
+            hash_size,
+            hash_offset,
+        ),
+        tables,
+        struct.pack(f'<{hash_size}I', *hash_table),
+        strings,
+    ))
+
+
+def find_catalogs(
+    locale_dir: str, domain: str = DOMAIN
+) -> dict[str, tuple[str, str]]:
+    """
+    Pairs the .po and .mo file of every locale.
+
+    Returns
+    -------
+    dict[str, tuple[str, str]]
+    (.po path, .mo path) by locale, for every locale with a .po file;
+    the .mo path may not exist yet.
+    """
+    catalogs = {}
+    for locale in sorted(os.listdir(locale_dir)):
+        messages_dir = os.path.join(locale_dir, locale, 'LC_MESSAGES')
+        po_path = os.path.join(messages_dir, f'{domain}.po')
+        if os.path.isfile(po_path):
+            mo_path = os.path.join(messages_dir, f'{domain}.mo')
+            catalogs[locale] = (po_path, mo_path)
+    return catalogs
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def compile_catalog(po_path: str, mo_path: str) -> str:
+    """
+    Compiles a .po file into a .mo file.
+
+    Returns
+    -------
+    str
+    Hash of the .mo content written.
+
+    ------
+    CatalogError
+    If the .po file is not valid.
+    """
+    with open(po_path, encoding='utf-8') as po_file:
+        messages = parse_po(po_file.read(), po_path)
+    data = compile_mo(messages)
+    with open(mo_path, 'wb') as mo_file:
+        mo_file.write(data)
+    return _digest(data)
+
+
+def _read_hash(path: str, volatile: tuple[bytes, ...] = ()) -> str | None:
+    try:
+        with open(path, 'rb') as file:
+            lines = [line for line in file if not line.startswith(volatile)]
+    except OSError:
+        return None
+    return _digest(b''.join(lines))
+
+
+def _load_cache(cache_path: str | None) -> dict:
+    if cache_path is None:
+        return {}
+    try:
+        with open(cache_path, encoding='utf-8') as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    if cached.get('version') != CATALOG_VERSION:
+        return {}
+    return cached.get('catalogs', {})
+
+
+def compile_catalogs(
+    locale_dir: str,
+    domain: str = DOMAIN,
+    jobs: int | None = None,
+    force: bool = False,
+) -> list[str]:
+    """
+    Compiles the catalog of every locale whose .po file changed.
+
+    The hashes of each .po and .mo file compiled are kept in
+    `.git/task_commit/`: a catalog is skipped while both files still have
+    them (POT-Creation-Date aside). The others are compiled on a process
+    pool unless `jobs` is 1 or only one is stale.
+
+    Parameters
+    ----------
+    locale_dir : str
+    Directory containing the `<locale>/LC_MESSAGES` catalogs.
+    domain : str
+    Catalog name (the file names).
+    jobs : int or None
+    Number of worker processes, defaults to the number of CPUs.
+    force : bool
+    Compile every catalog, even the unchanged ones.
+
+    Returns
+    -------
+    list[str]
+    Locales compiled, sorted.
+
+    ------
+    CatalogError
+    If a .po file is not valid.
+    """
+    cache_dir = get_cache_dir()
+    cache_path = cache_dir and os.path.join(cache_dir, CATALOG_CACHE_FILE)
+    cached = _load_cache(cache_path)
+    catalogs = find_catalogs(locale_dir, domain)
+    stale = []
+    for locale, (po_path, mo_path) in catalogs.items():
+        # `msgmerge` updates POT-Creation-Date on every run
+        po_hash = _read_hash(po_path, VOLATILE_PO_LINES)
+        if force or cached.get(po_path) != [po_hash, _read_hash(mo_path)]:
+            stale.append((locale, po_hash))
+    if not stale:
+        return []
+
+    paths = [catalogs[locale] for locale, _po_hash in stale]
+    jobs = min(jobs or os.cpu_count() or 1, len(stale))
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor  # noqa: PLC0415
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            mo_hashes = list(executor.map(compile_catalog, *zip(*paths)))
+    else:
+        mo_hashes = [compile_catalog(*pair) for pair in paths]
+    for (_locale, po_hash), (po_path, _mo_path), mo_hash in zip(
+        stale, paths, mo_hashes, strict=True
+    ):
+        cached[po_path] = [po_hash, mo_hash]
+
+    if cache_path is not None:
+        data = {'version': CATALOG_VERSION, 'catalogs': cached}
+        try:
+            write_atomic(cache_path, json.dumps(data, sort_keys=True))
+        except OSError:
+            pass
+    return [locale for locale, _po_hash in stale]
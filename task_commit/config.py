@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import subprocess
+
+from .backend import get_backend
+from .cache import get_cache_dir, write_atomic
+
+CONFIG_FILE = 'pyproject.toml'
+CONFIG_CACHE_FILE = 'config-cache.json'
+
+# Sections already loaded by this process, keyed by file path
+_loaded: dict[str, tuple[tuple[int, int], dict]] = {}
+
+
+def get_config_path() -> str | None:
+    """Gets the path of the pyproject.toml at the root of the repository."""
+    try:
+        return os.path.join(get_backend().toplevel(), CONFIG_FILE)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def parse_config(data: bytes) -> dict:
+    """Parses the `[tool.task_commit]` section out of pyproject.toml."""
+    import tomllib  # noqa: PLC0415
+
+    try:
+        pyproject = tomllib.loads(data.decode('utf-8'))
+    except (UnicodeDecodeError, tomllib.TOMLDecodeError):
+        return {}
+    return pyproject.get('tool', {}).get('task_commit', {})
+
+
+def _read_cache(cache_path: str | None) -> dict:
+    if cache_path is None:
+        return {}
+    try:
+        with open(cache_path, encoding='utf-8') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_config(path: str | None = None) -> dict:
+    """
+    Loads the `[tool.task_commit]` section of pyproject.toml.
+
+    The section is cached in `.git/task_commit/` with the modification
+    time, size and hash of the file: while they match, the TOML is not
+    parsed again, and a file touched without changes is only hashed.
+
+    Parameters
+    ----------
+    path : str or None
+    Configuration file, defaults to the pyproject.toml at the root of the
+    repository.
+
+    Returns
+    -------
+    dict
+    The section, empty if the file or the section does not exist.
+    """
+    path = path or get_config_path()
+    if path is None:
+        return {}
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    loaded = _loaded.get(path)
+    if loaded is not None and loaded[0] == stamp:
+        return loaded[1]
+
+    cache_dir = get_cache_dir()
+    cache_path = cache_dir and os.path.join(cache_dir, CONFIG_CACHE_FILE)
+    cached = _read_cache(cache_path)
+    if cached.get('path') != path:
+        cached = {}
+    if cached.get('stamp') == list(stamp):
+        section = cached['section']
+    else:
+        try:
+            with open(path, 'rb') as config_file:
+                data = config_file.read()
+        except OSError:
+            return {}
+        digest = hashlib.sha256(data).hexdigest()
+        if cached.get('sha256') == digest:
+            section = cached['section']
+        else:
+            section = parse_config(data)
+        if cache_path is not None:
+            cached = {
+                'path': path,
+                'stamp': list(stamp),
+                'sha256': digest,
+                'section': section,
+            }
+            write_atomic(cache_path, json.dumps(cached, default=str))
+    _loaded[path] = (stamp, section)
+    return section
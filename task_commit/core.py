@@ -1,9 +1,14 @@
+import json
+import os
 import subprocess
 import sys
+import threading
 
-import inquirer
-from prompt_toolkit import HTML, prompt
-
+from .backend import get_backend
+from .facts import load_facts
+from .i18n import _
+from .rules import load_rules
+from .scopes import ScopeResolver, get_scope_completer
 from .utils import (
     add_changes,
     check_git_status,
@@ -13,16 +18,397 @@ from .utils import (
     get_current_branch,
     get_git_status,
     get_git_user,
-    get_translator,
     handle_git_flow,
+    has_staged_changes,
     is_git_flow,
     remove_excess_spaces,
 )
 
-_ = get_translator()
+# Paths per status bucket offered one by one by the change picker
+PICKER_LIMIT = 200
+TRUE_VALUES = {'true', 'yes', 'on', '1', ''}
+FALSE_VALUES = {'false', 'no', 'off', '0'}
+# Without a configured strategy `git pull` only fast-forwards silently
+DEFAULT_PULL_COMMAND = ['merge', '--ff-only', '@{upstream}']
+# Command of every `pull.rebase` value but false and "interactive"
+REBASE_COMMANDS = {
+    **dict.fromkeys(TRUE_VALUES, ['rebase', '@{upstream}']),
+    'merges': ['rebase', '--rebase-merges', '@{upstream}'],
+}
+# `git merge` option of every `pull.ff` value
+FF_OPTIONS = {
+    'only': '--ff-only',
+    **dict.fromkeys(TRUE_VALUES, '--ff'),
+    **dict.fromkeys(FALSE_VALUES, '--no-ff'),
+}
+
+
+def print_missing_upstream(branch: str | None) -> None:
+    """Explains how to link a branch that has no upstream to a remote."""
+    message: str = _('The current branch is not linked to a remote')
+    print(color_text(f'❌ {message}', 'red'))
+    message = _('Run the following command to configure the remote branch:')
+    print(color_text(f'📌 {message}', 'yellow'))
+    print(
+        color_text(
+            f'   git branch --set-upstream-to=origin/{branch} {branch}',
+            'cyan',
+        )
+    )
+
+
+class BackgroundFetch:
+    """
+    Fetches the upstream remote of the current branch on a thread, so the
+    network round trip overlaps with the user answering the prompts.
+
+    The fetch never asks for credentials; if it fails, `integrate` falls
+    back to a regular `git pull` in the foreground.
+
+    Parameters
+    ----------
+    repo_state : RepoState
+    Snapshot of the repository, used to find the branch and its upstream.
+    """
+
+    def __init__(self, repo_state):
+        self.branch = repo_state.branch
+        self.remote = None
+        if self.branch and repo_state.upstream:
+            facts = load_facts()
+            self.remote = (
+                facts.remote
+                if facts.branch == self.branch
+                else get_backend().config(f'branch.{self.branch}.remote')
+            )
+        self.error: Exception | None = None
+        self._thread = None
+        if self.remote and self.remote != '.':
+            self._thread = threading.Thread(target=self._fetch, daemon=True)
+            self._thread.start()
+
+    def _fetch(self):
+        env = {
+            **os.environ,
+            'GIT_TERMINAL_PROMPT': '0',
+            'GIT_SSH_COMMAND': os.getenv(
+                'GIT_SSH_COMMAND', 'ssh -o BatchMode=yes'
+            ),
+        }
+        try:
+            subprocess.run(
+                ['git', 'fetch', '--quiet', self.remote],
+                check=True,
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                env=env,
+            )
+        except (subprocess.CalledProcessError, OSError) as error:
+            self.error = error
+
+    @property
+    def has_upstream(self) -> bool:
+        """False if there is nothing to pull from."""
+        return self.remote is not None
+
+    def integrate(self) -> bool:
+        """
+        Waits for the fetch and integrates the upstream into the current
+        branch the way `git pull` is configured to (see `get_pull_command`),
+        falling back to `git pull` for what cannot be reproduced.
+
+        Returns
+        -------
+        bool
+        True if the branch is up to date with its upstream.
+        """
+        if self._thread is None:
+            return pull_changes(self.branch)
+        self._thread.join()
+        command = get_pull_command(self.branch)
+        if self.error is not None or command is None:
+            return pull_changes(self.branch)
+
+        message: str = _('Pulling latest changes...')
+        print(color_text(f'🔄 {message}', 'cyan'))
+        try:
+            result = get_backend().run(
+                command,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        except subprocess.CalledProcessError as err:
+            if command == DEFAULT_PULL_COMMAND:
+                # Diverged without a configured strategy: Git explains
+                return pull_changes(self.branch)
+            message = _('Conflict or error when pulling!')
+            print(color_text(f'❌ {message}', 'red'))
+            print(color_text(err.stderr.strip(), 'red'))
+            return False
+        print(color_text(result.stdout, 'green'))
+        return True
+
+
+def get_pull_command(branch: str | None) -> list[str] | None:
+    """
+    Gets the command integrating the fetched upstream like `git pull`.
+
+    The strategy is resolved the way `git pull` does: `branch.<name>.rebase`,
+    then `pull.rebase`, then `pull.ff`.
+
+    Returns
+    -------
+    list[str] or None
+    `git merge` or `git rebase` arguments, or None for a configuration
+    only `git pull` itself handles (e.g. an interactive rebase).
+    """
+    backend = get_backend()
+    rebase = backend.config(f'branch.{branch}.rebase') if branch else None
+    if rebase is None:
+        rebase = backend.config('pull.rebase')
+    if rebase is not None:
+        rebase = rebase.lower()
+        if rebase not in FALSE_VALUES:
+            # None for "interactive" and unknown values
+            return REBASE_COMMANDS.get(rebase)
+    ff = backend.config('pull.ff')
+    if ff is None:
+        if rebase is None:
+            return DEFAULT_PULL_COMMAND
+        return ['merge', '--no-edit', '@{upstream}']
+    option = FF_OPTIONS.get(ff.lower())
+    return option and ['merge', option, '--no-edit', '@{upstream}']
+
+
+def pull_changes(branch: str | None) -> bool:
+    """
+    Pulls the latest changes of the current branch.
+
+    Parameters
+    ----------
+    branch : str or None
+    Current branch, used in the hint shown when it has no upstream.
+
+    Returns
+    -------
+    bool
+    True if the pull succeeded, False otherwise.
+    """
+    message: str = _('Pulling latest changes...')
+    print(color_text(f'🔄 {message}', 'cyan'))
+    try:
+        result = get_backend().run(
+            ['pull'],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except subprocess.CalledProcessError as err:
+        stderr = err.stderr.strip()
+
+        if 'no tracking information' in stderr.lower():
+            print_missing_upstream(branch)
+            return False
+
+        message = _('Conflict or error when pulling!')
+        print(color_text(f'❌ {message}', 'red'))
+        print(color_text(stderr, 'red'))
+        return False
+
+    print(color_text(result.stdout, 'green'))
+    return True
+
+
+def normalize_module(module: str | None) -> str:
+    """Normalizes a commit scope the way the interactive prompt does."""
+    return remove_excess_spaces((module or '').strip().lower()).replace(
+        ' ', '_'
+    )
+
+
+def git_commit_non_interactive(  # noqa: PLR0911, PLR0913, PLR0917
+    commit_type: str,
+    module: str,
+    commit_message: str,
+    add_all: bool = False,
+    push: bool = True,
+    paths: list[str] | None = None,
+) -> int:
+    """
+    Creates a commit without asking anything, for automation.
+
+    Parameters
+    ----------
+    commit_type : str
+    Commit type (see `Rules.types`).
+    module : str
+    Module (scope) that the commit refers to.
+    commit_message : str
+    Commit message.
+    add_all : bool
+    Pull and add every change first, like answering yes interactively;
+    otherwise only what is already staged is committed.
+    push : bool
+    Push the current branch after committing.
+    paths : list[str] or None
+    Paths to stage before committing.
+
+    Returns
+    -------
+    int
+    Exit status: 0 on success, 1 if a Git command (the push included)
+    failed and 2 if the arguments are invalid.
+    """
+    message: str = ''
+    rules = load_rules()
+    module = normalize_module(module)
+    commit_message = remove_excess_spaces(commit_message)
+    if commit_type not in rules.types:
+        message = _('Invalid commit type')
+        print(color_text(f'❌ {message}: {commit_type}', 'red'))
+        return 2
+    if not module:
+        message = _('Module is mandatory')
+        print(color_text(f'❌ {message}', 'red'))
+        return 2
+    if rules.scopes and module not in rules.scopes:
+        message = _('Invalid commit scope')
+        print(color_text(f'❌ {message}: {module}', 'red'))
+        return 2
+    if not commit_message:
+        message = _('Commit message is mandatory')
+        print(color_text(f'❌ {message}!', 'red'))
+        return 2
+
+    git_user = get_git_user()
+    if git_user is None:
+        return 1
+    if add_all and not pull_changes(get_current_branch()):
+        return 1
+    try:
+        if add_all:
+            add_changes()
+        elif paths:
+            add_changes(paths)
+    except subprocess.CalledProcessError:
+        return 1
+    if not has_staged_changes():
+        message = _('No changes to commit')
+        print(color_text(f'❌ {message}.', 'red'))
+        return 1
+    try:
+        create_commit(commit_type, module, commit_message, git_user)
+    except subprocess.CalledProcessError:
+        return 1
+
+    if push and not execute_push(get_current_branch()):
+        return 1
+    return 0
+
+
+def read_batch(stream) -> list[dict]:
+    """
+    Reads batch commit requests from a JSON array or JSON lines.
+
+    Each request is an object with "type", "scope" and "message" keys and
+    optionally "paths", the files to stage for that commit.
+    """
+    text = stream.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def git_commit_batch(stream, push: bool = True) -> int:
+    """
+    Creates one commit per request read from `stream` (see `read_batch`)
+    and pushes once at the end.
+
+    Returns
+    -------
+    int
+    Exit status of the first failing commit, 1 if the push failed and 0
+    if all succeeded.
+    """
+    try:
+        requests = read_batch(stream)
+    except json.JSONDecodeError as error:
+        message: str = _('Invalid batch input')
+        print(color_text(f'❌ {message}: {error}', 'red'))
+        return 2
+
+    for request in requests:
+        status = git_commit_non_interactive(
+            request.get('type'),
+            request.get('scope'),
+            request.get('message'),
+            push=False,
+            paths=request.get('paths'),
+        )
+        if status:
+            return status
+
+    if push and requests and not execute_push(get_current_branch()):
+        return 1
+    return 0
+
+
+def select_changes(repo_state) -> list[str]:
+    """
+    Lets the user pick which changes to add from the status buckets.
+
+    Buckets with more than PICKER_LIMIT paths are offered by top-level
+    directory instead of file by file.
+
+    Parameters
+    ----------
+    repo_state : RepoState
+    Snapshot of the repository.
+
+    Returns
+    -------
+    list[str]
+    Selected files and directories, relative to the repository root.
+    """
+    import inquirer  # noqa: PLC0415
+
+    choices = []
+    for icon, bucket in (
+        ('⚠️', repo_state.unmerged),
+        ('📋', repo_state.not_staged),
+        ('❌', repo_state.untracked),
+    ):
+        if bucket.total <= PICKER_LIMIT:
+            choices.extend((f'{icon} {path}', path) for path in bucket)
+            continue
+        choices.extend(
+            (f'{icon} {path}', path) for path in bucket if '/' not in path
+        )
+        choices.extend(
+            (f'{icon} 📁 {directory} ({count})', directory)
+            for directory, count in bucket.directories.most_common()
+            if directory != '.'
+        )
+    if not choices:
+        return []
+
+    message: str = _('Select the changes to add')
+    answers = inquirer.prompt([
+        inquirer.Checkbox('paths', message=message, choices=choices)
+    ])
+    if not answers:
+        raise KeyboardInterrupt
+    return list(dict.fromkeys(answers['paths']))
 
 
 def git_commit():  # noqa: PLR0912, PLR0915
+    # The TUI libraries are only needed (and loaded) by the interactive flow
+    import inquirer  # noqa: PLC0415
+    from prompt_toolkit import HTML, prompt  # noqa: PLC0415
+
     message: str = ''
     message_yes: str = _('y')
     message_no: str = _('n')
@@ -39,6 +425,10 @@ def git_commit():  # noqa: PLR0912, PLR0915
         git_status = get_git_status()
         if git_status:
             print(color_text(git_status, 'yellow'))
+        # Snapshot taken by get_git_status, reused until the index changes
+        repo_state = get_backend().status()
+        fetch = BackgroundFetch(repo_state)
+        rules = load_rules()
 
         message = _('Do you want to add all changes')
         add_all = (
@@ -55,57 +445,28 @@ def git_commit():  # noqa: PLR0912, PLR0915
             or f'{message_yes}'
         )
 
-        if add_all == message_yes:
-            try:
-                message: str = _('Pulling latest changes...')
-                print(color_text(f'🔄 {message}', 'cyan'))
-                result = subprocess.run(
-                    ['git', 'pull'],
-                    check=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
+        paths_to_add = None
+        if add_all == message_no:
+            paths_to_add = select_changes(repo_state)
+            if not paths_to_add:
+                message = _(
+                    'Manually add the changes and run the command again'
                 )
-                print(color_text(result.stdout, 'green'))
-
-            except subprocess.CalledProcessError as err:
-                stderr = err.stderr.strip()
-
-                if 'no tracking information' in stderr.lower():
-                    current_branch = get_current_branch()
-                    message: str = _(
-                        'The current branch is not linked to a remote'
-                    )
-                    print(color_text(f'❌ {message}', 'red'))
-                    message: str = _(
-                        'Run the following command to configure the remote branch:'  # noqa: E501
-                    )
-                    print(color_text(f'📌 {message}', 'yellow'))
-                    print(
-                        color_text(
-                            '   git branch --set-upstream-to=origin/'
-                            f'{current_branch} {current_branch}',
-                            'cyan',
-                        )
-                    )
-                    sys.exit(1)
-
-                message: str = _('Conflict or error when pulling!')
-                print(color_text(f'❌ {message}', 'red'))
-                print(color_text(stderr, 'red'))
-                sys.exit(1)
-
-            add_changes()
-        elif add_all == message_no:
-            message = _('Manually add the changes and run the command again')
-            print(color_text(f'❌ {message}.', 'red'))
-            return sys.exit(0)
-        else:
+                print(color_text(f'❌ {message}.', 'red'))
+                return sys.exit(0)
+        elif add_all != message_yes:
             message = _('Invalid option')
             print(color_text(f'❌ {message}!', 'red'))
             return check_status()
 
-        check_status()
+        if not fetch.has_upstream:
+            print_missing_upstream(repo_state.branch)
+            sys.exit(1)
+        # Pulling and adding wait until right before the commit, so the
+        # fetch runs while the questions below are answered
+
+        if not repo_state.has_changes:
+            check_status()
 
         def commit_type_input():
             feat: str = _('New functionality')
@@ -118,16 +479,26 @@ def git_commit():  # noqa: PLR0912, PLR0915
             chore: str = _('Configuration changes')
             ci: str = _('Changes in continuous integration')
 
+            known_choices = {
+                'feat': f'✨ feat - {feat}',
+                'fix': f'🐛 fix - {fix}',
+                'refactor': f'🛠️ refactor - {refactor}',
+                'docs': f'📖 docs - {docs}',
+                'style': f'🎨 style - {style}',
+                'perf': f'🚀 perf - {perf}',
+                'test': f'✅ test - {test}',
+                'chore': f'⚙️ chore - {chore}',
+                'ci': f'💚 ci - {ci}',
+            }
+            # Offered in the order of the rules, custom types included
             commit_type_choices: list[str] = [
-                {'name': f'✨ feat - {feat}', 'value': 'feat'},
-                {'name': f'🐛 fix - {fix}', 'value': 'fix'},
-                {'name': f'🛠️ refactor - {refactor}', 'value': 'refactor'},
-                {'name': f'📖 docs - {docs}', 'value': 'docs'},
-                {'name': f'🎨 style - {style}', 'value': 'style'},
-                {'name': f'🚀 perf - {perf}', 'value': 'perf'},
-                {'name': f'✅ test - {test}', 'value': 'test'},
-                {'name': f'⚙️ chore - {chore}', 'value': 'chore'},
-                {'name': f'💚 ci - {ci}', 'value': 'ci'},
+                {
+                    'name': known_choices.get(
+                        commit_type, f'🔖 {commit_type}'
+                    ),
+                    'value': commit_type,
+                }
+                for commit_type in rules.types
             ]
             message = _('Choose commit type')
 
@@ -172,13 +543,28 @@ def git_commit():  # noqa: PLR0912, PLR0915
 
         commit_type = commit_type_input()
 
+        # Pre-filled with the scope the changed paths map to
+        suggested_module = (
+            ScopeResolver.load().infer(
+                paths_to_add or repo_state.changed_paths()
+            )
+            or ''
+        )
+        if rules.scopes and suggested_module not in rules.scopes:
+            suggested_module = ''
+        scope_completer = get_scope_completer(rules.scopes)
+
         def module_input():
             message = _(
                 'Which module was changed? (example: core, api, models): '
             )
             module = remove_excess_spaces(
                 (
-                    prompt(HTML(f'<ansimagenta>🗂️ {message} </ansimagenta>'))
+                    prompt(
+                        HTML(f'<ansimagenta>🗂️ {message} </ansimagenta>'),
+                        default=suggested_module,
+                        completer=scope_completer,
+                    )
                     .strip()
                     .lower()
                 )
@@ -187,6 +573,11 @@ def git_commit():  # noqa: PLR0912, PLR0915
                 message = _('Module is mandatory')
                 print(color_text(f'❌ {message}', 'red'))
                 return module_input()
+            if rules.scopes and module not in rules.scopes:
+                message = _('Invalid commit scope')
+                scopes = ', '.join(rules.scopes)
+                print(color_text(f'❌ {message}: {module} ({scopes})', 'red'))
+                return module_input()
             return module
 
         module = module_input()
@@ -231,6 +622,10 @@ def git_commit():  # noqa: PLR0912, PLR0915
                 return send_commit_input()
 
         if send_commit_input():
+            if not fetch.integrate():
+                sys.exit(1)
+            add_changes(paths_to_add)
+            check_status()
             create_commit(commit_type, module, commit_message, git_user)
         else:
             message = _('Commit canceled')
@@ -249,15 +644,9 @@ def git_commit():  # noqa: PLR0912, PLR0915
 
             if push == message_yes:
                 current_branch = get_current_branch()
-                if is_git_flow() and current_branch:
-                    if (
-                        current_branch.startswith('feature/')
-                        or current_branch.startswith('hotfix/')
-                        or current_branch.startswith('release/')
-                    ):
-                        handle_git_flow(current_branch)
-                    else:
-                        execute_push(current_branch)
+                kind = is_git_flow() and load_facts().flow_kind(current_branch)
+                if kind:
+                    handle_git_flow(current_branch, kind)
                 else:
                     execute_push(current_branch)
                 return True
@@ -0,0 +1,385 @@
+"""
+Resident commit-msg validation daemon.
+
+The daemon keeps the compiled rules and the repository metadata in
+memory and answers the thin hook client installed by
+`task_commit_init --daemon` over a Unix socket, so validating a commit
+costs one connection instead of a shell pipeline or a full interpreter
+start-up. The client falls back to inline validation (and starts the
+daemon for the next commit) whenever the daemon is unavailable.
+"""
+
+import contextlib
+import hashlib
+import os
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+
+from .cache import get_cache_dir, get_git_dir
+from .facts import load_facts
+from .i18n import _
+from .init import CO_AUTHORED_BRANCHES, TYPES_DESCRIPTION
+from .lint import Validator
+from .repository import abbrev_head
+from .rules import load_rules
+from .trace import TRACE_ENV, enable_from_env
+
+SOCKET_NAME = 'daemon.sock'
+# Directory of the sockets too long for `.git/`, in the runtime directory
+RUNTIME_DIR_NAME = 'task_commit'
+# Longest socket path every platform accepts (sun_path is 104-108 bytes)
+MAX_SOCKET_PATH = 100
+IDLE_TIMEOUT = 30 * 60  # seconds without requests before the daemon exits
+REQUEST_TIMEOUT = 5.0
+
+HOOK_CLIENT = """#!{python} -S
+# task_commit commit-msg hook: asks the resident daemon for the verdict.
+import os
+import socket
+import stat
+import sys
+
+PYTHON = {python!r}
+SOCKET_PATH = {socket_path!r}
+
+
+def fallback(path):
+    import subprocess
+
+    # The daemon outlives this commit: it must not write the user's trace
+    env = {{
+        k: v
+        for k, v in os.environ.items()
+        if not k.startswith('GIT_') and k != {trace_env!r}
+    }}
+    subprocess.Popen(
+        [PYTHON, '-m', 'task_commit.daemon', 'serve'],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    os.execv(PYTHON, [PYTHON, '-m', 'task_commit.daemon', 'check', path])
+
+
+def is_owned(path):
+    info = os.lstat(path)
+    return info.st_uid == os.getuid() and not stat.S_ISLNK(info.st_mode)
+
+
+path = os.path.abspath(sys.argv[1])
+try:
+    if not (is_owned(os.path.dirname(SOCKET_PATH)) and is_owned(SOCKET_PATH)):
+        raise OSError('socket not owned by the current user')
+    client = socket.socket(socket.AF_UNIX)
+    client.connect(SOCKET_PATH)
+    with client:
+        client.sendall(b'check ' + os.fsencode(path) + b'\\n')
+        client.shutdown(socket.SHUT_WR)
+        reply = b''.join(iter(lambda: client.recv(65536), b''))
+except OSError:
+    reply = b''
+if not reply:
+    fallback(path)
+status, _sep, output = reply.partition(b'\\n')
+sys.stdout.buffer.write(output)
+sys.stdout.flush()
+sys.exit(int(status))
+"""
+
+
+def is_supported() -> bool:
+    """True if the platform has Unix domain sockets."""
+    return hasattr(socket, 'AF_UNIX')
+
+
+def get_runtime_dir() -> str:
+    """
+    Gets (and creates) the private directory of the sockets too long for
+    `.git/task_commit/`.
+
+    It is created with mode 0700 in $XDG_RUNTIME_DIR, or in the temporary
+    directory under a per-user name.
+    """
+    runtime_dir = os.getenv('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        path = os.path.join(runtime_dir, RUNTIME_DIR_NAME)
+    else:
+        path = os.path.join(
+            tempfile.gettempdir(), f'{RUNTIME_DIR_NAME}-{os.getuid()}'
+        )
+    with contextlib.suppress(FileExistsError):
+        os.mkdir(path, 0o700)
+    return path
+
+
+def get_socket_path(git_dir: str) -> str:
+    """
+    Gets the socket of the daemon of a repository.
+
+    The socket lives in `.git/task_commit/`, unless that path is too long
+    for a socket address: then a name derived from the Git directory is
+    used in the private directory of `get_runtime_dir`.
+    """
+    cache_dir = get_cache_dir(git_dir)
+    path = os.path.join(cache_dir, SOCKET_NAME)
+    if len(os.fsencode(path)) <= MAX_SOCKET_PATH:
+        return path
+    digest = hashlib.sha256(os.fsencode(git_dir)).hexdigest()[:16]
+    return os.path.join(get_runtime_dir(), f'{digest}.sock')
+
+
+def is_owned(path: str) -> bool:
+    """
+    True if `path` exists, is not a symbolic link and belongs to the
+    current user.
+    """
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return info.st_uid == os.getuid() and not stat.S_ISLNK(info.st_mode)
+
+
+def is_private(socket_path: str) -> bool:
+    """
+    True if the socket and its directory belong to the current user, so
+    no other user can have planted the socket or answer on it.
+    """
+    return is_owned(os.path.dirname(socket_path)) and is_owned(socket_path)
+
+
+def get_hook_client(socket_path: str, python: str = sys.executable) -> str:
+    """Renders the commit-msg hook that talks to the daemon."""
+    return HOOK_CLIENT.format(
+        python=python, socket_path=socket_path, trace_env=TRACE_ENV
+    )
+
+
+def read_branch(git_dir: str) -> str:
+    """
+    Gets the current branch by reading `HEAD`, like
+    `git rev-parse --abbrev-ref HEAD` without the process.
+    """
+    return abbrev_head(git_dir) or 'HEAD'
+
+
+def get_user_name() -> str:
+    """
+    Gets `user.name` for the co-author trailer.
+
+    It comes from the repository facts, derived again whenever a file of
+    the configuration cascade (or a variable it depends on) changes.
+    """
+    try:
+        user = load_facts().user
+    except subprocess.CalledProcessError:
+        user = None
+    return user or 'Unknown User'
+
+
+class HookChecker:
+    """
+    Applies the commit-msg hook rules to message files.
+
+    Parameters
+    ----------
+    git_dir : str
+    Git directory of the repository the messages belong to.
+    validator : Validator or None
+    Compiled rules, defaults to the rules of the repository, compiled
+    again whenever they change.
+    """
+
+    def __init__(self, git_dir: str, validator: Validator | None = None):
+        self.git_dir = git_dir
+        self._fixed_validator = validator
+        self._validator: Validator | None = None
+
+    @property
+    def validator(self) -> Validator:
+        if self._fixed_validator is not None:
+            return self._fixed_validator
+        rules = load_rules()
+        if self._validator is None or self._validator.rules != rules:
+            self._validator = Validator(rules)
+        return self._validator
+
+    def check(self, path: str) -> tuple[int, str]:
+        """
+        Validates a commit message file, adding the co-author trailer on
+        feature, hotfix and release branches.
+
+        Returns
+        -------
+        tuple[int, str]
+        Exit status of the hook and the text it prints.
+        """
+        with open(path, encoding='utf-8', errors='replace') as message_file:
+            message = message_file.read()
+        if self.validator.validate(message) is not None:
+            if not message.strip():
+                reason = _('Commit message cannot be empty')
+                return 1, f'❌ {reason}!\n'
+            reason = _('Invalid commit message')
+            pattern = _('Use Conventional Commits pattern')
+            return 1, f'❌ {reason}! {pattern}.\n{TYPES_DESCRIPTION}\n'
+        if read_branch(self.git_dir).startswith(CO_AUTHORED_BRANCHES):
+            with open(path, 'a', encoding='utf-8') as message_file:
+                message_file.write(f'\nCo-authored-by: {get_user_name()}\n')
+        return 0, ''
+
+
+def _handle(checker: HookChecker, connection: socket.socket) -> bool:
+    request = b''.join(iter(lambda: connection.recv(65536), b''))
+    command, _sep, argument = request.rstrip(b'\n').partition(b' ')
+    if command == b'stop':
+        connection.sendall(b'0\n')
+        return False
+    if command == b'ping':
+        connection.sendall(b'0\n')
+    elif command == b'check':
+        try:
+            status, output = checker.check(os.fsdecode(argument))
+        except OSError as error:
+            status, output = 1, f'❌ {error}\n'
+        connection.sendall(f'{status}\n{output}'.encode())
+    return True
+
+
+def serve(git_dir: str, socket_path: str, idle_timeout=IDLE_TIMEOUT) -> int:
+    """
+    Answers hook clients until stopped or idle for `idle_timeout` seconds.
+
+    Returns
+    -------
+    int
+    0 once stopped, 1 if another daemon already serves the repository or
+    the socket (or its directory) belongs to another user.
+    """
+    if ping(socket_path):
+        return 1
+    if not is_owned(os.path.dirname(socket_path)):
+        return 1
+    if os.path.lexists(socket_path):
+        if not is_owned(socket_path):
+            return 1  # Planted by another user
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(socket_path)  # left behind by a daemon that died
+    checker = HookChecker(git_dir)
+    with socket.socket(socket.AF_UNIX) as server:
+        try:
+            server.bind(socket_path)
+        except OSError:
+            return 1
+        inode = os.stat(socket_path).st_ino
+        try:
+            os.chmod(socket_path, 0o600)
+            server.listen()
+            server.settimeout(idle_timeout)
+            running = True
+            while running:
+                try:
+                    connection, _address = server.accept()
+                except TimeoutError:
+                    break
+                with connection:
+                    connection.settimeout(REQUEST_TIMEOUT)
+                    try:
+                        running = _handle(checker, connection)
+                    except OSError:
+                        continue
+        finally:
+            # A daemon started concurrently may have replaced the socket
+            with contextlib.suppress(FileNotFoundError):
+                if os.stat(socket_path).st_ino == inode:
+                    os.unlink(socket_path)
+    return 0
+
+
+def _request(socket_path: str, command: bytes) -> bytes:
+    if not is_private(socket_path):
+        return b''
+    try:
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(socket_path)
+            client.sendall(command + b'\n')
+            client.shutdown(socket.SHUT_WR)
+            return b''.join(iter(lambda: client.recv(65536), b''))
+    except OSError:
+        return b''
+
+
+def ping(socket_path: str) -> bool:
+    """True if a daemon answers on the socket."""
+    return bool(_request(socket_path, b'ping'))
+
+
+def stop(socket_path: str) -> bool:
+    """Stops the daemon of the socket, returning False if none was running."""
+    return bool(_request(socket_path, b'stop'))
+
+
+def start(git_dir: str | None = None) -> subprocess.Popen | None:
+    """
+    Starts the daemon of the current repository in the background.
+
+    Returns
+    -------
+    subprocess.Popen or None
+    The daemon process, None if it was already running or outside a
+    repository.
+    """
+    git_dir = git_dir or get_git_dir()
+    if git_dir is None or ping(get_socket_path(git_dir)):
+        return None
+    # Traced commands would otherwise have their trace overwritten by the
+    # daemon when it exits
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if not k.startswith('GIT_') and k != TRACE_ENV
+    }
+    return subprocess.Popen(
+        [sys.executable, '-m', 'task_commit.daemon', 'serve'],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Entry point of `python -m task_commit.daemon`.
+
+    `serve` runs the daemon in the foreground, `check FILE` validates a
+    message inline (the fallback of the hook client) and `stop` stops
+    the running daemon.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    enable_from_env()
+    git_dir = get_git_dir()
+    if git_dir is None or not argv:
+        return 2
+    command = argv[0]
+    if command == 'check' and len(argv) == 2:  # noqa: PLR2004
+        sys.stdout.reconfigure(encoding='utf-8')
+        status, output = HookChecker(git_dir).check(argv[1])
+        sys.stdout.write(output)
+        return status
+    socket_path = get_socket_path(git_dir)
+    if command == 'serve':
+        return serve(git_dir, socket_path)
+    if command == 'stop':
+        return 0 if stop(socket_path) else 1
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+Extracts the translatable messages of Python sources into a .pot file.
+
+Sources are parsed with `ast`, so only real calls to `_()` and the
+gettext functions count, not text that merely looks like one. What each
+file contains is cached by content hash: a refresh only parses the files
+that changed, on a process pool when there are several. The .pot file
+written only depends on the sources (and `SOURCE_DATE_EPOCH`).
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+import time
+from typing import NamedTuple
+
+from .cache import get_cache_dir, write_atomic
+
+MESSAGES_CACHE_FILE = 'messages.json'
+# Version of the extractor, bumped when what it extracts changes
+EXTRACT_VERSION = 1
+# Arguments holding the (context, msgid, plural) of every keyword
+KEYWORDS = {
+    '_': (None, 0, None),
+    'gettext': (None, 0, None),
+    'ngettext': (None, 0, 1),
+    'pgettext': (0, 1, None),
+    'npgettext': (0, 1, 2),
+}
+WIDTH = 79
+POT_HEADER = """\
+# SOME DESCRIPTIVE TITLE.
+# Copyright (C) YEAR THE PACKAGE'S COPYRIGHT HOLDER
+# This file is distributed under the same license as the PACKAGE package.
+# FIRST AUTHOR <EMAIL@ADDRESS>, YEAR.
+#
+#, fuzzy
+msgid ""
+msgstr ""
+"Project-Id-Version: PACKAGE VERSION\\n"
+"Report-Msgid-Bugs-To: \\n"
+{creation_date}\
+"PO-Revision-Date: YEAR-MO-DA HO:MI+ZONE\\n"
+"Last-Translator: FULL NAME <EMAIL@ADDRESS>\\n"
+"Language-Team: LANGUAGE <LL@li.org>\\n"
+"Language: \\n"
+"MIME-Version: 1.0\\n"
+"Content-Type: text/plain; charset=CHARSET\\n"
+"Content-Transfer-Encoding: 8bit\\n"
+"""
+_PYTHON_FORMAT = re.compile(
+    r'%(?:\([^)]*\))?[#0+ -]*(?:\*|\d+)?(?:\.(?:\*|\d+))?[diouxXeEfFgGcrsa]'
+)
+_ESCAPES = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\t': '\\t', '\r': '\\r'}
+
+
+class Message(NamedTuple):
+    context: str | None
+    msgid: str
+    plural: str | None
+    line: int
+
+
+def _keyword(func: ast.expr) -> str | None:
+    if isinstance(func, ast.Name):
+        name = func.id
+    elif isinstance(func, ast.Attribute):
+        name = func.attr
+    else:
+        return None
+    return name if name in KEYWORDS else None
+
+
+def _literal(args: list[ast.expr], index: int | None) -> str | None:
+    if index is None or index >= len(args):
+        return None
+    arg = args[index]
+    if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+        return arg.value
+    return None
+
+
+def extract_source(source: str | bytes, path: str = '<string>') -> list:
+    """
+    Finds the messages of a Python source, in source order.
+
+    Calls whose message is not a string literal are ignored, as
+    `xgettext` does.
+
+    Returns
+    -------
+    list[Message]
+    One message per call, with the line of its msgid.
+
+    ------
+    SyntaxError
+    If the source is not valid Python.
+    """
+    found = []
+    for node in ast.walk(ast.parse(source, path)):
+        if not isinstance(node, ast.Call):
+            continue
+        keyword = _keyword(node.func)
+        if keyword is None:
+            continue
+        context_index, msgid_index, plural_index = KEYWORDS[keyword]
+        msgid = _literal(node.args, msgid_index)
+        if msgid is None:
+            continue
+        context = _literal(node.args, context_index)
+        if context_index is not None and context is None:
+            continue
+        arg = node.args[msgid_index]
+        plural = _literal(node.args, plural_index)
+        found.append((
+            (arg.lineno, arg.col_offset),
+            Message(context, msgid, plural, arg.lineno),
+        ))
+    found.sort(key=lambda item: item[0])
+    return [message for _position, message in found]
+
+
+def _extract(source: bytes, path: str) -> list[list]:
+    # Lists travel back from the workers and into the JSON cache as is
+    return [list(message) for message in extract_source(source, path)]
+
+
+def _load_cache(cache_path: str | None) -> dict:
+    if cache_path is None:
+        return {}
+    try:
+        with open(cache_path, encoding='utf-8') as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    if cached.get('version') != EXTRACT_VERSION:
+        return {}
+    return cached.get('files', {})
+
+
+def extract_messages(
+    paths: list[str], jobs: int | None = None
+) -> tuple[dict[str, list[Message]], list[str]]:
+    """
+    Extracts the messages of several files, parsing only those changed.
+
+    The messages of every file are kept in `.git/task_commit/` with the
+    hash of its content. Files without a matching entry are parsed on a
+    process pool unless `jobs` is 1 or only one changed.
+
+    Parameters
+    ----------
+    paths : list[str]
+    Python files, in the order their messages go in the .pot file.
+    jobs : int or None
+    Number of worker processes, defaults to the number of CPUs.
+
+    Returns
+    -------
+    tuple[dict[str, list[Message]], list[str]]
+    Messages by file, in the order of `paths`, and the files parsed.
+
+    ------
+    SyntaxError
+    If a changed file is not valid Python.
+    """
+    cache_dir = get_cache_dir()
+    cache_path = cache_dir and os.path.join(cache_dir, MESSAGES_CACHE_FILE)
+    cached = _load_cache(cache_path)
+    files = {}
+    changed = {}
+    for path in paths:
+        with open(path, 'rb') as source_file:
+            source = source_file.read()
+        digest = hashlib.sha256(source).hexdigest()
+        entry = cached.get(path)
+        if entry is not None and entry['hash'] == digest:
+            files[path] = entry
+        else:
+            files[path] = {'hash': digest, 'messages': None}
+            changed[path] = source
+
+    jobs = min(jobs or os.cpu_count() or 1, len(changed))
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor  # noqa: PLC0415
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(
+                executor.map(_extract, changed.values(), changed.keys())
+            )
+    else:
+        results = [_extract(source, path) for path, source in changed.items()]
+    for path, messages in zip(changed, results, strict=True):
+        files[path]['messages'] = messages
+
+    if cache_path is not None and (changed or len(cached) != len(files)):
+        data = {'version': EXTRACT_VERSION, 'files': files}
+        try:
+            write_atomic(cache_path, json.dumps(data, sort_keys=True))
+        except OSError:
+            pass
+    messages = {
+        path: [Message(*message) for message in entry['messages']]
+        for path, entry in files.items()
+    }
+    return messages, list(changed)
+
+
+def _escape(text: str) -> str:
+    return ''.join(_ESCAPES.get(char, char) for char in text)
+
+
+def _wrap(escaped: str) -> list[str]:
+    # Lines break after every "\n" and, past the width, after a space
+    lines = []
+    for part in re.findall(r'(?:[^\\]|\\[^n])*(?:\\n|$)', escaped):
+        line = ''
+        for word in re.findall(r'[^ ]* *', part):
+            if line and len(line) + len(word) + 2 > WIDTH:
+                lines.append(line)
+                line = ''
+            line += word
+        if line:
+            lines.append(line)
+    return lines
+
+
+def format_string(keyword: str, text: str) -> str:
+    """Formats a .po keyword and its string, wrapped like `xgettext`."""
+    escaped = _escape(text)
+    single = f'{keyword} "{escaped}"'
+    if len(single) <= WIDTH and '\\n' not in escaped[:-2]:
+        return single
+    lines = [f'{keyword} ""', *(f'"{line}"' for line in _wrap(escaped))]
+    return '\n'.join(lines)
+
+
+def _format_references(references: list[str]) -> list[str]:
+    lines = []
+    line = '#:'
+    for reference in references:
+        if line != '#:' and len(line) + 1 + len(reference) > WIDTH:
+            lines.append(line)
+            line = '#:'
+        line += ' ' + reference
+    lines.append(line)
+    return lines
+
+
+def _creation_date() -> str:
+    epoch = os.getenv('SOURCE_DATE_EPOCH')
+    if not epoch:
+        return ''
+    date = time.strftime('%Y-%m-%d %H:%M+0000', time.gmtime(int(epoch)))
+    return f'"POT-Creation-Date: {date}\\n"\n'
+
+
+def format_pot(messages: dict[str, list[Message]]) -> str:
+    """
+    Formats the extracted messages as a .pot file.
+
+    Messages are listed in the order they first appear, with every place
+    they appear. POT-Creation-Date is only written when
+    `SOURCE_DATE_EPOCH` sets it, so the same sources give the same file.
+    """
+    entries: dict[tuple, dict] = {}
+    for path, file_messages in messages.items():
+        for message in file_messages:
+            key = (message.context, message.msgid)
+            entry = entries.setdefault(
+                key, {'plural': message.plural, 'references': []}
+            )
+            entry['plural'] = entry['plural'] or message.plural
+            reference = f'{path}:{message.line}'
+            if reference not in entry['references']:
+                entry['references'].append(reference)
+
+    blocks = [POT_HEADER.format(creation_date=_creation_date())]
+    for (context, msgid), entry in entries.items():
+        lines = _format_references(entry['references'])
+        if _PYTHON_FORMAT.search(msgid.replace('%%', '')):
+            lines.append('#, python-format')
+        if context is not None:
+            lines.append(format_string('msgctxt', context))
+        lines.append(format_string('msgid', msgid))
+        if entry['plural'] is None:
+            lines.append('msgstr ""')
+        else:
+            lines.append(format_string('msgid_plural', entry['plural']))
+            lines.extend(('msgstr[0] ""', 'msgstr[1] ""'))
+        blocks.append('\n'.join(lines) + '\n')
+    return '\n'.join(blocks)
+
+
+def write_pot(
+    paths: list[str], pot_path: str, jobs: int | None = None
+) -> list[str]:
+    """
+    Extracts the messages of `paths` into a .pot file.
+
+    Returns
+    -------
+    list[str]
+    Files parsed again because they changed since the last extraction.
+
+    ------
+    SyntaxError
+    If a changed file is not valid Python.
+    """
+    messages, parsed = extract_messages(paths, jobs)
+    write_atomic(pot_path, format_pot(messages))
+    return parsed
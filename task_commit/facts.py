@@ -0,0 +1,211 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+
+from .backend import get_backend
+from .cache import CACHE_DIR, get_cache_dir, get_git_dir, write_atomic
+from .init import CO_AUTHORED_BRANCHES
+from .repository import BRANCH_PREFIX, LOCATE_ENV, read_head
+
+FACTS_CACHE_FILE = 'facts.json'
+# Version of the cached facts, bumped when RepoFacts changes
+FACTS_VERSION = 2
+FLOW_KINDS = tuple(prefix.rstrip('/') for prefix in CO_AUTHORED_BRANCHES)
+# Environment variables the configuration depends on, besides those
+# starting with GIT_CONFIG (GIT_CONFIG_GLOBAL, GIT_CONFIG_COUNT, ...)
+STAMP_ENV = ('HOME', 'XDG_CONFIG_HOME', *LOCATE_ENV)
+
+# Facts already derived by this process, with the Git directory, the
+# configuration files and the stamp they match
+_loaded: tuple[str, list[str], list, 'RepoFacts'] | None = None
+
+
+@dataclass(frozen=True)
+class RepoFacts:
+    """
+    Facts derived from the Git configuration and HEAD, which change a few
+    times a year but are needed on every commit.
+
+    Attributes
+    ----------
+    user : str or None
+    `user.name`.
+    git_flow : bool
+    True if `git flow init` configured the repository.
+    flow_prefixes : dict[str, str]
+    Branch prefix of every Git Flow kind ("feature" -> "feature/").
+    branch : str or None
+    Current branch, None when HEAD is detached.
+    remote : str or None
+    Remote the current branch tracks.
+    merge : str or None
+    Upstream ref of the current branch on that remote.
+    """
+
+    user: str | None = None
+    git_flow: bool = False
+    flow_prefixes: dict[str, str] = field(default_factory=dict)
+    branch: str | None = None
+    remote: str | None = None
+    merge: str | None = None
+
+    def flow_kind(self, branch: str | None) -> str | None:
+        """Gets the Git Flow kind ("feature", ...) of a branch, if any."""
+        if not (self.git_flow and branch):
+            return None
+        for kind, prefix in self.flow_prefixes.items():
+            if prefix and branch.startswith(prefix):
+                return kind
+        return None
+
+
+def get_stamp(git_dir: str, files: list[str]) -> list | None:
+    """
+    Gets the modification times and sizes the facts are valid for.
+
+    Parameters
+    ----------
+    git_dir : str
+    Git directory, whose HEAD is stamped too.
+    files : list[str]
+    Configuration files the facts were read from, included ones too.
+
+    Returns
+    -------
+    list or None
+    One (mtime, size) pair per file (None if the file does not exist)
+    and HEAD, then the configuration environment variables; None if HEAD
+    is missing.
+    """
+    stamp: list = []
+    for path in [*files, os.path.join(git_dir, 'HEAD')]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append([stat.st_mtime_ns, stat.st_size])
+    if stamp[-1] is None:
+        return None
+    stamp.append(
+        sorted(
+            [name, value]
+            for name, value in os.environ.items()
+            if name.startswith('GIT_CONFIG') or name in STAMP_ENV
+        )
+    )
+    return stamp
+
+
+def read_branch(git_dir: str | None) -> str | None:
+    """Reads the current branch from HEAD, None when detached."""
+    if git_dir is None:
+        return None
+    target, _oid = read_head(git_dir)
+    if target is None or not target.startswith(BRANCH_PREFIX):
+        return None
+    return target.removeprefix(BRANCH_PREFIX)
+
+
+def derive_facts(git_dir: str | None) -> RepoFacts:
+    """
+    Derives the facts from the Git configuration.
+
+    ------
+    subprocess.CalledProcessError
+    If the configuration cannot be read.
+    """
+    backend = get_backend()
+    branch = read_branch(git_dir)
+    git_flow = bool(
+        backend.config('gitflow.branch.develop')
+        and (
+            backend.config('gitflow.branch.master')
+            or backend.config('gitflow.branch.main')
+        )
+    )
+    return RepoFacts(
+        user=backend.config('user.name', '').strip() or None,
+        git_flow=git_flow,
+        flow_prefixes={
+            kind: backend.config(f'gitflow.prefix.{kind}', f'{kind}/')
+            for kind in FLOW_KINDS
+        },
+        branch=branch,
+        remote=branch and backend.config(f'branch.{branch}.remote'),
+        merge=branch and backend.config(f'branch.{branch}.merge'),
+    )
+
+
+def _read_cache(cache_path: str) -> tuple[list[str], list, RepoFacts] | None:
+    try:
+        with open(cache_path, encoding='utf-8') as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if cached.get('version') != FACTS_VERSION:
+        return None
+    try:
+        return cached['files'], cached['stamp'], RepoFacts(**cached['facts'])
+    except (KeyError, TypeError):
+        return None
+
+
+def load_facts() -> RepoFacts:
+    """
+    Loads the facts of the current repository.
+
+    They are cached in `.git/task_commit/` and derived again only when
+    HEAD, one of the configuration files read (included ones too) or the
+    configuration environment variables change, so a commit usually reads
+    them without running Git. Nothing is cached when Git itself had to
+    read the configuration, since the files it used are then unknown.
+
+    ------
+    subprocess.CalledProcessError
+    If the facts must be derived and the configuration cannot be read.
+    """
+    global _loaded  # noqa: PLW0603
+
+    git_dir = get_git_dir()
+    if git_dir is None:
+        return derive_facts(git_dir)
+    if _loaded is not None and _loaded[0] == git_dir:
+        _git_dir, files, stamp, facts = _loaded
+        if stamp == get_stamp(git_dir, files):
+            return facts
+        # The configuration changed during this (long-lived) process
+        get_backend().invalidate(config=True)
+
+    cache_path = os.path.join(git_dir, CACHE_DIR, FACTS_CACHE_FILE)
+    cached = _read_cache(cache_path)
+    if cached is not None and cached[1] == get_stamp(git_dir, cached[0]):
+        files, stamp, facts = cached
+    else:
+        # Stamped before the facts are derived: a change in between is
+        # seen on the next load
+        files = get_backend().config_files()
+        stamp = files is not None and get_stamp(git_dir, files)
+        facts = derive_facts(git_dir)
+        if not stamp:
+            return facts
+        cached = {
+            'version': FACTS_VERSION,
+            'files': files,
+            'stamp': stamp,
+            'facts': asdict(facts),
+        }
+        try:
+            get_cache_dir(git_dir)
+            write_atomic(cache_path, json.dumps(cached))
+        except OSError:
+            pass
+    _loaded = (git_dir, files, stamp, facts)
+    return facts
+
+
+def reset_facts() -> None:
+    """Forgets the facts loaded by this process (not the cached file)."""
+    global _loaded  # noqa: PLW0603
+
+    _loaded = None
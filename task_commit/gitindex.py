@@ -0,0 +1,392 @@
+"""
+Reads the Git index (`.git/index`) without running Git.
+
+The file is memory-mapped and its entries decoded only when asked for.
+Together with the cache-tree extension, which records the tree every
+unchanged directory of the index would be written as, the staged changes
+are found by comparing only the directories that differ from HEAD: unlike
+`git status`, the working tree is never scanned.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+from collections.abc import Callable, Iterator
+from typing import NamedTuple
+
+from .repository import Unsupported
+
+SIGNATURE = b'DIRC'
+SUPPORTED_VERSIONS = (2, 3, 4)
+# ctime, mtime (seconds and nanoseconds), dev, ino, mode, uid, gid, size
+STAT_SIZE = 40
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE = 0x3000
+EXTENDED_SKIP_WORKTREE = 0x4000
+EXTENDED_INTENT_TO_ADD = 0x2000
+MODE_TREE = 0o040000
+_HEADER = struct.Struct('>4sII')
+_EXTENSION = struct.Struct('>4sI')
+_MODE = struct.Struct('>I')
+_FLAGS = struct.Struct('>H')
+
+
+class IndexEntry(NamedTuple):
+    path: bytes
+    mode: int
+    oid: str
+    stage: int
+    skip_worktree: bool
+    intent_to_add: bool
+
+    @property
+    def is_sparse_dir(self) -> bool:
+        """True for a directory collapsed by a sparse index ("dir/")."""
+        return self.mode == MODE_TREE
+
+
+class StagedChange(NamedTuple):
+    status: str  # "A", "M", "D" or "U" (unmerged), like `git diff --cached`
+    path: str
+
+
+def _read_varint(data, pos: int) -> tuple[int, int]:
+    # Offset encoding of Git: every continuation byte also adds one
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+class GitIndex:
+    """
+    Memory-mapped Git index, versions 2 to 4.
+
+    Entries are decoded lazily, in index order (by path, then stage). The
+    split-index (`link`) extension is recognized and reported as
+    `Unsupported`, since the entries then live in another file; sparse
+    indexes (`sdir`) are read, their collapsed directories being entries
+    with `IndexEntry.is_sparse_dir` set.
+
+    Parameters
+    ----------
+    path : str
+    Index file.
+    hash_size : int
+    Size of the object ids in bytes: 20 (SHA-1) or 32 (SHA-256).
+
+    ------
+    Unsupported
+    If the file is not an index of a supported version.
+    """
+
+    def __init__(self, path: str, hash_size: int = 20):
+        self.path = path
+        self.hash_size = hash_size
+        self._data = b''
+        self._map = None
+        with open(path, 'rb') as index_file:
+            if os.fstat(index_file.fileno()).st_size:
+                self._map = mmap.mmap(
+                    index_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+                self._data = memoryview(self._map)
+        if len(self._data) < _HEADER.size + hash_size:
+            self.close()
+            raise Unsupported(f'{path}: truncated index')
+        signature, self.version, self.count = _HEADER.unpack_from(self._data)
+        if signature != SIGNATURE or self.version not in SUPPORTED_VERSIONS:
+            self.close()
+            raise Unsupported(f'{path}: unsupported index')
+        self._extensions_offset: int | None = None
+        self._extensions: dict[bytes, bytes] | None = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Unmaps the file."""
+        if isinstance(self._data, memoryview):
+            self._data.release()
+        self._data = b''
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        """Decodes the entries one at a time."""
+        data = self._data
+        hash_size = self.hash_size
+        version = self.version
+        pos = _HEADER.size
+        path = b''
+        for _number in range(self.count):
+            (mode,) = _MODE.unpack_from(data, pos + 24)
+            oid = data[pos + STAT_SIZE : pos + STAT_SIZE + hash_size].hex()
+            flags_at = pos + STAT_SIZE + hash_size
+            (flags,) = _FLAGS.unpack_from(data, flags_at)
+            extended = 0
+            name_at = flags_at + 2
+            if flags & FLAG_EXTENDED:
+                (extended,) = _FLAGS.unpack_from(data, name_at)
+                name_at += 2
+            if version == 4:  # noqa: PLR2004
+                strip, name_at = _read_varint(data, name_at)
+                end = self._find_nul(name_at)
+                path = path[: len(path) - strip] + bytes(data[name_at:end])
+                pos = end + 1
+            else:
+                end = self._find_nul(name_at)
+                path = bytes(data[name_at:end])
+                # Entries are padded with 1 to 8 NULs to a multiple of 8
+                pos += (end - pos + 8) & ~7
+            yield IndexEntry(
+                path,
+                mode,
+                oid,
+                (flags & FLAG_STAGE) >> 12,
+                bool(extended & EXTENDED_SKIP_WORKTREE),
+                bool(extended & EXTENDED_INTENT_TO_ADD),
+            )
+        self._extensions_offset = pos
+
+    def _find_nul(self, pos: int) -> int:
+        end = self._map.find(b'\0', pos)
+        if end < 0:
+            raise Unsupported(f'{self.path}: corrupt entry')
+        return end
+
+    def extensions(self) -> dict[bytes, bytes]:
+        """
+        Gets the data of every extension, by signature.
+
+        The end of index entries extension (EOIE) is used to find them
+        without decoding the entries, when Git wrote it.
+
+        ------
+        Unsupported
+        If the index is split (`link` extension).
+        """
+        if self._extensions is not None:
+            return self._extensions
+        end = len(self._data) - self.hash_size
+        offset = self._find_eoie(end)
+        if offset is None:
+            offset = self._extensions_offset
+        if offset is None:
+            for _entry in self:
+                pass
+            offset = self._extensions_offset
+        extensions = {}
+        while offset + _EXTENSION.size <= end:
+            signature, size = _EXTENSION.unpack_from(self._data, offset)
+            start = offset + _EXTENSION.size
+            extensions[bytes(signature)] = bytes(
+                self._data[start : start + size]
+            )
+            offset = start + size
+        if b'link' in extensions:
+            raise Unsupported(f'{self.path}: split index')
+        self._extensions = extensions
+        return extensions
+
+    def _find_eoie(self, end: int) -> int | None:
+        start = end - _EXTENSION.size - 4 - self.hash_size
+        if start < _HEADER.size:
+            return None
+        signature, size = _EXTENSION.unpack_from(self._data, start)
+        if signature != b'EOIE' or size != 4 + self.hash_size:
+            return None
+        (offset,) = _MODE.unpack_from(self._data, start + _EXTENSION.size)
+        return offset if _HEADER.size <= offset <= start else None
+
+    def cache_tree(self) -> dict[bytes, str]:
+        """
+        Reads the cache-tree extension (TREE).
+
+        Returns
+        -------
+        dict[bytes, str]
+        Tree id of every directory still valid in the cache, keyed by its
+        path with a trailing slash (b'' for the root).
+        """
+        data = self.extensions().get(b'TREE')
+        trees: dict[bytes, str] = {}
+        if data is not None:
+            self._parse_cache_tree(data, 0, None, trees)
+        return trees
+
+    def _parse_cache_tree(self, data: bytes, pos: int, parent, trees) -> int:
+        # A node is followed by its subtrees (pre-order)
+        nul = data.index(b'\0', pos)
+        newline = data.index(b'\n', nul)
+        entry_count, subtrees = map(int, data[nul + 1 : newline].split(b' '))
+        path = b'' if parent is None else parent + data[pos:nul] + b'/'
+        pos = newline + 1
+        if entry_count >= 0:
+            trees[path] = data[pos : pos + self.hash_size].hex()
+            pos += self.hash_size
+        for _subtree in range(subtrees):
+            pos = self._parse_cache_tree(data, pos, path, trees)
+        return pos
+
+
+def parse_tree(content: bytes, hash_size: int = 20) -> dict[bytes, tuple]:
+    """
+    Parses a tree object.
+
+    Returns
+    -------
+    dict[bytes, tuple[int, str]]
+    (mode, object id) of every entry, by name.
+    """
+    entries = {}
+    pos = 0
+    while pos < len(content):
+        space = content.index(b' ', pos)
+        nul = content.index(b'\0', space)
+        oid = content[nul + 1 : nul + 1 + hash_size].hex()
+        entries[content[space + 1 : nul]] = (int(content[pos:space], 8), oid)
+        pos = nul + 1 + hash_size
+    return entries
+
+
+class _StagedDiff:
+    """Compares the index with the tree of HEAD, directory by directory."""
+
+    def __init__(self, index: GitIndex, read_object: Callable):
+        self.index = index
+        self.read_object = read_object
+        self.cache_tree = index.cache_tree()
+        self.entries: list[IndexEntry] | None = None
+        self.paths: list[bytes] = []
+        self.changes: list[tuple[str, bytes]] = []
+
+    def run(self, head_tree: str | None) -> list[StagedChange]:
+        if head_tree is not None and self.cache_tree.get(b'') == head_tree:
+            return []  # Nothing staged: no entry is compared
+        self.entries = list(self.index)
+        self.paths = [entry.path for entry in self.entries]
+        self._compare(b'', head_tree, 0, len(self.entries))
+        return [
+            StagedChange(status, path.decode('utf-8', 'surrogateescape'))
+            for status, path in sorted(self.changes, key=lambda c: c[1])
+        ]
+
+    def _tree(self, oid: str | None) -> dict[bytes, tuple]:
+        if oid is None:
+            return {}
+        obj = self.read_object(oid)
+        if obj is None or obj[0] != 'tree':
+            raise Unsupported(f'tree {oid} not found')
+        return parse_tree(obj[1], self.index.hash_size)
+
+    def _group_end(self, prefix: bytes, lo: int, hi: int) -> int:
+        # "/" is followed by "0": every path under `prefix` sorts before
+        return bisect.bisect_left(self.paths, prefix[:-1] + b'0', lo, hi)
+
+    def _compare(self, prefix: bytes, tree_oid, lo: int, hi: int) -> None:
+        if tree_oid is not None and self.cache_tree.get(prefix) == tree_oid:
+            return
+        tree = self._tree(tree_oid)
+        seen = set()
+        pos = lo
+        while pos < hi:
+            entry = self.entries[pos]
+            rest = entry.path[len(prefix) :]
+            slash = rest.find(b'/')
+            if 0 <= slash < len(rest) - 1:  # a file in a subdirectory
+                name = rest[:slash]
+                end = self._group_end(prefix + name + b'/', pos, hi)
+                self._compare_dir(prefix, name, tree.get(name), pos, end)
+            else:
+                name = rest.rstrip(b'/')
+                end = pos + 1
+                while end < hi and self.paths[end] == entry.path:
+                    end += 1  # other stages of a conflict
+                self._compare_entry(prefix, name, tree.get(name), pos, end)
+            seen.add(name)
+            pos = end
+        for name, (mode, oid) in tree.items():
+            if name not in seen:
+                self._removed(prefix + name, mode, oid)
+
+    def _compare_dir(self, prefix, name, tree_entry, lo, hi) -> None:
+        path = prefix + name
+        if tree_entry is not None and tree_entry[0] == MODE_TREE:
+            self._compare(path + b'/', tree_entry[1], lo, hi)
+            return
+        if tree_entry is not None:
+            self.changes.append(('D', path))
+        self._compare(path + b'/', None, lo, hi)
+
+    def _compare_entry(self, prefix, name, tree_entry, lo, hi) -> None:
+        entry = self.entries[lo]
+        path = prefix + name
+        if entry.stage:
+            self.changes.append(('U', path))
+            return
+        if entry.is_sparse_dir:
+            if tree_entry is None or tree_entry[1] != entry.oid:
+                raise Unsupported(f'changed sparse directory {path!r}')
+            return
+        if entry.intent_to_add:
+            if tree_entry is not None:
+                self._removed(path, *tree_entry)
+            return
+        if tree_entry is None:
+            self.changes.append(('A', path))
+        elif tree_entry[0] == MODE_TREE:
+            self._removed(path, *tree_entry)
+            self.changes.append(('A', path))
+        elif tree_entry != (entry.mode, entry.oid):
+            self.changes.append(('M', path))
+
+    def _removed(self, path: bytes, mode: int, oid: str) -> None:
+        if mode != MODE_TREE:
+            self.changes.append(('D', path))
+            return
+        for name, (child_mode, child_oid) in self._tree(oid).items():
+            self._removed(path + b'/' + name, child_mode, child_oid)
+
+
+def read_staged(
+    index: GitIndex,
+    head_tree: str | None,
+    read_object: Callable[[str], tuple[str, bytes] | None],
+) -> list[StagedChange]:
+    """
+    Lists the changes staged in the index, like
+    `git diff --cached --name-status --no-renames`.
+
+    Parameters
+    ----------
+    index : GitIndex
+    Index of the repository.
+    head_tree : str or None
+    Tree id of HEAD, None before the first commit.
+    read_object : Callable[[str], tuple[str, bytes] or None]
+    Reads an object by id, as `GitBackend.cat_file` does.
+
+    Returns
+    -------
+    list[StagedChange]
+    Changes sorted by path.
+
+    ------
+    Unsupported
+    If the index uses what this reader cannot compare (split index,
+    changed sparse directories).
+    """
+    return _StagedDiff(index, read_object).run(head_tree)
@@ -0,0 +1,212 @@
+import shlex
+import sys
+
+from .i18n import _
+from .init import CO_AUTHORED_BRANCHES, TYPES_DESCRIPTION
+from .rules import DEFAULT_RULES, Rules
+
+# Characters spelled out because bracket ranges and classes depend on the
+# locale the hook runs in
+LOWER = 'abcdefghijklmnopqrstuvwxyz'
+UPPER = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+DIGITS = '0123456789'
+ALNUM = LOWER + UPPER + DIGITS
+
+
+def get_hook_regex(
+    rules: Rules = DEFAULT_RULES, conventional: bool = False
+) -> str:
+    """
+    Gets the rules as a POSIX extended regular expression (`grep -E`).
+
+    Parameters
+    ----------
+    rules : Rules
+    Commit rules.
+    conventional : bool
+    Only match Conventional Commits headers, even if free-form headers
+    are allowed.
+    """
+    if rules.scopes:
+        scope = f'({"|".join(rules.scopes)})'
+    elif rules.scope_case == 'lower':
+        scope = '[a-z0-9_-]+'
+    else:
+        scope = '[a-zA-Z0-9_-]+'
+    length = f'{{1,{rules.max_header_length}}}'
+    pattern = f'^({"|".join(rules.types)})(\\({scope}\\))?: .{length}$'
+    if not (conventional or rules.conventional_only):
+        pattern += f'|^.{length}$'
+    return pattern
+
+
+def _scope_check(rules: Rules) -> str:
+    if rules.scopes:
+        return f'{"|".join(rules.scopes)}) ;;\n    *) conventional= ;;'
+    chars = LOWER + DIGITS if rules.scope_case == 'lower' else ALNUM
+    return f"''|*[!{chars}_-]*) conventional= ;;"
+
+
+def _case_check(rules: Rules) -> str:
+    if rules.subject_case != 'lower':
+        return ''
+    # Descriptions not starting with a lowercase ASCII letter or a digit
+    # may start with an uppercase letter: the validator decides
+    return (
+        '    case ${rest#": "} in\n'
+        f'    [{LOWER}{DIGITS}]*) ;;\n'
+        '    *) slow "$1" ;;\n'
+        '    esac\n'
+    )
+
+
+def _fallback_case_check(rules: Rules) -> str:
+    if rules.subject_case != 'lower':
+        return ''
+    conventional = shlex.quote(get_hook_regex(rules, conventional=True))
+    return (
+        '        if printf "%s\\n" "$header" |\n'
+        f'            grep -qE {conventional}; then\n'
+        '            case ${header#*": "} in\n'
+        f'            [{UPPER}]*) printf "%s\\n" "$INVALID"; exit 1 ;;\n'
+        '            esac\n'
+        '        fi\n'
+    )
+
+
+def compile_hook(
+    rules: Rules = DEFAULT_RULES,
+    python: str | None = sys.executable,
+    config_path: str | None = None,
+) -> str:
+    """
+    Compiles the commit rules into a POSIX sh commit-msg hook.
+
+    Headers are checked with `case` patterns and parameter expansion, so
+    accepting a message does not start any process. Only the rare slow
+    path forks: messages the builtins cannot decide on (rejected ones,
+    long multibyte headers) are handed to the Python validator, or to
+    `grep -E` when that interpreter is gone, and the co-author trailer of
+    Git Flow branches reads `user.name` with `git config`.
+
+    Parameters
+    ----------
+    rules : Rules
+    Commit rules compiled into the hook.
+    python : str or None
+    Interpreter running `task_commit.daemon check` on the slow path, None
+    to always fall back to `grep -E`.
+    config_path : str or None
+    File the rules were read from: while it is newer than the hook, every
+    message takes the slow path, which reads the current rules.
+
+    Returns
+    -------
+    str
+    Contents of the hook.
+    """
+    empty = _('Commit message cannot be empty')
+    invalid = _('Invalid commit message')
+    pattern = _('Use Conventional Commits pattern')
+    invalid_message = f'❌ {invalid}! {pattern}.\n{TYPES_DESCRIPTION}'
+    branches = '|'.join(
+        shlex.quote(f'ref: refs/heads/{prefix}') + '*'
+        for prefix in CO_AUTHORED_BRANCHES
+    )
+    max_length = rules.max_header_length
+    free_form = (
+        ''
+        if rules.conventional_only
+        else f'[ ${{#header}} -le {max_length} ] && accept "$1"\n'
+    )
+    return f"""#!/bin/sh
+# Generated by task_commit_init from the commit rules: accepting a message
+# only runs shell builtins. Run task_commit_init again after changing them.
+PYTHON={shlex.quote(python or '')}
+CONFIG={shlex.quote(config_path or '')}
+PATTERN={shlex.quote(get_hook_regex(rules))}
+EMPTY={shlex.quote(f'❌ {empty}!')}
+INVALID={shlex.quote(invalid_message)}
+ALNUM={ALNUM}
+CR='\r'
+BLANKS=' \t'"$CR"
+
+accept() {{
+    git_dir=${{1%/*}}
+    [ "$git_dir" = "$1" ] && git_dir=.
+    head=
+    {{ IFS= read -r head < "$git_dir/HEAD"; }} 2>/dev/null
+    case $head in
+    {branches})
+        user=$(git config --get user.name)
+        [ -z "$user" ] && user='Unknown User'
+        printf '\\nCo-authored-by: %s\\n' "$user" >> "$1"
+        ;;
+    esac
+    exit 0
+}}
+
+slow() {{
+    if [ -n "$PYTHON" ] && [ -x "$PYTHON" ]; then
+        exec "$PYTHON" -m task_commit.daemon check "$1"
+    fi
+    blank=1
+    while IFS= read -r line || [ -n "$line" ]; do
+        case $line in
+        *[!"$BLANKS"]*) blank=0; break ;;
+        esac
+    done < "$1"
+    if [ "$blank" = 1 ]; then
+        printf '%s\\n' "$EMPTY"
+        exit 1
+    fi
+    if printf '%s\\n' "$header" | grep -qE "$PATTERN"; then
+{_fallback_case_check(rules)}        accept "$1"
+    fi
+    printf '%s\\n' "$INVALID"
+    exit 1
+}}
+
+header=
+IFS= read -r header < "$1"
+while :; do
+    case $header in
+    *"$CR") header=${{header%"$CR"}} ;;
+    *) break ;;
+    esac
+done
+case $header in
+'!'*) exit 0 ;;
+*"$CR"*) slow "$1" ;;
+*["$ALNUM"]*) ;;
+*) slow "$1" ;;
+esac
+[ -n "$CONFIG" ] && [ "$CONFIG" -nt "$0" ] && slow "$1"
+
+type=${{header%%[(:]*}}
+rest=${{header#"$type"}}
+conventional=
+case $type in
+{'|'.join(rules.types)}) conventional=1 ;;
+esac
+case $rest in
+'('*)
+    scope=${{rest%%')'*}}
+    scope=${{scope#'('}}
+    rest=${{rest#*')'}}
+    case $scope in
+    {_scope_check(rules)}
+    esac
+    ;;
+esac
+case $rest in
+': '?*) ;;
+*) conventional= ;;
+esac
+if [ -n "$conventional" ]; then
+    # Bytes are never fewer than characters: short enough is valid
+    [ ${{#rest}} -le {max_length + 2} ] || slow "$1"
+{_case_check(rules)}    accept "$1"
+fi
+{free_form}slow "$1"
+"""
@@ -0,0 +1,78 @@
+import os
+
+DOMAIN = 'messages'
+LOCALE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locale')
+# Languages the messages are written in: no catalog needs to be loaded
+SOURCE_LANGUAGES = {'', 'C', 'POSIX', 'en'}
+
+_translate = None
+
+
+def get_language() -> str:
+    """Gets the language code of the system (e.g. "pt_BR")."""
+    return os.getenv('LANG', 'en').split('.')[0]
+
+
+def _identity(message: str) -> str:
+    return message
+
+
+def load_translator(domain=DOMAIN, locale_dir=None, lang=None):
+    """
+    Loads a translation catalog.
+
+    Parameters
+    ----------
+    domain : str
+    Catalog name (the .mo file name).
+    locale_dir : str or None
+    Directory containing the `<lang>/LC_MESSAGES` catalogs.
+    lang : str or None
+    Language code, defaults to the system language.
+
+    Returns
+    -------
+    Callable[[str], str]
+    Translation function, returning the original text when no catalog is
+    found for the language.
+    """
+    if lang is None:
+        lang = get_language()
+    if lang.split('_')[0] in SOURCE_LANGUAGES:
+        return _identity
+
+    import gettext  # noqa: PLC0415
+
+    try:
+        translation = gettext.translation(
+            domain,
+            localedir=locale_dir or LOCALE_DIR,
+            languages=[lang],
+        )
+    except FileNotFoundError:
+        return _identity
+    return translation.gettext
+
+
+def _(message: str) -> str:
+    """
+    Translates a message with the catalog shared by the whole process.
+
+    The catalog is loaded on the first lookup.
+    """
+    global _translate  # noqa: PLW0603
+    if _translate is None:
+        _translate = load_translator()
+    return _translate(message)
+
+
+def get_translator(domain=DOMAIN, locale_dir=None, lang=None):
+    """
+    Gets a translation function `_()`.
+
+    Without arguments the shared, lazily loaded catalog is returned;
+    otherwise the requested catalog is loaded right away.
+    """
+    if (domain, locale_dir, lang) == (DOMAIN, None, None):
+        return _
+    return load_translator(domain, locale_dir, lang)
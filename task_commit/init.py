@@ -1,17 +1,34 @@
 import os
 import sys
 
-from .utils import get_git_user, get_translator
-
-_ = get_translator()
+from .i18n import _
 
 HOOKS_DIR = '.git/hooks'
 HOOK_NAME = 'commit-msg'
 HOOK_PATH = os.path.join(HOOKS_DIR, HOOK_NAME)
-GIT_USER = get_git_user()
+SERVER_HOOK_NAME = 'pre-receive'
+
+# Default commit types and longest description, see rules.Rules
+HOOK_TYPES = (
+    'feat',
+    'fix',
+    'refactor',
+    'docs',
+    'style',
+    'perf',
+    'test',
+    'chore',
+    'ci',
+)
+MAX_HEADER_LENGTH = 72
+# Branches whose commits get a "Co-authored-by" trailer
+CO_AUTHORED_BRANCHES = ('feature/', 'hotfix/', 'release/')
 
 # Expressão regular ajustada para garantir compatibilidade no shell
-COMMIT_REGEX = r'^(feat|fix|chore|refactor|test|docs|style|ci|perf)(\([a-zA-Z0-9_\-]+\))?: .{1,72}$|^.{1,72}$'  # noqa: E501
+COMMIT_REGEX = (
+    rf'^({"|".join(HOOK_TYPES)})(\([a-zA-Z0-9_\-]+\))?: '
+    rf'.{{1,{MAX_HEADER_LENGTH}}}$|^.{{1,{MAX_HEADER_LENGTH}}}$'
+)
 
 TYPES_DESCRIPTION = """
 ✅ Conventional Commit Examples:
@@ -22,44 +39,45 @@ TYPES_DESCRIPTION = """
     - docs(readme): update installation guide
 """
 
-HOOK_SCRIPT = f"""#!/bin/sh
-COMMIT_MSG_FILE=$1
-COMMIT_MSG=$(cat "$COMMIT_MSG_FILE")
-
-
-if echo "$COMMIT_MSG" | grep -qE '^!'; then
-    exit 0
-fi
-
-
-if [ -z "$COMMIT_MSG" ]; then
-    echo "❌ Commit message cannot be empty!"
-    exit 1
-fi
-
-
-if ! echo "$COMMIT_MSG" | grep -E "^(feat|fix|chore|refactor|test|docs|style|ci|perf)(\\([a-zA-Z0-9_\\-]+\\))?: .{{1,72}}$|^.{1, 72}$"; then
-    echo "❌ Invalid commit message! Use Conventional Commits pattern."
-    echo "{TYPES_DESCRIPTION}"
-    exit 1
-fi
-
-
-GIT_USER=$(git config --get user.name)
-[ -z "$GIT_USER" ] && GIT_USER="Unknown User"
 
+def setup_server_hook():
+    """
+    Installs the pre-receive hook that validates every pushed commit, in
+    the current (usually bare) server repository.
+    """
+    from .cache import get_git_dir  # noqa: PLC0415
+    from .receive import get_server_hook  # noqa: PLC0415
 
-CURRENT_BRANCH=$(git rev-parse --abbrev-ref HEAD)
+    git_dir = get_git_dir()
+    if git_dir is None:
+        message: str = _('Please run inside a Git repository.')
+        print(f'❌ {message}')
+        sys.exit(1)
 
+    hook_path = os.path.join(git_dir, 'hooks', SERVER_HOOK_NAME)
+    os.makedirs(os.path.dirname(hook_path), exist_ok=True)
+    with open(hook_path, 'w', encoding='utf-8') as hook_file:
+        hook_file.write(get_server_hook())
 
-if echo "$CURRENT_BRANCH" | grep -Eq "^(feature|hotfix|release)/"; then
-    echo "\\nCo-authored-by: $GIT_USER" >> "$COMMIT_MSG_FILE"
-fi
-"""  # noqa: E501
+    os.chmod(hook_path, 0o755)  # Make the hook executable  # nosec
+    message: str = _('Pre-receive hook successfully configured!')
+    print(f'✅ {message}')
 
 
-def setup_git_hook():
-    """Configura o hook de commit-msg para validar mensagens."""
+def setup_git_hook(daemon: bool = False, server: bool = False):
+    """
+    Configura o hook de commit-msg para validar mensagens.
+
+    Parameters
+    ----------
+    daemon : bool
+    Install the thin client of the validation daemon instead of the shell
+    script compiled from the rules.
+    server : bool
+    Install the pre-receive hook instead (see `setup_server_hook`).
+    """
+    if server:
+        return setup_server_hook()
     if not os.path.exists(HOOKS_DIR):
         message: str = _(
             '.git/hooks directory not found. Please run inside a Git repository.'  # noqa: E501
@@ -67,9 +85,59 @@ def setup_git_hook():
         print(f'❌ {message}')
         sys.exit(1)
 
+    from .config import get_config_path  # noqa: PLC0415
+    from .hook import compile_hook  # noqa: PLC0415
+    from .rules import load_rules  # noqa: PLC0415
+
+    hook_script = compile_hook(load_rules(), config_path=get_config_path())
+    if daemon:
+        from .daemon import (  # noqa: PLC0415
+            get_hook_client,
+            get_socket_path,
+            is_supported,
+        )
+
+        if is_supported():
+            git_dir = os.path.abspath('.git')
+            hook_script = get_hook_client(get_socket_path(git_dir))
+        else:
+            message: str = _(
+                'Unix sockets are not available, installing the shell hook'
+            )
+            print(f'⚠️ {message}')
+
     with open(HOOK_PATH, 'w', encoding='utf-8') as hook_file:
-        hook_file.write(HOOK_SCRIPT)
+        hook_file.write(hook_script)
 
     os.chmod(HOOK_PATH, 0o755)  # Make the hook executable  # nosec
     message: str = _('Commit-msg hook successfully configured!')
     print(f'✅ {message}')
+
+
+def build_parser():
+    """Builds the command line parser for the `task_commit_init` script."""
+    import argparse  # noqa: PLC0415
+
+    parser = argparse.ArgumentParser(
+        prog='task_commit_init',
+        description='install the hook validating the commit messages of '
+        'the current repository',
+    )
+    hook_group = parser.add_mutually_exclusive_group()
+    hook_group.add_argument(
+        '--daemon',
+        action='store_true',
+        help='install the thin client of the resident validation daemon',
+    )
+    hook_group.add_argument(
+        '--server',
+        action='store_true',
+        help='install the pre-receive hook validating every pushed commit',
+    )
+    return parser
+
+
+def main(argv=None):
+    """Installs the hook chosen on the command line."""
+    args = build_parser().parse_args(argv)
+    setup_git_hook(daemon=args.daemon, server=args.server)
@@ -0,0 +1,370 @@
+import hashlib
+import io
+import os
+import re
+import subprocess
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import IO, NamedTuple
+
+from .cache import LintCache
+from .i18n import _, get_language
+from .rules import DEFAULT_RULES, Rules, load_rules
+from .status import iter_nul_records
+from .utils import color_text
+
+# One NUL-terminated record per commit: "<sha>\n<raw body>"
+LOG_FORMAT = '%H%n%B'
+CHUNK_SIZE = 1 << 16
+BATCH_SIZE = 2000
+# Version of the validation logic, bumped when the verdicts it gives change
+VALIDATOR_VERSION = 1
+
+
+class Violation(NamedTuple):
+    sha: str
+    subject: str
+    reason: str
+
+
+class Validator:
+    """
+    Commit message validator compiled once from the commit rules.
+
+    Parameters
+    ----------
+    rules : Rules
+    Rules the messages must follow.
+    """
+
+    def __init__(self, rules: Rules = DEFAULT_RULES):
+        self.rules = rules
+        self.pattern = rules.pattern
+        self._match = re.compile(self.pattern).match
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Hash identifying the verdicts this validator gives, used to key
+        cached verdicts: the rules, the validation logic and the language
+        the reasons are translated to.
+        """
+        key = f'{VALIDATOR_VERSION}\n{get_language()}\n{self.rules!r}'
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+    def __reduce__(self):
+        # Workers receive the rules and compile them on their side
+        return type(self), (self.rules,)
+
+    def validate(self, message: str) -> str | None:
+        """
+        Validates a commit message the same way the commit-msg hook does.
+
+        Parameters
+        ----------
+        message : str
+        Full commit message.
+
+        Returns
+        -------
+        str or None
+        Reason the message was rejected, or None if it is valid.
+        """
+        header = message.split('\n', 1)[0].rstrip('\r')
+        if header.startswith('!'):
+            return None
+        if not message.strip():
+            return _('Commit message cannot be empty')
+        match = self._match(header)
+        if match is None:
+            return _('Invalid commit message')
+        subject = match.group('subject')
+        if (
+            subject is not None
+            and self.rules.subject_case == 'lower'
+            and subject[0].isupper()
+        ):
+            return _('Commit subject must start in lowercase')
+        return None
+
+
+def iter_records(
+    stream: IO[bytes], chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[str, str]]:
+    """
+    Splits a `git log -z --format=%H%n%B` stream into (sha, message) pairs.
+
+    Only one chunk plus the record being assembled is kept in memory.
+    """
+    for record in iter_nul_records(stream, chunk_size):
+        if record.strip():
+            yield _decode_record(record)
+
+
+def _decode_record(record: bytes) -> tuple[str, str]:
+    sha, _sep, body = record.lstrip(b'\n').partition(b'\n')
+    return sha.decode('ascii'), body.decode('utf-8', 'replace')
+
+
+def iter_commits(rev_range: str) -> Iterator[tuple[str, str]]:
+    """
+    Streams (sha, message) pairs for a revision range from `git log`.
+
+    Parameters
+    ----------
+    rev_range : str
+    Any revision range understood by `git log` (e.g. "v1.0..main").
+
+    ------
+    subprocess.CalledProcessError
+    If `git log` fails (e.g. unknown revision).
+    """
+    command = ['git', 'log', '-z', f'--format={LOG_FORMAT}', rev_range, '--']
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        yield from iter_records(process.stdout)
+        stderr = process.stderr.read()
+        if process.wait():
+            raise subprocess.CalledProcessError(
+                process.returncode,
+                command,
+                stderr=stderr.decode('utf-8', 'replace'),
+            )
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def iter_revisions(rev_range: str) -> Iterator[str]:
+    """Streams the SHAs of a revision range from `git rev-list`."""
+    command = ['git', 'rev-list', rev_range, '--']
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        for line in process.stdout:
+            yield line.rstrip('\n')
+        stderr = process.stderr.read()
+        if process.wait():
+            raise subprocess.CalledProcessError(
+                process.returncode, command, stderr=stderr
+            )
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def read_messages(shas: list[str]) -> list[tuple[str, str]]:
+    """Reads the messages of the given commits with a single `git log`."""
+    result = subprocess.run(
+        [
+            'git',
+            'log',
+            '--no-walk=unsorted',
+            '-z',
+            f'--format={LOG_FORMAT}',
+            '--stdin',
+        ],
+        input='\n'.join(shas).encode('ascii'),
+        capture_output=True,
+        check=True,
+    )
+    return list(iter_records(io.BytesIO(result.stdout)))
+
+
+def _lint_batch(
+    shas: list[str], validator: Validator
+) -> tuple[int, list[Violation]]:
+    if not shas:
+        return 0, []
+    return len(shas), list(lint_commits(read_messages(shas), validator))
+
+
+def _iter_batches(rev_range, jobs, batch_size, validator, cache=None):
+    """
+    Validates a range in `rev-list` batches, on a process pool unless
+    `jobs` is 1.
+
+    Yields (checked, violations) per batch in commit order, keeping at
+    most two batches per worker in flight. Commits already in `cache` are
+    neither read nor validated again.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    validator = validator or Validator()
+    pending = deque()
+
+    def submit(executor, batch):
+        misses = [sha for sha in batch if cache is None or sha not in cache]
+        if executor is None:
+            future = Future()
+            future.set_result(_lint_batch(misses, validator))
+        else:
+            future = executor.submit(_lint_batch, misses, validator)
+        pending.append((batch, misses, future))
+
+    def collect():
+        batch, misses, future = pending.popleft()
+        _checked, found = future.result()
+        if cache is None:
+            return len(batch), found
+        found = {violation.sha: violation for violation in found}
+        for sha in misses:
+            violation = found.get(sha)
+            cache.put(sha, violation and (violation.reason, violation.subject))
+        violations = []
+        for sha in batch:
+            if sha not in found and (verdict := cache.get(sha)):
+                found[sha] = Violation(sha, verdict[1], verdict[0])
+            if sha in found:
+                violations.append(found[sha])
+        return len(batch), violations
+
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor  # noqa: PLC0415
+
+        pool = ProcessPoolExecutor(max_workers=jobs)
+    else:
+        pool = nullcontext()
+    with pool as executor:
+        batch = []
+        for sha in iter_revisions(rev_range):
+            batch.append(sha)
+            if len(batch) < batch_size:
+                continue
+            submit(executor, batch)
+            batch = []
+            if len(pending) >= jobs * 2:
+                yield collect()
+        if batch:
+            submit(executor, batch)
+        while pending:
+            yield collect()
+
+
+def lint_range_parallel(
+    rev_range: str,
+    jobs: int | None = None,
+    batch_size: int = BATCH_SIZE,
+    validator: Validator | None = None,
+) -> Iterator[Violation]:
+    """
+    Validates a revision range on several processes.
+
+    Parameters
+    ----------
+    rev_range : str
+    Any revision range understood by `git rev-list`.
+    jobs : int or None
+    Number of worker processes, defaults to the number of CPUs.
+    batch_size : int
+    Number of commits validated per task.
+
+    Returns
+    -------
+    Iterator[Violation]
+    Violations in the same order `git rev-list` lists the commits.
+    """
+    for _checked, violations in _iter_batches(
+        rev_range, jobs, batch_size, validator
+    ):
+        yield from violations
+
+
+def lint_commits(
+    commits: Iterable[tuple[str, str]], validator: Validator | None = None
+) -> Iterator[Violation]:
+    """Yields a Violation for each (sha, message) pair that is rejected."""
+    validate = (validator or Validator()).validate
+    for sha, message in commits:
+        reason = validate(message)
+        if reason is not None:
+            subject = message.split('\n', 1)[0].rstrip('\r')
+            yield Violation(sha, subject, reason)
+
+
+def lint_range(
+    rev_range: str, validator: Validator | None = None
+) -> Iterator[Violation]:
+    """Streams the violations found in a revision range."""
+    return lint_commits(iter_commits(rev_range), validator)
+
+
+def run_lint(rev_range: str, jobs: int = 1, use_cache: bool = True) -> int:
+    """
+    Lints a revision range and prints every violation as it is found.
+
+    Parameters
+    ----------
+    rev_range : str
+    Revision range to check.
+    jobs : int
+    Number of worker processes; 1 validates in this process and 0 uses
+    every CPU.
+    use_cache : bool
+    Whether verdicts are reused from (and stored in) the `.git/` cache.
+
+    Returns
+    -------
+    int
+    Exit status: 0 if every commit is valid, 1 otherwise.
+    """
+    checked = 0
+    violations = 0
+
+    def counted(commits):
+        nonlocal checked
+        for commit in commits:
+            checked += 1
+            yield commit
+
+    def batched(cache):
+        nonlocal checked
+        for batch_checked, batch_violations in _iter_batches(
+            rev_range, jobs, BATCH_SIZE, validator, cache
+        ):
+            checked += batch_checked
+            yield from batch_violations
+
+    validator = Validator(load_rules())
+    cache = LintCache.open(validator.fingerprint) if use_cache else None
+    if jobs == 1 and cache is None:
+        found = lint_commits(counted(iter_commits(rev_range)), validator)
+    else:
+        found = batched(cache)
+
+    try:
+        for violation in found:
+            violations += 1
+            print(
+                color_text(
+                    f'❌ {violation.sha[:12]} {violation.subject}: '
+                    f'{violation.reason}',
+                    'red',
+                )
+            )
+    except subprocess.CalledProcessError as e:
+        message: str = _('Error reading Git history')
+        print(color_text(f'❌ {message}: {e.stderr.strip()}', 'red'))
+        return 2
+    finally:
+        if cache is not None:
+            cache.save()
+
+    message: str = _('Commits checked')
+    summary = f'{message}: {checked}'
+    if violations:
+        message = _('Invalid commits')
+        print(color_text(f'\n🚩 {summary}, {message}: {violations}', 'red'))
+        return 1
+    print(color_text(f'\n✅ {summary}', 'green'))
+    return 0
@@ -1,14 +1,150 @@
-import io
+import argparse
 import sys
 
-from .core import git_commit
 
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+def non_negative_int(value: str) -> int:
+    """Parses a count that can be 0, for argparse."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            f'invalid non-negative int value: {value!r}'
+        )
+    return number
 
 
-def main():
+def build_trace_parser(default: str | None = None) -> argparse.ArgumentParser:
+    """Builds the parent parser of the options every command accepts."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        default=default,
+        help='record every git call as Chrome trace events in FILE and '
+        'print a summary at exit (default: $TASK_COMMIT_TRACE)',
+    )
+    return parser
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the command line parser for the `task_commit` script."""
+    parser = argparse.ArgumentParser(
+        prog='task_commit', parents=[build_trace_parser()]
+    )
+    # Suppressed default, or a subcommand would reset a --trace given before
+    subcommand_parents = [build_trace_parser(argparse.SUPPRESS)]
+    commit_group = parser.add_argument_group(
+        'non-interactive commit',
+        'create the commit from arguments instead of prompts',
+    )
+    commit_group.add_argument('-t', '--type', dest='commit_type')
+    commit_group.add_argument('-s', '--scope', help='module that changed')
+    commit_group.add_argument('-m', '--message', help='commit message')
+    commit_group.add_argument(
+        '-y',
+        '--yes',
+        action='store_true',
+        help='pull and add all changes first (default: commit staged only)',
+    )
+    commit_group.add_argument(
+        '--no-push',
+        dest='push',
+        action='store_false',
+        help='do not push after committing',
+    )
+    commit_group.add_argument(
+        '--batch',
+        type=argparse.FileType('r', encoding='utf-8'),
+        metavar='FILE',
+        help='JSON array or JSON lines of {"type", "scope", "message", '
+        '"paths"} objects, one commit each ("-" reads stdin)',
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    lint_parser = subparsers.add_parser(
+        'lint',
+        parents=subcommand_parents,
+        help='validate the commit messages of a revision range',
+    )
+    lint_parser.add_argument(
+        '--range',
+        dest='rev_range',
+        default='HEAD',
+        help='revision range to check (e.g. origin/main..HEAD)',
+    )
+    lint_parser.add_argument(
+        '-j',
+        '--jobs',
+        type=non_negative_int,
+        default=1,
+        help='number of worker processes (0 uses every CPU)',
+    )
+    lint_parser.add_argument(
+        '--no-cache',
+        dest='use_cache',
+        action='store_false',
+        help='ignore the verdicts cached in .git/task_commit',
+    )
+
+    daemon_parser = subparsers.add_parser(
+        'daemon',
+        parents=subcommand_parents,
+        help='control the commit-msg validation daemon',
+    )
+    daemon_parser.add_argument(
+        'action', choices=['start', 'stop'], help='start or stop the daemon'
+    )
+    return parser
+
+
+def main(argv=None):
     """
-    Main function that calls the git_commit function to perform the commit.
+    Main function that calls the git_commit function to perform the commit,
+    or runs the requested subcommand.
     """
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    from .trace import enable_from_env  # noqa: PLC0415
+
+    enable_from_env(args.trace)
+
+    if args.command == 'lint':
+        from .lint import run_lint  # noqa: PLC0415
+
+        sys.exit(run_lint(args.rev_range, args.jobs, args.use_cache))
+
+    if args.command == 'daemon':
+        from . import daemon  # noqa: PLC0415
+
+        if args.action == 'start':
+            daemon.start()
+            sys.exit(0)
+        sys.exit(daemon.main(['stop']))
+
+    if args.batch is not None:
+        from .core import git_commit_batch  # noqa: PLC0415
+
+        sys.exit(git_commit_batch(args.batch, push=args.push))
+
+    if args.commit_type or args.scope or args.message:
+        if not (args.commit_type and args.scope and args.message):
+            parser.error('--type, --scope and --message are required together')
+        from .core import git_commit_non_interactive  # noqa: PLC0415
+
+        sys.exit(
+            git_commit_non_interactive(
+                args.commit_type,
+                args.scope,
+                args.message,
+                add_all=args.yes,
+                push=args.push,
+            )
+        )
+
+    from .core import git_commit  # noqa: PLC0415
 
     git_commit()
@@ -0,0 +1,216 @@
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from .backend import get_backend
+from .i18n import _
+from .utils import color_text
+
+# Multi-valued git config key listing the remotes every push goes to
+PUSH_REMOTES_KEY = 'task-commit.pushRemote'
+DEFAULT_REMOTE = 'origin'
+MAX_ATTEMPTS = 3
+BACKOFF = 1.0  # seconds before the first retry, doubled on every retry
+TIMEOUT = 300.0  # seconds per attempt
+TRANSIENT_ERRORS = (
+    'could not resolve host',
+    'connection timed out',
+    'connection reset',
+    'connection refused',
+    'operation timed out',
+    'temporary failure',
+    'the remote end hung up unexpectedly',
+    'early eof',
+    'rpc failed',
+    'http 5',
+)
+_PROGRESS_SEPARATOR = re.compile(rb'([\r\n])')
+# Returns to the start of the line and clears it, to redraw progress
+_REDRAW = '\r\033[K'
+_print_lock = threading.Lock()
+
+
+class PushResult(NamedTuple):
+    remote: str
+    ok: bool
+    attempts: int
+    elapsed: float
+    output: str
+
+
+def get_push_remotes() -> list[str]:
+    """
+    Gets the remotes to push to: the `task-commit.pushRemote` values, or
+    "origin" when none is configured.
+    """
+    return get_backend().config_values(PUSH_REMOTES_KEY) or [DEFAULT_REMOTE]
+
+
+def is_transient(output: str) -> bool:
+    """True if a failed push looks like a network error worth retrying."""
+    output = output.lower()
+    return any(error in output for error in TRANSIENT_ERRORS)
+
+
+def _push_once(remote, branch, on_progress, timeout) -> tuple[int, str]:
+    process = subprocess.Popen(
+        ['git', 'push', '--progress', remote, branch],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    lines = []
+    pending = b''
+    try:
+        # Progress updates end with \r, messages (and the last update of
+        # every phase, "..., done.") with \n: only messages are kept
+        while chunk := process.stderr.read1(4096):
+            *complete, pending = _PROGRESS_SEPARATOR.split(pending + chunk)
+            for raw, separator in zip(
+                complete[::2], complete[1::2], strict=True
+            ):
+                line = raw.decode('utf-8', 'replace').strip()
+                if not line:
+                    continue
+                done = separator == b'\n'
+                if done:
+                    lines.append(line)
+                if on_progress is not None:
+                    on_progress(remote, line, done)
+        if line := pending.decode('utf-8', 'replace').strip():
+            lines.append(line)
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        process.stderr.close()
+    if returncode < 0:
+        lines.append('operation timed out')
+    return returncode, '\n'.join(lines)
+
+
+def push_remote(  # noqa: PLR0913, PLR0917
+    remote: str,
+    branch: str,
+    on_progress: Callable[[str, str, bool], None] | None = None,
+    attempts: int = MAX_ATTEMPTS,
+    backoff: float = BACKOFF,
+    timeout: float = TIMEOUT,
+) -> PushResult:
+    """
+    Pushes a branch to one remote, retrying transient failures with
+    exponential backoff.
+
+    Parameters
+    ----------
+    remote : str
+    Remote name or URL.
+    branch : str
+    Branch to push.
+    on_progress : Callable[[str, str, bool], None] or None
+    Called with (remote, line, done) for every progress line of
+    `git push`; `done` is False for the updates meant to be redrawn in
+    place, which are left out of `PushResult.output`.
+    attempts : int
+    Maximum number of attempts.
+    backoff : float
+    Seconds to wait before the first retry, doubled on every retry.
+    timeout : float
+    Seconds after which an attempt is killed (and retried).
+
+    Returns
+    -------
+    PushResult
+    Outcome, number of attempts and total latency of the push.
+    """
+    start = time.monotonic()
+    for attempt in range(1, attempts + 1):
+        returncode, output = _push_once(remote, branch, on_progress, timeout)
+        if returncode == 0:
+            break
+        if attempt == attempts or not is_transient(output):
+            break
+        time.sleep(backoff * 2 ** (attempt - 1))
+    return PushResult(
+        remote, returncode == 0, attempt, time.monotonic() - start, output
+    )
+
+
+def push_all(remotes: list[str], branch: str, **kwargs) -> list[PushResult]:
+    """
+    Pushes a branch to several remotes concurrently.
+
+    Parameters
+    ----------
+    remotes : list[str]
+    Remotes to push to.
+    branch : str
+    Branch to push.
+    **kwargs
+    Passed to `push_remote`.
+
+    Returns
+    -------
+    list[PushResult]
+    One result per remote, in the order of `remotes`.
+    """
+    if len(remotes) == 1:
+        return [push_remote(remotes[0], branch, **kwargs)]
+    with ThreadPoolExecutor(max_workers=len(remotes)) as executor:
+        futures = [
+            executor.submit(push_remote, remote, branch, **kwargs)
+            for remote in remotes
+        ]
+        return [future.result() for future in futures]
+
+
+def print_progress(remote: str, line: str, done: bool = True) -> None:
+    """
+    Prints a progress line of a push, prefixed by its remote.
+
+    On a terminal the updates are redrawn in place; otherwise only the
+    lines that are done are printed.
+    """
+    text = color_text(f'   [{remote}] {line}', 'cyan')
+    with _print_lock:
+        if sys.stdout.isatty():
+            print(_REDRAW + text, end='\n' if done else '', flush=True)
+        elif done:
+            print(text, flush=True)
+
+
+def report(results: list[PushResult]) -> bool:
+    """
+    Prints the outcome and latency of every push.
+
+    Returns
+    -------
+    bool
+    True if every push succeeded.
+    """
+    for result in results:
+        if result.ok:
+            print(
+                color_text(
+                    f'✅ {result.remote}: {result.elapsed:.2f}s '
+                    f'({result.attempts}x)',
+                    'green',
+                )
+            )
+        else:
+            message: str = _('Error when pushing')
+            print(
+                color_text(
+                    f'❌ {message} ({result.remote}, '
+                    f'{result.elapsed:.2f}s, {result.attempts}x): '
+                    f'{result.output}',
+                    'red',
+                )
+            )
+    return all(result.ok for result in results)
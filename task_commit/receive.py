@@ -0,0 +1,172 @@
+"""
+Server-side validation of pushes (`pre-receive` and `update` hooks).
+
+Every commit a push introduces is validated, whatever branch it arrives
+on, with a fixed number of Git processes: one `git rev-list` lists the
+new commits of every updated ref and one `git log --stdin` reads their
+messages.
+"""
+
+import shlex
+import subprocess
+import sys
+from collections.abc import Iterable, Iterator
+from typing import IO, NamedTuple
+
+from .backend import get_backend
+from .config import CONFIG_FILE, parse_config
+from .i18n import _
+from .lint import Validator, lint_commits, read_messages
+from .rules import DEFAULT_RULES, Rules, load_rules
+from .trace import enable_from_env
+from .utils import color_text
+
+SERVER_HOOK = """#!/bin/sh
+# task_commit pre-receive hook: validates every commit of the push.
+exec {python} -m task_commit.receive pre-receive
+"""
+
+
+class RefUpdate(NamedTuple):
+    old: str
+    new: str
+    ref: str
+
+
+def get_server_hook(python: str = sys.executable) -> str:
+    """Renders the pre-receive hook."""
+    return SERVER_HOOK.format(python=shlex.quote(python))
+
+
+def parse_updates(stream: IO[str]) -> list[RefUpdate]:
+    """Parses the "<old> <new> <ref>" lines a pre-receive hook reads."""
+    updates = []
+    for line in stream:
+        if line.strip():
+            old, new, ref = line.split(maxsplit=2)
+            updates.append(RefUpdate(old, new, ref.rstrip('\n')))
+    return updates
+
+
+def iter_new_commits(updates: Iterable[RefUpdate]) -> Iterator[str]:
+    """
+    Streams the SHAs of the pushed commits no existing ref reaches.
+
+    The new tips of every update go through a single `git rev-list`, so
+    the cost does not depend on the number of refs. Deleted refs are
+    skipped.
+
+    ------
+    subprocess.CalledProcessError
+    If `git rev-list` fails.
+    """
+    # A deleted ref has an all-zero new value (of any hash length)
+    tips = {update.new for update in updates if update.new.strip('0')}
+    if not tips:
+        return
+    # Tips read from stdin are not negated by the --not of the arguments
+    command = ['git', 'rev-list', '--stdin', '--not', '--all']
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        process.stdin.write('\n'.join(sorted(tips)) + '\n')
+        process.stdin.close()
+        for line in process.stdout:
+            yield line.rstrip('\n')
+        stderr = process.stderr.read()
+        if process.wait():
+            raise subprocess.CalledProcessError(
+                process.returncode, command, stderr=stderr
+            )
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def load_server_rules() -> Rules:
+    """
+    Loads the rules of a (usually bare) server repository.
+
+    Without a working tree, the pyproject.toml committed on the default
+    branch (HEAD) is used, read through the shared `cat-file` process.
+    """
+    try:
+        get_backend().toplevel()
+    except subprocess.CalledProcessError:
+        pass
+    else:
+        return load_rules()
+    obj = get_backend().cat_file(f'HEAD:{CONFIG_FILE}')
+    if obj is None or obj[0] != 'blob':
+        return DEFAULT_RULES
+    try:
+        return Rules.from_config(parse_config(obj[1]))
+    except (TypeError, ValueError):
+        return DEFAULT_RULES
+
+
+def check_push(
+    updates: list[RefUpdate], validator: Validator | None = None
+) -> int:
+    """
+    Validates every commit introduced by a push and prints the rejected
+    ones.
+
+    Returns
+    -------
+    int
+    Exit status of the hook: 0 accepts the push, 1 rejects it.
+    """
+    validator = validator or Validator(load_server_rules())
+    try:
+        shas = list(iter_new_commits(updates))
+        commits = read_messages(shas) if shas else []
+        violations = list(lint_commits(commits, validator))
+    except subprocess.CalledProcessError as e:
+        message: str = _('Error reading Git history')
+        print(color_text(f'❌ {message}: {e.stderr.strip()}', 'red'))
+        return 1
+
+    for violation in violations:
+        print(
+            color_text(
+                f'❌ {violation.sha[:12]} {violation.subject}: '
+                f'{violation.reason}',
+                'red',
+            )
+        )
+    if violations:
+        message = _('Push rejected, invalid commits')
+        print(color_text(f'🚩 {message}: {len(violations)}', 'red'))
+        return 1
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Entry point of `python -m task_commit.receive`.
+
+    `pre-receive` reads the ref updates from stdin, `update REF OLD NEW`
+    checks a single ref the way the `update` hook is called.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    enable_from_env()
+    sys.stdout.reconfigure(encoding='utf-8')
+    if argv == ['pre-receive']:
+        return check_push(parse_updates(sys.stdin))
+    if len(argv) == 4 and argv[0] == 'update':  # noqa: PLR2004
+        ref, old, new = argv[1:]
+        return check_push([RefUpdate(old, new, ref)])
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
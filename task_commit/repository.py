@@ -0,0 +1,505 @@
+"""
+Reads repository metadata straight from the files Git keeps it in.
+
+Finding the repository, reading HEAD and the configuration are the most
+frequent questions task_commit asks Git, and the answers sit in a
+handful of small files: reading them costs microseconds where a `git`
+process costs milliseconds. Whatever this module cannot resolve exactly
+like Git does (environment overrides, `hasconfig:` includes, invalid
+files) raises `Unsupported`, so the caller can ask Git instead.
+"""
+
+import os
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+# Environment variables changing where Git finds the repository
+LOCATE_ENV = (
+    'GIT_DIR',
+    'GIT_WORK_TREE',
+    'GIT_COMMON_DIR',
+    'GIT_CEILING_DIRECTORIES',
+    'GIT_DISCOVERY_ACROSS_FILESYSTEM',
+)
+# Environment variables adding configuration this reader does not parse
+CONFIG_ENV = ('GIT_CONFIG_PARAMETERS', 'GIT_CONFIG')
+MAX_INCLUDE_DEPTH = 10
+BRANCH_PREFIX = 'refs/heads/'
+_KEY_CHARS = re.compile(r'[A-Za-z][A-Za-z0-9-]*')
+_BLANKS = re.compile(r'[ \t\r]*')
+_SECTION_CHARS = re.compile(r'[A-Za-z0-9.-]+')
+_ESCAPES = {'n': '\n', 't': '\t', 'b': '\b', '"': '"', '\\': '\\'}
+
+
+class Unsupported(Exception):  # noqa: N818
+    """Metadata this module cannot read exactly like Git: ask Git."""
+
+
+@dataclass(frozen=True)
+class RepoPaths:
+    """
+    Location of a repository.
+
+    Attributes
+    ----------
+    git_dir : str
+    Git directory of the worktree (`.git`, or `.git/worktrees/<name>`).
+    common_dir : str
+    Directory shared by every worktree: objects, refs and config.
+    toplevel : str or None
+    Root of the working tree, None for a bare repository.
+    """
+
+    git_dir: str
+    common_dir: str
+    toplevel: str | None
+
+
+def get_common_dir(git_dir: str) -> str:
+    """Gets the directory shared by the worktrees of a Git directory."""
+    try:
+        with open(os.path.join(git_dir, 'commondir'), encoding='utf-8') as f:
+            common_dir = f.read().strip()
+    except OSError:
+        return git_dir
+    return os.path.normpath(os.path.join(git_dir, common_dir))
+
+
+def is_git_dir(path: str) -> bool:
+    """True if `path` looks like a Git directory, the way Git checks it."""
+    if not os.path.isfile(os.path.join(path, 'HEAD')):
+        return False
+    common_dir = get_common_dir(path)
+    return os.path.isdir(os.path.join(common_dir, 'objects')) and (
+        os.path.isdir(os.path.join(common_dir, 'refs'))
+    )
+
+
+def read_gitfile(path: str) -> str | None:
+    """Follows a `.git` file ("gitdir: <path>") of a worktree/submodule."""
+    try:
+        with open(path, encoding='utf-8') as gitfile:
+            line = gitfile.readline().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if not line.startswith('gitdir: '):
+        return None
+    target = line.removeprefix('gitdir: ')
+    return os.path.normpath(os.path.join(os.path.dirname(path), target))
+
+
+def discover(start: str | None = None) -> RepoPaths | None:
+    """
+    Finds the repository containing a directory, like Git does.
+
+    Parameters
+    ----------
+    start : str or None
+    Directory to start from, defaults to the working directory.
+
+    Returns
+    -------
+    RepoPaths or None
+    Location of the repository, None outside one or when the environment
+    changes how Git finds it (e.g. GIT_DIR is set).
+    """
+    if any(os.getenv(name) for name in LOCATE_ENV):
+        return None
+    path = os.path.abspath(start or os.getcwd())
+    while True:
+        dot_git = os.path.join(path, '.git')
+        git_dir = dot_git if os.path.isdir(dot_git) else None
+        if git_dir is None and os.path.isfile(dot_git):
+            git_dir = read_gitfile(dot_git)
+        if git_dir is not None and is_git_dir(git_dir):
+            return _located(git_dir, path)
+        if is_git_dir(path):
+            return _located(path, None)
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _located(git_dir: str, toplevel: str | None) -> RepoPaths | None:
+    common_dir = get_common_dir(git_dir)
+    try:
+        local = dict(parse_config_file(os.path.join(common_dir, 'config')))
+    except (OSError, Unsupported):
+        local = {}
+    # The working tree is set somewhere else, or declared absent
+    if 'core.worktree' in local:
+        return None
+    if local.get('core.bare', '').lower() in {'true', 'yes', 'on', '1'}:
+        toplevel = None
+    return RepoPaths(git_dir, common_dir, toplevel)
+
+
+def read_ref_file(path: str) -> tuple[str | None, str | None]:
+    """
+    Reads a loose ref.
+
+    Returns
+    -------
+    tuple[str or None, str or None]
+    (target ref, None) for a symbolic ref, (None, object id) otherwise;
+    (None, None) if the file does not exist.
+    """
+    try:
+        with open(path, encoding='utf-8') as ref_file:
+            content = ref_file.readline().strip()
+    except (OSError, UnicodeDecodeError):
+        return None, None
+    if content.startswith('ref:'):
+        return content.removeprefix('ref:').strip(), None
+    return None, content or None
+
+
+def read_head(git_dir: str) -> tuple[str | None, str | None]:
+    """Reads HEAD: see `read_ref_file`."""
+    return read_ref_file(os.path.join(git_dir, 'HEAD'))
+
+
+def abbrev_head(git_dir: str) -> str | None:
+    """
+    Gets the current branch, or "HEAD" when detached, like
+    `git rev-parse --abbrev-ref HEAD`. None if HEAD cannot be read.
+    """
+    target, oid = read_head(git_dir)
+    if target is not None:
+        return target.removeprefix(BRANCH_PREFIX)
+    return 'HEAD' if oid is not None else None
+
+
+def get_config_files(paths: RepoPaths | None) -> list[str]:
+    """Gets the configuration files Git reads, in order, without includes."""
+    home = os.path.expanduser('~')
+    xdg = os.getenv('XDG_CONFIG_HOME') or os.path.join(home, '.config')
+    files = []
+    if not os.getenv('GIT_CONFIG_NOSYSTEM'):
+        files.append(os.getenv('GIT_CONFIG_SYSTEM', '/etc/gitconfig'))
+    files.append(os.path.join(xdg, 'git', 'config'))
+    files.append(
+        os.getenv('GIT_CONFIG_GLOBAL', os.path.join(home, '.gitconfig'))
+    )
+    if paths is not None:
+        files.append(os.path.join(paths.common_dir, 'config'))
+    return files
+
+
+def _parse_escape(text: str, pos: int) -> tuple[str, int]:
+    escaped = text[pos : pos + 1]
+    if text.startswith('\r\n', pos):
+        return '', pos + 2  # line continuation
+    if escaped == '\n':
+        return '', pos + 1
+    if escaped not in _ESCAPES:
+        raise Unsupported(f'invalid escape: {escaped!r}')
+    return _ESCAPES[escaped], pos + 1
+
+
+def _parse_value(text: str, pos: int) -> tuple[str, int]:
+    value: list[str] = []
+    spaces = 0
+    quoted = False
+    comment = False
+    while pos < len(text):
+        char = text[pos]
+        pos += 1
+        if char == '\n':
+            if quoted:
+                raise Unsupported('unterminated quoted value')
+            break
+        if comment:
+            continue
+        if char in ' \t\r\f\v' and not quoted:
+            spaces += bool(value)
+            continue
+        if not quoted and char in '#;':
+            comment = True
+            continue
+        value.extend(' ' * spaces)
+        spaces = 0
+        if char == '\\':
+            escaped, pos = _parse_escape(text, pos)
+            value.append(escaped)
+        elif char == '"':
+            quoted = not quoted
+        else:
+            value.append(char)
+    if quoted:
+        raise Unsupported('unterminated quoted value')
+    return ''.join(value), pos
+
+
+def _parse_section(text: str, pos: int) -> tuple[str, int]:
+    match = _SECTION_CHARS.match(text, pos)
+    if match is None:
+        raise Unsupported('invalid section header')
+    section, pos = match.group(), match.end()
+    if text.startswith(']', pos):
+        name, dot, subsection = section.partition('.')
+        # [section.subsection] is the deprecated, case insensitive syntax
+        return f'{name.lower()}{dot}{subsection.lower()}', pos + 1
+    if '.' in section or text[pos : pos + 1] not in {' ', '\t'}:
+        raise Unsupported('invalid section header')
+    pos = _BLANKS.match(text, pos).end()
+    if not text.startswith('"', pos):
+        raise Unsupported('invalid section header')
+    subsection = []
+    pos += 1
+    while pos < len(text) and text[pos] not in '"\n':
+        if text[pos] == '\\':
+            pos += 1
+        subsection.append(text[pos : pos + 1])
+        pos += 1
+    if not text.startswith('"]', pos):
+        raise Unsupported('invalid section header')
+    return f'{section.lower()}.{"".join(subsection)}', pos + 2
+
+
+def parse_config(text: str) -> Iterator[tuple[str, str]]:
+    """
+    Parses the contents of a Git configuration file.
+
+    Yields
+    ------
+    tuple[str, str]
+    (key, value) pairs in file order, keys normalized like `git config
+    --list` prints them ("section.Subsection.name"); a key without "="
+    has an empty value.
+
+    ------
+    Unsupported
+    If the file is invalid.
+    """
+    text = text.removeprefix('\ufeff')
+    section = None
+    pos = 0
+    while pos < len(text):
+        char = text[pos]
+        if char.isspace():
+            pos += 1
+        elif char in '#;':
+            end = text.find('\n', pos)
+            pos = len(text) if end < 0 else end + 1
+        elif char == '[':
+            section, pos = _parse_section(text, pos + 1)
+        else:
+            match = _KEY_CHARS.match(text, pos)
+            if match is None or section is None:
+                raise Unsupported(f'invalid key at offset {pos}')
+            key = f'{section}.{match.group().lower()}'
+            pos = _BLANKS.match(text, match.end()).end()
+            value = ''
+            if text.startswith('=', pos):
+                value, pos = _parse_value(text, pos + 1)
+            elif pos < len(text) and text[pos] not in '\n#;':
+                raise Unsupported(f'invalid key at offset {pos}')
+            yield key, value
+
+
+def parse_config_file(path: str) -> list[tuple[str, str]]:
+    """
+    Parses a configuration file, without following its includes.
+
+    ------
+    OSError
+    If the file cannot be read.
+    Unsupported
+    If the file is invalid.
+    """
+    with open(path, encoding='utf-8', errors='surrogateescape') as f:
+        return list(parse_config(f.read()))
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translates a Git wildmatch pattern (with `**`, `*` not matching "/")
+    into a regular expression.
+    """
+    regex = []
+    pos = 0
+    while pos < len(pattern):
+        if pattern.startswith('**/', pos) and (
+            pos == 0 or pattern[pos - 1] == '/'
+        ):
+            regex.append('(?:.*/)?')
+            pos += 3
+        elif pattern.startswith('**', pos):
+            regex.append('.*')
+            pos += 2
+        elif pattern[pos] == '*':
+            regex.append('[^/]*')
+            pos += 1
+        elif pattern[pos] == '?':
+            regex.append('[^/]')
+            pos += 1
+        elif pattern[pos] == '[' and (end := pattern.find(']', pos + 2)) > 0:
+            members = pattern[pos + 1 : end]
+            if members.startswith('!'):
+                members = '^' + members[1:]
+            members = members.replace('\\', '\\\\')
+            regex.append(f'[{members}]')
+            pos = end + 1
+        elif pattern[pos] == '\\' and pos + 1 < len(pattern):
+            regex.append(re.escape(pattern[pos + 1]))
+            pos += 2
+        else:
+            regex.append(re.escape(pattern[pos]))
+            pos += 1
+    return ''.join(regex)
+
+
+class ConfigReader:
+    """
+    Reads the configuration Git would use in a repository: the system,
+    global and repository files, their `[include]` and `[includeIf]`
+    files, and the GIT_CONFIG_COUNT variables.
+
+    Parameters
+    ----------
+    paths : RepoPaths or None
+    Repository whose configuration is read, None outside a repository.
+    """
+
+    def __init__(self, paths: RepoPaths | None):
+        self.paths = paths
+        self.values: dict[str, list[str]] = {}
+        # Every file looked for, included ones too, even those missing:
+        # creating one changes the configuration as well
+        self.files: list[str] = []
+        self._branch: str | None = None
+
+    def read(self) -> dict[str, list[str]]:
+        """
+        Reads every value, keyed like `git config --list` prints them.
+
+        ------
+        Unsupported
+        If a file is invalid or uses what this reader cannot resolve.
+        """
+        if any(os.getenv(name) for name in CONFIG_ENV):
+            raise Unsupported('configuration set in the environment')
+        for path in get_config_files(self.paths):
+            self._read_file(path, 0)
+        if self.paths is not None and self._get_bool(
+            'extensions.worktreeconfig'
+        ):
+            self._read_file(
+                os.path.join(self.paths.git_dir, 'config.worktree'), 0
+            )
+        for index in range(int(os.getenv('GIT_CONFIG_COUNT') or 0)):
+            key = os.getenv(f'GIT_CONFIG_KEY_{index}', '')
+            if '.' not in key:
+                raise Unsupported(f'GIT_CONFIG_KEY_{index}: {key!r}')
+            self._add(
+                normalize_key(key), os.getenv(f'GIT_CONFIG_VALUE_{index}', '')
+            )
+        return self.values
+
+    def _get_bool(self, key: str) -> bool:
+        values = self.values.get(key)
+        return bool(values) and values[-1].lower() in {
+            'true',
+            'yes',
+            'on',
+            '1',
+            '',
+        }
+
+    def _add(self, key: str, value: str) -> None:
+        self.values.setdefault(key, []).append(value)
+
+    def _read_file(self, path: str, depth: int) -> None:
+        self.files.append(path)
+        try:
+            entries = parse_config_file(path)
+        except FileNotFoundError:
+            return
+        except OSError as error:
+            raise Unsupported(str(error)) from error
+        for key, value in entries:
+            self._add(key, value)
+            if key == 'include.path':
+                self._include(value, path, depth)
+            elif key.startswith('includeif.') and key.endswith('.path'):
+                condition = key.removeprefix('includeif.').removesuffix(
+                    '.path'
+                )
+                if self._matches(condition, path):
+                    self._include(value, path, depth)
+
+    def _include(self, target: str, including: str, depth: int) -> None:
+        if depth >= MAX_INCLUDE_DEPTH:
+            raise Unsupported(f'include depth exceeded in {including}')
+        target = os.path.expanduser(target)
+        target = os.path.join(os.path.dirname(including), target)
+        self._read_file(os.path.normpath(target), depth + 1)
+
+    def _matches(self, condition: str, including: str) -> bool:
+        kind, _sep, pattern = condition.partition(':')
+        if kind in {'gitdir', 'gitdir/i'}:
+            if self.paths is None:
+                return False
+            pattern = os.path.expanduser(pattern)
+            if pattern.startswith('./'):
+                pattern = os.path.join(os.path.dirname(including), pattern[2:])
+            elif not os.path.isabs(pattern) and not pattern.startswith('**/'):
+                pattern = '**/' + pattern
+            if pattern.endswith('/'):
+                pattern += '**'
+            regex = re.compile(
+                glob_to_regex(pattern),
+                re.IGNORECASE if kind == 'gitdir/i' else 0,
+            )
+            git_dir = self.paths.git_dir
+            return bool(
+                regex.fullmatch(git_dir)
+                or regex.fullmatch(os.path.realpath(git_dir))
+            )
+        if kind == 'onbranch':
+            if self.paths is None:
+                return False
+            if self._branch is None:
+                target, _oid = read_head(self.paths.git_dir)
+                self._branch = (target or '').removeprefix(BRANCH_PREFIX)
+            if pattern.endswith('/'):
+                pattern += '**'
+            return bool(
+                self._branch
+                and re.fullmatch(glob_to_regex(pattern), self._branch)
+            )
+        if kind == 'hasconfig':
+            raise Unsupported(f'includeIf condition: {condition}')
+        return False
+
+
+def normalize_key(key: str) -> str:
+    """Normalizes a configuration key like `git config --list` prints it."""
+    # Section and variable names are case insensitive, subsections are not
+    section, _sep, rest = key.partition('.')
+    subsection, dot, name = rest.rpartition('.')
+    return f'{section.lower()}.{subsection}{dot}{name.lower()}'
+
+
+def read_config(
+    paths: RepoPaths | None,
+) -> tuple[dict[str, list[str]], list[str]]:
+    """
+    Reads the configuration of a repository: see `ConfigReader`.
+
+    Returns
+    -------
+    tuple[dict[str, list[str]], list[str]]
+    Every value, keyed like `git config --list` prints them, and every
+    file looked for (included ones too, even those missing), which is
+    what the values depend on besides the environment.
+
+    ------
+    Unsupported
+    If a file is invalid or uses what this reader cannot resolve.
+    """
+    reader = ConfigReader(paths)
+    return reader.read(), reader.files
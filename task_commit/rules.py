@@ -0,0 +1,123 @@
+import re
+from dataclasses import dataclass, fields
+
+from .config import load_config
+from .i18n import _
+from .init import HOOK_TYPES, MAX_HEADER_LENGTH
+from .utils import color_text
+
+SCOPE_CHARS = r'[a-zA-Z0-9_\-]+'
+LOWER_SCOPE_CHARS = r'[a-z0-9_\-]+'
+CASE_RULES = ('any', 'lower')
+_SCOPE_REGEX = re.compile(rf'^{SCOPE_CHARS}$')
+
+
+@dataclass(frozen=True)
+class Rules:
+    """
+    Commit message rules of a repository.
+
+    They are read from the `[tool.task_commit]` section of pyproject.toml
+    (see `load_rules`); every field is optional there.
+
+    Attributes
+    ----------
+    types : tuple[str, ...]
+    Accepted commit types, in the order they are offered.
+    scopes : tuple[str, ...]
+    Accepted scopes, empty to accept any.
+    max_header_length : int
+    Longest description (or free-form header), in characters.
+    subject_case : str
+    "lower" to reject descriptions starting with an uppercase letter.
+    scope_case : str
+    "lower" to reject scopes with uppercase letters.
+    conventional_only : bool
+    Reject free-form headers (they are accepted when short enough).
+    """
+
+    types: tuple[str, ...] = HOOK_TYPES
+    scopes: tuple[str, ...] = ()
+    max_header_length: int = MAX_HEADER_LENGTH
+    subject_case: str = 'any'
+    scope_case: str = 'any'
+    conventional_only: bool = False
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'Rules':
+        """
+        Builds the rules from the `[tool.task_commit]` section.
+
+        ------
+        ValueError
+        If a rule has an invalid value.
+        """
+        names = {field.name for field in fields(cls)}
+        values = {
+            name: config[name] for name in names - {'scopes'} if name in config
+        }
+        if 'allowed_scopes' in config:
+            values['scopes'] = config['allowed_scopes']
+        for name, key in (('types', 'types'), ('scopes', 'allowed_scopes')):
+            if name in values:
+                if not isinstance(values[name], list | tuple):
+                    raise ValueError(f'{key}: {values[name]!r}')
+                values[name] = tuple(values[name])
+                invalid = [
+                    value
+                    for value in values[name]
+                    if not isinstance(value, str)
+                    or not _SCOPE_REGEX.match(value)
+                ]
+                if invalid:
+                    raise ValueError(f'{key}: {invalid}')
+        if not values.get('types', HOOK_TYPES):
+            raise ValueError('types: []')
+        length = values.get('max_header_length', MAX_HEADER_LENGTH)
+        if not isinstance(length, int) or length < 1:
+            raise ValueError(f'max_header_length: {length}')
+        for name in ('subject_case', 'scope_case'):
+            if values.get(name, 'any') not in CASE_RULES:
+                raise ValueError(f'{name}: {values[name]}')
+        return cls(**values)
+
+    @property
+    def pattern(self) -> str:
+        """
+        Regular expression a header must match, with the `type`, `scope`
+        and `subject` groups set for Conventional Commits headers.
+        """
+        types = '|'.join(map(re.escape, self.types))
+        if self.scopes:
+            scope = '|'.join(map(re.escape, self.scopes))
+        elif self.scope_case == 'lower':
+            scope = LOWER_SCOPE_CHARS
+        else:
+            scope = SCOPE_CHARS
+        length = f'{{1,{self.max_header_length}}}'
+        pattern = (
+            rf'^(?P<type>{types})(\((?P<scope>{scope})\))?: '
+            rf'(?P<subject>.{length})$'
+        )
+        if not self.conventional_only:
+            pattern += rf'|^.{length}$'
+        return pattern
+
+
+DEFAULT_RULES = Rules()
+
+
+def load_rules(path: str | None = None) -> Rules:
+    """
+    Loads the rules of the current repository.
+
+    The configuration is cached (see `load_config`), so this is cheap
+    after the first run. Invalid rules are reported and the default rules
+    used instead.
+    """
+    try:
+        return Rules.from_config(load_config(path))
+    except (TypeError, ValueError) as error:
+        message: str = _('Invalid commit rules in pyproject.toml')
+        print(color_text(f'⚠️ {message}: {error}', 'yellow'))
+        return DEFAULT_RULES
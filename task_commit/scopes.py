@@ -0,0 +1,478 @@
+import json
+import os
+import re
+import subprocess
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+
+from .backend import get_backend
+from .cache import get_cache_dir, write_atomic
+from .config import load_config
+from .rules import SCOPE_CHARS
+from .status import iter_nul_records
+
+# Recent commits the scopes are learned from
+HISTORY_LIMIT = 500
+# Paths looked up per inference, so its cost does not grow with the change
+QUERY_SAMPLE = 500
+# Only scopes the rules could accept, which are safe to store tab separated
+SCOPE_REGEX = re.compile(rf'^\w+\(\s*({SCOPE_CHARS})\s*\)!?: ')
+SCOPE_INDEX_FILE = 'scope-index'
+SCOPE_INDEX_VERSION = '2'
+SCOPE_PATHS_FILE = 'scope-paths.json'
+SCOPE_PATHS_VERSION = 1
+# Days after which the weight of a scope that is no longer used is halved
+HALF_LIFE_DAYS = 90
+
+
+class ScopeTrie:
+    """
+    Path prefix trie mapping directories to the scopes used for them.
+
+    Every node counts the scopes seen at or below it; after `finalize`
+    each node holds its most frequent scope in `best`, so a lookup is a
+    walk down the path components.
+    """
+
+    __slots__ = ('best', 'children', 'scopes')
+
+    def __init__(self):
+        self.children: dict[str, ScopeTrie] = {}
+        self.scopes: Counter[str] = Counter()
+        self.best: str | None = None
+
+    def add(self, path: str, scope: str, weight: int = 1) -> None:
+        """
+        Counts `scope` for every directory of `path` (the root excluded).
+        """
+        node = self
+        for part in path.split('/'):
+            if not part:
+                continue
+            node = node.children.setdefault(part, ScopeTrie())
+            node.scopes[scope] += weight
+
+    def add_prefix(self, prefix: str, scope: str) -> None:
+        """Maps a prefix to a scope, without counting it for its parents."""
+        node = self
+        for part in prefix.split('/'):
+            if part:
+                node = node.children.setdefault(part, ScopeTrie())
+        node.scopes[scope] += 1
+
+    def finalize(self) -> 'ScopeTrie':
+        """Computes the best scope of every node, returning the trie."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.scopes:
+                node.best = node.scopes.most_common(1)[0][0]
+            stack.extend(node.children.values())
+        return self
+
+    def lookup(self, path: str) -> str | None:
+        """Gets the best scope of the deepest known prefix of `path`."""
+        node = self
+        best = None
+        for part in path.split('/'):
+            node = node.children.get(part)
+            if node is None:
+                break
+            best = node.best or best
+        return best
+
+
+class ScopeResolver:
+    """
+    Infers the scope of a commit from the paths it changes.
+
+    Prefixes mapped in the `[tool.task_commit.scopes]` configuration take
+    precedence over the scopes learned from the history.
+
+    Parameters
+    ----------
+    configured : ScopeTrie
+    Trie built from the configuration.
+    learned : ScopeTrie
+    Trie built from the scopes of previous commits.
+    """
+
+    def __init__(self, configured: ScopeTrie, learned: ScopeTrie):
+        self.configured = configured.finalize()
+        self.learned = learned.finalize()
+
+    @classmethod
+    def load(cls, history_limit: int = HISTORY_LIMIT) -> 'ScopeResolver':
+        """Builds the resolver of the current repository."""
+        configured = ScopeTrie()
+        for scope, prefixes in load_config().get('scopes', {}).items():
+            for prefix in (
+                [prefixes] if isinstance(prefixes, str) else prefixes
+            ):
+                configured.add_prefix(prefix, scope)
+
+        return cls(configured, ScopePaths.open(history_limit).trie())
+
+    def infer(self, paths: Sequence[str]) -> str | None:
+        """
+        Gets the most likely scope for a set of changed paths.
+
+        At most QUERY_SAMPLE paths, evenly spread, are looked up.
+        """
+        step = max(1, len(paths) // QUERY_SAMPLE)
+        votes = Counter()
+        for path in paths[::step]:
+            scope = self.configured.lookup(path) or self.learned.lookup(path)
+            if scope is not None:
+                votes[scope] += 1
+        return votes.most_common(1)[0][0] if votes else None
+
+
+def iter_history_scopes(
+    head: str, since: str | None = None, limit: int | None = None
+) -> Iterable[tuple[str, list[str]]]:
+    """
+    Yields (scope, changed paths) for the non-merge commits reachable from
+    `head` and not from `since` that have a Conventional Commits scope.
+
+    Parameters
+    ----------
+    limit : int or None
+    Maximum number of commits read, the most recent first.
+
+    ------
+    subprocess.CalledProcessError
+    If `git log` fails, e.g. because `since` no longer exists.
+    """
+    command = [
+        'git',
+        '-c',
+        'core.quotePath=false',
+        'log',
+        '--no-merges',
+        '--name-only',
+        '--format=%x1e%s',
+        head,
+    ]
+    if limit is not None:
+        command.insert(4, f'-n{limit}')
+    if since is not None:
+        command.append(f'^{since}')
+    output = subprocess.check_output(
+        command, text=True, stderr=subprocess.DEVNULL
+    )
+    for entry in output.split('\x1e'):
+        subject, _sep, names = entry.partition('\n')
+        match = SCOPE_REGEX.match(subject)
+        if match:
+            yield match.group(1).strip().lower(), names.splitlines()
+
+
+class ScopePaths:
+    """
+    Persistent counts of the scopes used for every directory.
+
+    Built from the last HISTORY_LIMIT commits, then kept in
+    `.git/task_commit/` with the last indexed commit: like `ScopeIndex`,
+    only the commits newer than it are read from `git log` afterwards,
+    and the counts are rebuilt when it is no longer an ancestor of HEAD.
+
+    Parameters
+    ----------
+    path : str or None
+    File where the counts are stored, None to keep them in memory only.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.head: str | None = None
+        self.directories: dict[str, Counter[str]] = {}
+        if path is not None:
+            self._load()
+
+    @classmethod
+    def open(cls, history_limit: int = HISTORY_LIMIT) -> 'ScopePaths':
+        """Opens the counts of the current repository, brought up to date."""
+        cache_dir = get_cache_dir()
+        paths = cls(
+            os.path.join(cache_dir, SCOPE_PATHS_FILE) if cache_dir else None
+        )
+        try:
+            head = get_backend().status().oid
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return paths
+        if head is not None and head != paths.head:
+            paths.update(head, history_limit)
+        return paths
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding='utf-8') as paths_file:
+                data = json.load(paths_file)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        if data.get('version') != SCOPE_PATHS_VERSION:
+            return
+        self.head = data.get('head')
+        self.directories = {
+            directory: Counter(scopes)
+            for directory, scopes in data.get('directories', {}).items()
+        }
+
+    def add(self, scope: str, paths: Iterable[str]) -> None:
+        """Counts `scope` for the directory of each of `paths`."""
+        for path in paths:
+            directory = path.rpartition('/')[0]
+            self.directories.setdefault(directory, Counter())[scope] += 1
+
+    def update(self, head: str, history_limit: int = HISTORY_LIMIT) -> None:
+        """
+        Counts the commits reachable from `head` but not from the last
+        indexed commit, then saves the counts.
+
+        Unless the last indexed commit is an ancestor of `head`, the counts
+        are rebuilt from the last `history_limit` commits.
+        """
+        try:
+            incremental = self.head is not None and is_ancestor(
+                self.head, head
+            )
+        except subprocess.CalledProcessError:
+            incremental = False  # The last indexed commit no longer exists
+        if not incremental:
+            self.head = None
+            self.directories.clear()
+        try:
+            commits = list(
+                iter_history_scopes(
+                    head, self.head, None if incremental else history_limit
+                )
+            )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return
+        for scope, paths in commits:
+            self.add(scope, paths)
+        self.head = head
+        self.save()
+
+    def save(self) -> None:
+        """Writes the counts to disk."""
+        if self.path is None:
+            return
+        data = {
+            'version': SCOPE_PATHS_VERSION,
+            'head': self.head,
+            'directories': self.directories,
+        }
+        try:
+            write_atomic(self.path, json.dumps(data, sort_keys=True))
+        except OSError:
+            pass
+
+    def trie(self) -> ScopeTrie:
+        """Builds the trie of the counted scopes."""
+        learned = ScopeTrie()
+        for directory, scopes in self.directories.items():
+            for scope, count in scopes.items():
+                learned.add(directory, scope, count)
+        return learned
+
+
+class ScopeIndex:
+    """
+    Persistent index of the scopes used in the history, for completion.
+
+    For every scope the number of commits using it and the time of the
+    most recent one are stored in `.git/task_commit/`, together with the
+    last indexed commit: only commits newer than it are read from
+    `git log` when the index is refreshed.
+
+    Parameters
+    ----------
+    path : str or None
+    File where the index is stored, None to keep it in memory only.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.head: str | None = None
+        self.scopes: dict[str, tuple[int, int]] = {}
+        if path is not None:
+            self._load()
+
+    @classmethod
+    def open(cls) -> 'ScopeIndex':
+        """Opens the index of the current repository, brought up to date."""
+        cache_dir = get_cache_dir()
+        index = cls(
+            os.path.join(cache_dir, SCOPE_INDEX_FILE) if cache_dir else None
+        )
+        try:
+            head = get_backend().status().oid
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return index
+        if head is not None and head != index.head:
+            index.update(head)
+        return index
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding='utf-8') as index_file:
+                lines = index_file.read().splitlines()
+        except (FileNotFoundError, UnicodeDecodeError):
+            return
+        if not lines:
+            return
+        version, _sep, head = lines[0].partition('\t')
+        if version != SCOPE_INDEX_VERSION:
+            return
+        self.head = head or None
+        for line in lines[1:]:
+            try:
+                scope, count, last_used = line.split('\t')
+                self.scopes[scope] = (int(count), int(last_used))
+            except ValueError:
+                continue  # Malformed line, e.g. written by another version
+
+    def add(self, scope: str, timestamp: int) -> None:
+        """Counts one commit using `scope`, made at `timestamp`."""
+        count, last_used = self.scopes.get(scope, (0, 0))
+        self.scopes[scope] = (count + 1, max(last_used, timestamp))
+
+    def update(self, head: str) -> None:
+        """
+        Indexes the commits reachable from `head` but not from the last
+        indexed commit, then saves the index.
+
+        The whole history is read again unless the last indexed commit is
+        an ancestor of `head`: after switching to a branch forked earlier
+        (or a history rewrite) the commits counted and those reachable no
+        longer match.
+        """
+        try:
+            incremental = self.head is not None and is_ancestor(
+                self.head, head
+            )
+        except subprocess.CalledProcessError:
+            incremental = False  # The last indexed commit no longer exists
+        if not incremental:
+            self.head = None
+            self.scopes.clear()
+        try:
+            commits = list(iter_subjects(head, self.head))
+        except subprocess.CalledProcessError:
+            return
+        for timestamp, subject in commits:
+            match = SCOPE_REGEX.match(subject)
+            if match:
+                self.add(match.group(1).strip().lower(), timestamp)
+        self.head = head
+        self.save()
+
+    def save(self) -> None:
+        """Writes the index to disk."""
+        if self.path is None:
+            return
+        lines = [f'{SCOPE_INDEX_VERSION}\t{self.head or ""}']
+        for scope, (count, last_used) in self.scopes.items():
+            lines.append(f'{scope}\t{count}\t{last_used}')
+        write_atomic(self.path, '\n'.join(lines) + '\n')
+
+    def ranked(self, now: float | None = None) -> list[str]:
+        """
+        Gets the known scopes, most relevant first.
+
+        A scope is as relevant as the commits using it, halved for every
+        HALF_LIFE_DAYS since it was last used.
+        """
+        now = time.time() if now is None else now
+
+        def score(item):
+            scope, (count, last_used) = item
+            age_days = max(0.0, now - last_used) / 86_400
+            return (-count * 0.5 ** (age_days / HALF_LIFE_DAYS), scope)
+
+        return [
+            scope for scope, _stats in sorted(self.scopes.items(), key=score)
+        ]
+
+
+def is_ancestor(ancestor: str, commit: str) -> bool:
+    """
+    Checks if `ancestor` is reachable from `commit`.
+
+    ------
+    subprocess.CalledProcessError
+    If one of the commits does not exist.
+    """
+    result = subprocess.run(
+        ['git', 'merge-base', '--is-ancestor', ancestor, commit],
+        capture_output=True,
+        check=False,
+    )
+    if result.returncode > 1:
+        raise subprocess.CalledProcessError(
+            result.returncode, result.args, stderr=result.stderr
+        )
+    return result.returncode == 0
+
+
+def iter_subjects(
+    head: str, since: str | None = None
+) -> Iterator[tuple[int, str]]:
+    """
+    Streams (commit timestamp, subject) of the non-merge commits reachable
+    from `head` and not from `since`.
+
+    ------
+    subprocess.CalledProcessError
+    If `git log` fails, e.g. because `since` no longer exists.
+    """
+    command = ['git', 'log', '-z', '--no-merges', '--format=%ct %s', head]
+    if since is not None:
+        command.append(f'^{since}')
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        for record in iter_nul_records(process.stdout):
+            timestamp, _sep, subject = record.decode(
+                'utf-8', 'replace'
+            ).partition(' ')
+            yield int(timestamp), subject
+        stderr = process.stderr.read()
+        if process.wait():
+            raise subprocess.CalledProcessError(
+                process.returncode,
+                command,
+                stderr=stderr.decode('utf-8', 'replace'),
+            )
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def get_scope_completer(allowed: Sequence[str] = ()):
+    """
+    Gets a prompt_toolkit completer for the scopes of the history, most
+    relevant first.
+
+    Parameters
+    ----------
+    allowed : Sequence[str]
+    Scopes the rules accept: only those are offered, the ones never used
+    last. Empty to offer every scope of the history.
+    """
+    from prompt_toolkit.completion import WordCompleter  # noqa: PLC0415
+
+    scopes = ScopeIndex.open().ranked()
+    if allowed:
+        scopes = [scope for scope in scopes if scope in allowed]
+        scopes += [scope for scope in allowed if scope not in scopes]
+    return WordCompleter(scopes, ignore_case=True, match_middle=True)
@@ -0,0 +1,199 @@
+import subprocess
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import IO
+
+STATUS_COMMAND = ['git', 'status', '--porcelain=v2', '--branch', '-z']
+CHUNK_SIZE = 1 << 16
+# Paths kept per bucket; past it only the counters keep growing
+MAX_PATHS = 10_000
+
+
+def iter_nul_records(
+    stream: IO[bytes], chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Splits a NUL separated stream into records, one chunk at a time.
+
+    Only one chunk plus the record being assembled is kept in memory.
+    """
+    pending = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        records = (pending + chunk).split(b'\0')
+        pending = records.pop()
+        yield from records
+    if pending:
+        yield pending
+
+
+class StatusBucket(list):
+    """
+    Paths of one status category, with bounded memory.
+
+    Only the first `limit` paths are stored, while `total` and the
+    per-directory `directories` counters account for every path added.
+    """
+
+    def __init__(self, paths: Iterable[str] = (), limit: int = MAX_PATHS):
+        super().__init__()
+        self.limit = limit
+        self.total = 0
+        self.directories: Counter[str] = Counter()
+        for path in paths:
+            self.append(path)
+
+    def append(self, path: str) -> None:
+        self.total += 1
+        directory, slash, _name = path.partition('/')
+        self.directories[f'{directory}/' if slash else '.'] += 1
+        if len(self) < self.limit:
+            super().append(path)
+
+    @property
+    def truncated(self) -> bool:
+        """True if some paths were counted but not stored."""
+        return self.total > len(self)
+
+
+def _bucket():
+    return field(default_factory=StatusBucket)
+
+
+@dataclass
+class RepoState:
+    """
+    Snapshot of the repository taken from a single `git status` call.
+
+    Attributes
+    ----------
+    branch : str or None
+    Current branch, None when HEAD is detached.
+    oid : str or None
+    Commit HEAD points to, None before the first commit.
+    upstream : str or None
+    Upstream of the current branch (e.g. "origin/main"), if any.
+    ahead, behind : int
+    Commits the branch is ahead of / behind its upstream.
+    staged, not_staged, untracked, unmerged : StatusBucket
+    Changed paths classified like `git status` does. A path modified in
+    both the index and the worktree is listed as staged and not staged.
+    """
+
+    branch: str | None = None
+    oid: str | None = None
+    upstream: str | None = None
+    ahead: int = 0
+    behind: int = 0
+    staged: StatusBucket = _bucket()
+    not_staged: StatusBucket = _bucket()
+    untracked: StatusBucket = _bucket()
+    unmerged: StatusBucket = _bucket()
+
+    @property
+    def has_changes(self) -> bool:
+        """True if there is anything to commit or add."""
+        return bool(
+            self.staged or self.not_staged or self.untracked or self.unmerged
+        )
+
+    def changed_paths(self) -> list[str]:
+        """Every stored path with a change, staged or not."""
+        return [
+            *self.staged,
+            *self.unmerged,
+            *self.not_staged,
+            *self.untracked,
+        ]
+
+
+def parse_records(records: Iterable[bytes]) -> RepoState:
+    """
+    Classifies `git status --porcelain=v2 --branch -z` records on the fly.
+
+    Parameters
+    ----------
+    records : Iterable[bytes]
+    Status records, without their NUL separators.
+
+    Returns
+    -------
+    RepoState
+    Branch information and classified paths.
+    """
+    state = RepoState()
+    records = iter(records)
+    for raw in records:
+        record = raw.decode('utf-8', 'surrogateescape')
+        kind = record[:1]
+        if kind == '#':
+            _parse_header(state, record)
+        elif kind in {'1', '2'}:
+            fields = record.split(' ', 8 if kind == '1' else 9)
+            xy, path = fields[1], fields[-1]
+            if kind == '2':
+                next(records, None)  # original path of the rename/copy
+            if xy[0] != '.':
+                state.staged.append(path)
+            if xy[1] != '.':
+                state.not_staged.append(path)
+        elif kind == 'u':
+            state.unmerged.append(record.split(' ', 10)[-1])
+        elif kind == '?':
+            state.untracked.append(record[2:])
+    return state
+
+
+def parse_status(output: str) -> RepoState:
+    """Parses the complete output of `git status --porcelain=v2 -z`."""
+    return parse_records(
+        record.encode('utf-8', 'surrogateescape')
+        for record in output.split('\0')
+        if record
+    )
+
+
+def _parse_header(state: RepoState, record: str) -> None:
+    _hash, key, value = record.split(' ', 2)
+    if key == 'branch.oid':
+        state.oid = None if value == '(initial)' else value
+    elif key == 'branch.head':
+        state.branch = None if value == '(detached)' else value
+    elif key == 'branch.upstream':
+        state.upstream = value
+    elif key == 'branch.ab':
+        ahead, behind = value.split()
+        state.ahead, state.behind = int(ahead), -int(behind)
+
+
+def read_repo_state() -> RepoState:
+    """
+    Takes a snapshot of the current repository, parsing `git status` while
+    it is still running.
+
+    ------
+    subprocess.CalledProcessError
+    If `git status` fails.
+    """
+    process = subprocess.Popen(
+        STATUS_COMMAND, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        state = parse_records(iter_nul_records(process.stdout))
+        stderr = process.stderr.read()
+        if process.wait():
+            raise subprocess.CalledProcessError(
+                process.returncode,
+                STATUS_COMMAND,
+                stderr=stderr.decode('utf-8', 'replace'),
+            )
+        return state
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
@@ -0,0 +1,268 @@
+"""
+Opt-in tracing of the subprocesses task_commit runs.
+
+Once `enable` is called, every process started through `subprocess`
+(`run`, `check_output` and `Popen` alike) is recorded with its argv,
+duration, exit status and bytes of output. At exit the calls are written
+as Chrome trace events, loadable in chrome://tracing or
+https://ui.perfetto.dev, and a summary table is printed to stderr.
+"""
+
+import atexit
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Trace file used when none is given on the command line
+TRACE_ENV = 'TASK_COMMIT_TRACE'
+# Options of `git` taking a separate value, skipped to name the command
+GIT_VALUE_OPTIONS = {'-C', '-c', '--git-dir', '--work-tree', '--namespace'}
+
+_Popen = subprocess.Popen
+_lock = threading.Lock()
+_events: list[dict] = []
+_running: set['TracedPopen'] = set()
+_trace_path: str | None = None
+
+
+def command_name(argv: list[str]) -> str:
+    """Names a command after its program and subcommand ("git status")."""
+    name = os.path.basename(argv[0]) if argv else '?'
+    skip = False
+    for arg in argv[1:]:
+        if skip:
+            skip = False
+        elif arg in GIT_VALUE_OPTIONS:
+            skip = True
+        elif not arg.startswith('-'):
+            return f'{name} {arg}'
+    return name
+
+
+class _CountingReader:
+    """Pipe proxy counting the bytes (or characters) read through it."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.count = 0
+
+    def read(self, *args):
+        data = self._stream.read(*args)
+        self.count += len(data)
+        return data
+
+    def readline(self, *args):
+        line = self._stream.readline(*args)
+        self.count += len(line)
+        return line
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self._stream)
+        self.count += len(line)
+        return line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stream.close()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class TracedPopen(_Popen):
+    """`subprocess.Popen` recording a trace event when the process ends."""
+
+    def __init__(self, args, *popen_args, **kwargs):
+        self._trace_start = time.perf_counter()
+        self._trace_thread = threading.get_ident()
+        self._trace_recorded = False
+        self._trace_deferred = False
+        super().__init__(args, *popen_args, **kwargs)
+        if self.stdout is not None:
+            self.stdout = _CountingReader(self.stdout)
+        with _lock:
+            _running.add(self)
+
+    @property
+    def output_size(self) -> int:
+        """Bytes of output read from the process so far."""
+        stdout = self.stdout
+        return stdout.count if isinstance(stdout, _CountingReader) else 0
+
+    def communicate(self, *args, **kwargs):
+        before = self.output_size
+        # communicate waits for the process: record once the output is known
+        self._trace_deferred = True
+        try:
+            stdout, stderr = super().communicate(*args, **kwargs)
+        finally:
+            self._trace_deferred = False
+        # communicate may read the pipe by file descriptor, bypassing the
+        # proxy: its result is the output
+        if isinstance(self.stdout, _CountingReader):
+            self.stdout.count = before + len(stdout or b'')
+        self._trace_end()
+        return stdout, stderr
+
+    def wait(self, *args, **kwargs):
+        returncode = super().wait(*args, **kwargs)
+        self._trace_end()
+        return returncode
+
+    def poll(self):
+        returncode = super().poll()
+        if returncode is not None:
+            self._trace_end()
+        return returncode
+
+    def _trace_end(self, end: float | None = None) -> None:
+        with _lock:
+            if self._trace_recorded or self._trace_deferred:
+                return
+            self._trace_recorded = True
+            _running.discard(self)
+        end = time.perf_counter() if end is None else end
+        _record(self, end)
+
+
+def _record(process: TracedPopen, end: float) -> None:
+    args = process.args
+    argv = (
+        [os.fsdecode(arg) for arg in args]
+        if isinstance(args, list | tuple)
+        else [os.fsdecode(args)]
+    )
+    event = {
+        'name': command_name(argv),
+        'cat': 'subprocess',
+        'ph': 'X',
+        'ts': round(process._trace_start * 1e6),
+        'dur': round((end - process._trace_start) * 1e6),
+        'pid': os.getpid(),
+        'tid': process._trace_thread,
+        'args': {
+            'argv': argv,
+            'returncode': process.returncode,
+            'output_bytes': process.output_size,
+        },
+    }
+    with _lock:
+        _events.append(event)
+
+
+def get_events() -> list[dict]:
+    """Gets the trace events recorded so far, in start order."""
+    with _lock:
+        return sorted(_events, key=lambda event: event['ts'])
+
+
+def format_summary(events: list[dict]) -> str:
+    """
+    Formats a table of the traced commands, the slowest first.
+
+    Returns
+    -------
+    str
+    One row per command name with its call count, total and longest
+    duration and bytes of output.
+    """
+    totals: dict[str, list[int]] = {}
+    for event in events:
+        calls, total, longest, size = totals.setdefault(
+            event['name'], [0, 0, 0, 0]
+        )
+        totals[event['name']] = [
+            calls + 1,
+            total + event['dur'],
+            max(longest, event['dur']),
+            size + event['args']['output_bytes'],
+        ]
+    width = max(map(len, totals), default=7)
+    lines = [
+        f'{"command":<{width}}  {"calls":>5}  {"total ms":>9}  '
+        f'{"max ms":>9}  {"bytes":>10}'
+    ]
+    for name, (calls, total, longest, size) in sorted(
+        totals.items(), key=lambda item: -item[1][1]
+    ):
+        lines.append(
+            f'{name:<{width}}  {calls:>5}  {total / 1e3:>9.1f}  '
+            f'{longest / 1e3:>9.1f}  {size:>10}'
+        )
+    return '\n'.join(lines)
+
+
+def flush() -> None:
+    """
+    Writes the trace file and prints the summary table.
+
+    Processes still running (e.g. helpers closed after this runs) are
+    recorded up to now, without an exit status.
+    """
+    now = time.perf_counter()
+    with _lock:
+        running = list(_running)
+    for process in running:
+        process._trace_end(now)
+    events = get_events()
+    if _trace_path:
+        import json  # noqa: PLC0415
+
+        from .cache import write_atomic  # noqa: PLC0415
+
+        write_atomic(
+            os.path.abspath(_trace_path),
+            json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}),
+        )
+    if events:
+        print(format_summary(events), file=sys.stderr)
+
+
+def enable(path: str | None = None) -> None:
+    """
+    Starts tracing every subprocess, until the process exits.
+
+    Parameters
+    ----------
+    path : str or None
+    Trace file to write at exit, None for the summary table only.
+    """
+    global _trace_path  # noqa: PLW0603
+
+    _trace_path = path
+    if subprocess.Popen is not TracedPopen:
+        subprocess.Popen = TracedPopen
+        atexit.register(flush)
+
+
+def enable_from_env(path: str | None = None) -> None:
+    """
+    Starts tracing to `path`, or to the file named by $TASK_COMMIT_TRACE.
+
+    Called first by every entry point (the `task_commit` script, the
+    daemon and its hook fallback, the server hooks); nothing is traced
+    when neither is set.
+    """
+    path = path or os.getenv(TRACE_ENV)
+    if path:
+        enable(path)
+
+
+def disable() -> None:
+    """Stops tracing and forgets the recorded events."""
+    global _trace_path  # noqa: PLW0603
+
+    if subprocess.Popen is TracedPopen:
+        subprocess.Popen = _Popen
+        atexit.unregister(flush)
+    _trace_path = None
+    with _lock:
+        _events.clear()
+        _running.clear()
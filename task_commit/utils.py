@@ -1,32 +1,14 @@
-import gettext
 import os
 import re
 import subprocess
 
+from .backend import get_backend
+from .facts import load_facts
+from .i18n import _, get_translator  # noqa: F401
 
-def get_translator(domain='messages', locale_dir=None, lang=None):
-    if locale_dir is None:
-        locale_dir = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            'locale',
-        )
-    if lang is None:
-        lang = os.getenv('LANG', 'en').split('.')[0]  # Get system language
-
-    try:
-        translation = gettext.translation(
-            domain,
-            localedir=locale_dir,
-            languages=[lang],
-        )
-        translation.install()
-        return translation.gettext  # Returns the translation function `_()`
-    except FileNotFoundError:
-        return lambda s: s  # If no translation is found, return original text
-    # If no translation is found, return original text
-
-
-_ = get_translator()
+# Paths listed per status bucket before switching to a summary
+STATUS_DISPLAY_LIMIT = 50
+STATUS_DIRECTORY_LIMIT = 10
 
 
 def color_text(text, color) -> str:
@@ -70,9 +52,7 @@ def get_git_user() -> str:
     message: str = ''
     try:
         message = _('Git user is required')
-        username = subprocess.check_output(
-            ['git', 'config', 'user.name'], text=True
-        ).strip()
+        username = load_facts().user
         if not username:
             raise ValueError(f'{message}')
         return username
@@ -92,10 +72,7 @@ def check_git_status() -> bool:
     True if there are changes in the repository, False otherwise.
     """
     try:
-        status = subprocess.check_output(
-            ['git', 'status', '--porcelain'], text=True
-        ).strip()
-        return bool(status)
+        return get_backend().status().has_changes
     except subprocess.CalledProcessError as e:
         message: str = _(
             'Error checking Git status'
@@ -104,6 +81,23 @@ def check_git_status() -> bool:
         return False
 
 
+def has_staged_changes() -> bool:
+    """
+    Checks for staged changes, reading only the index.
+
+    Returns
+    -------
+    bool
+    True if the next commit would not be empty, False otherwise.
+    """
+    try:
+        return bool(get_backend().staged())
+    except subprocess.CalledProcessError as e:
+        message = _('Error checking Git status')
+        print(color_text(f'❌ {message}: {e}', 'red'))
+        return False
+
+
 def get_git_status() -> str | None:
     """
     Gets the status of the Git repository.
@@ -116,68 +110,79 @@ def get_git_status() -> str | None:
     """
     message: str = ''
     try:
-        output = subprocess.check_output(
-            ['git', 'status', '--porcelain'],
-            text=True,
-        ).strip()
-
-        # if not output:
-        #     return color_text("✔ No changes detected", "green")
-
-        changes_not_staged = []
-        changes_staged = []
-        untracked_files = []
-
-        # Process each line of output
-        for line in output.split('\n'):
-            status_code, file_path = line[:2].strip(), line[2:].strip()
-
-            if status_code in {
-                'M',
-                'A',
-                'D',
-                'R',
-            }:  # Modified, Added, Deleted, Renamed (Staged)  # noqa: E501
-                changes_staged.append(f'{file_path}')
-            elif status_code in {
-                ' M',
-                ' D',
-            }:  # Modified or deleted (Not Staged)  # noqa: E501
-                changes_not_staged.append(f'{file_path}')
-            elif status_code == '??':  # Untracked files
-                untracked_files.append(f'{file_path}')
-
-        # Format the output
-        result = []
-        if changes_not_staged:
-            message = _('Changes not staged')
-            result.append(color_text(f'📋 {message}:', 'yellow'))
-            result.extend(
-                color_text(f'   🎯 {item}', 'yellow')
-                for item in changes_not_staged
-            )
-            result.append('')
-        if changes_staged:
-            message = _('Changes staged')
-            result.append(color_text(f'📝 {message}:', 'green'))
-            result.extend(
-                color_text(f'   🎯 {item}', 'green') for item in changes_staged
-            )
-            result.append('')
-        if untracked_files:
-            message = _('Untracked files')
-            result.append(color_text(f'❌ {message}:', 'red'))
-            result.extend(
-                color_text(f'   🎯 {item}', 'red') for item in untracked_files
-            )
-            result.append('')
-
-        return '\n'.join(result)
-
+        state = get_backend().status()
     except subprocess.CalledProcessError as e:
         message = _('Error checking Git status')
         return color_text(f'❌ {message}: {e}', 'red')
 
+    # Format the output
+    result = []
+    if state.unmerged:
+        message = _('Unmerged paths')
+        result.extend(
+            format_status_bucket(f'⚠️ {message}:', state.unmerged, 'red')
+        )
+    if state.not_staged:
+        message = _('Changes not staged')
+        result.extend(
+            format_status_bucket(f'📋 {message}:', state.not_staged, 'yellow')
+        )
+    if state.staged:
+        message = _('Changes staged')
+        result.extend(
+            format_status_bucket(f'📝 {message}:', state.staged, 'green')
+        )
+    if state.untracked:
+        message = _('Untracked files')
+        result.extend(
+            format_status_bucket(f'❌ {message}:', state.untracked, 'red')
+        )
+
+    return '\n'.join(result)
+
+
+def format_status_bucket(
+    title: str, bucket, color: str, limit: int = STATUS_DISPLAY_LIMIT
+) -> list[str]:
+    """
+    Formats the paths of a status bucket.
+
+    Large buckets are summarized: only the first `limit` paths are listed,
+    followed by the number of hidden paths and the directories with the
+    most changes.
+
+    Parameters
+    ----------
+    title : str
+    Heading of the bucket.
+    bucket : StatusBucket
+    Paths to list.
+    color : str
+    Color of the lines (see `color_text`).
+    limit : int
+    Maximum number of paths listed.
+
+    Returns
+    -------
+    list[str]
+    Colored lines, ending with an empty line.
+    """
+    lines = [color_text(title, color)]
+    lines.extend(color_text(f'   🎯 {item}', color) for item in bucket[:limit])
+    if bucket.total > limit:
+        message: str = _('more')
+        lines.append(
+            color_text(f'   ➕ {bucket.total - limit} {message}', color)
+        )
+        lines.extend(
+            color_text(f'   📁 {directory} ({count})', color)
+            for directory, count in bucket.directories.most_common(
+                STATUS_DIRECTORY_LIMIT
+            )
+        )
+    lines.append('')
+    return lines
+
 
 def is_git_flow():
     """
@@ -189,8 +194,7 @@ def is_git_flow():
     True if the repository uses Git Flow, False otherwise.
     """
     try:
-        subprocess.check_output(['git', 'flow', 'config'], text=True)
-        return True
+        return load_facts().git_flow
     except subprocess.CalledProcessError as e:
         message: str = _('Gitflow not installed, but push is successful')
         print(color_text(f'❌ {message}: {e}', 'red'))
@@ -207,18 +211,23 @@ def get_current_branch():
     Name of the current branch if found, otherwise None.
     """
     try:
-        return subprocess.check_output(
-            ['git', 'rev-parse', '--abbrev-ref', 'HEAD'], text=True
-        ).strip()
+        return get_backend().head()
     except subprocess.CalledProcessError as e:
         message: str = _('Error getting current branch')
         print(color_text(f'❌ {message}: {e}', 'red'))
         return None
 
 
-def add_changes():
+def add_changes(paths=None):
     """
-    Add all changes from the Git repository.
+    Add changes from the Git repository.
+
+    Parameters
+    ----------
+    paths : Iterable[str] or None
+    Files or directories to stage. All changes are added when None. The
+    paths are passed to `git add` through stdin, so there is no limit to
+    how many can be staged at once.
 
     ------
     subprocess.CalledProcessError
@@ -226,8 +235,12 @@ def add_changes():
     """
     message: str = ''
     try:
-        subprocess.run(['git', 'add', '.'], check=True)
-        message = _('All changes added')
+        if paths is None:
+            get_backend().run(['add', '.'], check=True)
+            message = _('All changes added')
+        else:
+            stage_paths(paths)
+            message = _('Selected changes added')
         print(color_text(f'✔️ {message}.', 'green'))
     except subprocess.CalledProcessError as e:
         message = _('Error adding changes')
@@ -235,6 +248,33 @@ def add_changes():
         raise
 
 
+def stage_paths(paths) -> None:
+    """
+    Stages the given files or directories (including deletions) with a
+    single `git add --pathspec-from-file`, which reads the NUL separated
+    paths from stdin instead of the command line.
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+    Paths relative to the root of the repository.
+
+    ------
+    subprocess.CalledProcessError
+    If `git add` fails.
+    """
+    pathspec = b''.join(
+        os.fsencode(f':(top,literal){path}') + b'\0' for path in paths
+    )
+    if not pathspec:
+        return
+    get_backend().run(
+        ['add', '--pathspec-from-file=-', '--pathspec-file-nul'],
+        input=pathspec,
+        check=True,
+    )
+
+
 def create_commit(commit_type, module, commit_message, git_user):
     """
     Performs a commit to the Git repository with the specified type,
@@ -260,9 +300,7 @@ def create_commit(commit_type, module, commit_message, git_user):
     full_commit_message = f'{commit_type}({module}): {commit_message}'
     updated_commit_message = f'{full_commit_message} (👤: {git_user})'.lower()
     try:
-        subprocess.run(
-            ['git', 'commit', '-m', updated_commit_message], check=True
-        )
+        get_backend().run(['commit', '-m', updated_commit_message], check=True)
         message = _('Commit successful')
         print(color_text(f'✅ {message}!\n', 'green'))
     except subprocess.CalledProcessError as e:
@@ -271,7 +309,7 @@ def create_commit(commit_type, module, commit_message, git_user):
         raise
 
 
-def handle_git_flow(branch):
+def handle_git_flow(branch, kind=None):
     """
     Manages the Git Flow workflow for the specified branch.
 
@@ -280,6 +318,9 @@ def handle_git_flow(branch):
     branch : str
     Name of the branch in "type/name" format that you want to publish
     or finish.
+    kind : str or None
+    Git Flow kind of the branch ("feature", "hotfix" or "release"),
+    defaults to the part of the name before the first slash.
 
     Prompts the user for the desired action ('publish' or 'finish') for the
     given branch and executes the appropriate Git Flow command.
@@ -301,19 +342,16 @@ def handle_git_flow(branch):
         .strip()
         .lower()
     )
+    kind = kind or branch.split('/')[0]
     if action == 'publish':
         try:
-            subprocess.run(
-                ['git', 'flow', branch.split('/')[0], 'publish'], check=True
-            )
+            get_backend().run(['flow', kind, 'publish'], check=True)
         except subprocess.CalledProcessError as e:
             message: str = _('Error publishing branch')
             print(color_text(f'❌ {message}: {e}', 'red'))
     elif action == 'finish':
         try:
-            subprocess.run(
-                ['git', 'flow', branch.split('/')[0], 'finish'], check=True
-            )
+            get_backend().run(['flow', kind, 'finish'], check=True)
         except subprocess.CalledProcessError as e:
             message: str = _('Error finalizing branch')
             print(color_text(f'❌ {message}: {e}', 'red'))
@@ -324,22 +362,36 @@ def handle_git_flow(branch):
 
 def execute_push(branch):
     """
-    Pushes the current branch to the remote repository.
+    Pushes the current branch to the remote repositories.
+
+    The branch is pushed concurrently to every remote listed in the
+    `task-commit.pushRemote` git config (default: origin), retrying
+    network errors, and the progress and latency of each push is printed.
 
     Parameters
     ----------
     branch : str
     Name of the branch you want to push.
 
-    ------
-    subprocess.CalledProcessError
-    If there is an error during the push.
+    Returns
+    -------
+    bool
+    True if every push succeeded.
     """
+    from .push import (  # noqa: PLC0415
+        get_push_remotes,
+        print_progress,
+        push_all,
+        report,
+    )
+
     try:
-        subprocess.run(['git', 'push', 'origin', branch], check=True)
+        remotes = get_push_remotes()
     except subprocess.CalledProcessError as e:
         message: str = _('Error when pushing')
         print(color_text(f'❌ {message}: {e}', 'red'))
+        return False
+    return report(push_all(remotes, branch, on_progress=print_progress))
 
 
 def remove_excess_spaces(text: str) -> str:
@@ -0,0 +1,151 @@
+"""
+Micro-benchmark helpers: timing, stored baselines and regression report.
+
+Benchmarks only run with TASK_COMMIT_BENCHMARK set:
+
+- ``TASK_COMMIT_BENCHMARK=1`` compares every timing with its baseline and
+  fails the benchmarks slower than TASK_COMMIT_BENCHMARK_TOLERANCE times
+  (2 by default) their baseline;
+- ``TASK_COMMIT_BENCHMARK=update`` stores the timings as the new baselines
+  in test/benchmarks.json.
+
+Either way a report comparing the timings with the baselines is printed
+at the end of the session. Timings are compared relative to a calibration
+loop timed in the same session, so baselines stored on one machine remain
+meaningful on a faster or slower one.
+"""
+
+import functools
+import json
+import os
+import time
+from collections.abc import Callable
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'benchmarks.json')
+MODE = os.getenv('TASK_COMMIT_BENCHMARK', '')
+TOLERANCE = float(os.getenv('TASK_COMMIT_BENCHMARK_TOLERANCE', '2'))
+# Baseline entry holding the calibration loop timing
+CALIBRATION = 'calibration'
+
+# Seconds per operation of every benchmark run in this session
+results: dict[str, float] = {}
+
+
+def measure(func: Callable[[], object], number: int = 1, repeat: int = 5):
+    """
+    Times `func`, keeping the best of `repeat` rounds of `number` calls.
+
+    Returns
+    -------
+    float
+    Seconds per call.
+    """
+    best = float('inf')
+    for _round in range(repeat):
+        start = time.perf_counter()
+        for _call in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def _calibration_loop() -> int:
+    total = 0
+    for index in range(100_000):
+        total += index % 7
+    return total
+
+
+@functools.cache
+def calibrate() -> float:
+    """Times the reference loop the other timings are scaled by."""
+    return measure(_calibration_loop, repeat=20)
+
+
+def load_baselines() -> dict[str, float]:
+    """Loads the stored baselines (seconds per operation)."""
+    try:
+        with open(BASELINE_FILE, encoding='utf-8') as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(timings: dict[str, float]) -> None:
+    """Stores timings as baselines, keeping the ones not measured."""
+    baselines = {
+        **scale(load_baselines()),
+        **timings,
+        CALIBRATION: calibrate(),
+    }
+    with open(BASELINE_FILE, 'w', encoding='utf-8') as baseline_file:
+        json.dump(dict(sorted(baselines.items())), baseline_file, indent=2)
+        baseline_file.write('\n')
+
+
+def scale(baselines: dict[str, float]) -> dict[str, float]:
+    """
+    Converts baselines to the speed of this machine, using the calibration
+    loop timed when they were stored.
+    """
+    stored = baselines.get(CALIBRATION)
+    factor = calibrate() / stored if stored else 1.0
+    return {
+        name: seconds * factor
+        for name, seconds in baselines.items()
+        if name != CALIBRATION
+    }
+
+
+def is_regression(name: str, seconds: float, baselines: dict) -> bool:
+    """True if a timing is slower than its baseline beyond the tolerance."""
+    baseline = baselines.get(name)
+    return baseline is not None and seconds > baseline * TOLERANCE
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Records a timing and fails the benchmark if it regressed.
+
+    ------
+    AssertionError
+    If the timing is slower than its baseline times TOLERANCE.
+    """
+    results[name] = seconds
+    if MODE == 'update':
+        return
+    baselines = scale(load_baselines())
+    assert not is_regression(name, seconds, baselines), (
+        f'{name}: {format_time(seconds)} per op, baseline is '
+        f'{format_time(baselines[name])} (tolerance {TOLERANCE}x)'
+    )
+
+
+def format_time(seconds: float) -> str:
+    """Formats a duration with a unit suited to its magnitude."""
+    for unit, factor in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds * factor >= 1:
+            return f'{seconds * factor:.2f} {unit}'
+    return f'{seconds * 1e9:.1f} ns'
+
+
+def report(timings: dict[str, float], baselines: dict[str, float]) -> str:
+    """Formats the comparison of timings with their baselines."""
+    width = max(map(len, timings), default=0)
+    lines = [
+        f'{"benchmark":<{width}}  {"baseline":>10}  {"current":>10}  ratio',
+    ]
+    for name, seconds in timings.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            ratio = 'new'
+        else:
+            ratio = f'{seconds / baseline:.2f}x'
+            if is_regression(name, seconds, baselines):
+                ratio += '  REGRESSION'
+        lines.append(
+            f'{name:<{width}}  '
+            f'{format_time(baseline) if baseline else "-":>10}  '
+            f'{format_time(seconds):>10}  {ratio}'
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,77 @@
+import subprocess
+
+import pytest
+
+from task_commit.backend import reset_backend
+
+
+def git(repo, *args, **kwargs):
+    return subprocess.run(
+        ['git', *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+        **kwargs,
+    ).stdout
+
+
+@pytest.fixture(autouse=True)
+def _fresh_backend():
+    """Every test starts without facts cached by a previous one."""
+    reset_backend()
+    yield
+    reset_backend()
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """Empty Git repository used as the working directory of the test."""
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    git(repo, 'init', '-q', '-b', 'main')
+    git(repo, 'config', 'user.name', 'testuser')
+    git(repo, 'config', 'user.email', 'testuser@example.com')
+    git(repo, 'config', 'commit.gpgsign', 'false')
+    monkeypatch.chdir(repo)
+    return repo
+
+
+def make_commits(repo, messages):
+    """Creates one empty commit per message and returns their SHAs."""
+    shas = []
+    for message in messages:
+        git(repo, 'commit', '-q', '--allow-empty', '-m', message)
+        shas.append(git(repo, 'rev-parse', 'HEAD').strip())
+    return shas
+
+
+@pytest.fixture
+def remote_repo(git_repo, tmp_path):
+    """Bare repository set as the `origin` upstream of `git_repo`."""
+    remote = tmp_path / 'remote.git'
+    git(tmp_path, 'init', '-q', '--bare', '-b', 'main', str(remote))
+    make_commits(git_repo, ['feat: initial commit'])
+    git(git_repo, 'remote', 'add', 'origin', str(remote))
+    git(git_repo, 'push', '-q', '-u', 'origin', 'main')
+    return remote
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Prints the benchmark report, storing the baselines if asked to."""
+    from .benchmark import (  # noqa: PLC0415
+        MODE,
+        load_baselines,
+        report,
+        results,
+        save_baselines,
+        scale,
+    )
+
+    if not results:
+        return
+    terminalreporter.section('benchmarks')
+    terminalreporter.write_line(report(results, scale(load_baselines())))
+    if MODE == 'update':
+        save_baselines(results)
+        terminalreporter.write_line('Baselines stored')
@@ -0,0 +1,48 @@
+from task_commit.backend import GitBackend
+
+from .conftest import git, make_commits
+
+
+def test_config_is_read_once(mocker):
+    # Subprocess fallback of the repository file reader
+    mocker.patch('task_commit.backend.READ_GIT_FILES', False)
+    check_output = mocker.patch(
+        'subprocess.check_output',
+        return_value='user.name\ntestuser\0remote.origin.url\na\0'
+        'remote.origin.url\nb\0Branch.Feature/X.remote\norigin\0',
+    )
+    backend = GitBackend()
+
+    assert backend.config('user.name') == 'testuser'
+    assert backend.config('remote.origin.url') == 'b'
+    assert backend.config_values('remote.origin.url') == ['a', 'b']
+    assert backend.config('branch.Feature/X.REMOTE') == 'origin'
+    assert backend.config('missing.key', 'default') == 'default'
+    check_output.assert_called_once()
+
+
+def test_cat_file_and_invalidation(git_repo):
+    (sha,) = make_commits(git_repo, ['feat: initial commit\n\nbody'])
+    backend = GitBackend()
+
+    assert backend.head() == 'main'
+    assert backend.cat_file(sha) == (
+        'commit',
+        git(git_repo, 'cat-file', 'commit', sha).encode(),
+    )
+    assert backend.cat_file('HEAD^{tree}')[0] == 'tree'
+    assert backend.cat_file('does-not-exist') is None
+    cat_file = backend._cat_file
+
+    backend.run(['checkout', '-q', '-b', 'feature/x'], check=True)
+    assert backend.head() == 'feature/x'
+    backend.run(['commit', '-q', '--allow-empty', '-m', 'next'], check=True)
+    assert backend.cat_file('HEAD')[1].endswith(b'\n\nnext\n')
+    assert backend._cat_file is cat_file
+
+    assert backend.config('user.name') == 'testuser'
+    git(git_repo, 'config', 'user.name', 'other')
+    assert backend.config('user.name') == 'testuser'
+    backend.run(['config', 'user.name', 'another'], check=True)
+    assert backend.config('user.name') == 'another'
+    backend.close()
@@ -0,0 +1,110 @@
+import gettext
+import io
+import re
+
+import pytest
+
+from task_commit import backend
+from task_commit.i18n import load_translator
+from task_commit.init import COMMIT_REGEX
+from task_commit.lint import Validator
+from task_commit.status import iter_nul_records, parse_records
+from task_commit.utils import color_text, get_git_status
+
+from .benchmark import MODE, measure, record
+
+pytestmark = pytest.mark.skipif(
+    not MODE, reason='benchmarks run with TASK_COMMIT_BENCHMARK set'
+)
+
+OID = 'a' * 40
+STATUS_SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+MESSAGES = [
+    'feat(api): add the endpoint',
+    'fix: handle empty responses',
+    'refactor(core)!: drop the legacy path',
+    'short free-form header',
+    'Merge branch main',
+    'u' * 80,
+    'chore(deps): ' + 'x' * 70,
+    'docs: ',
+] * 1_250
+
+
+def status_output(entries: int) -> bytes:
+    """
+    Porcelain v2 output of a large working tree: one modified file every
+    ten entries, untracked files otherwise.
+    """
+    records = [f'# branch.oid {OID}', '# branch.head main']
+    for index in range(entries):
+        path = f'dir{index % 100}/file{index}.py'
+        if index % 10:
+            records.append(f'? {path}')
+        else:
+            records.append(
+                f'1 .M N... 100644 100644 100644 {OID} {OID} {path}'
+            )
+    return '\0'.join(records).encode() + b'\0'
+
+
+@pytest.mark.parametrize('size', STATUS_SIZES)
+def test_parse_status(size):
+    output = status_output(STATUS_SIZES[size])
+    seconds = measure(
+        lambda: parse_records(iter_nul_records(io.BytesIO(output))),
+        repeat=1 if size == '1m' else 5,
+    )
+
+    record(f'parse_status[{size}]', seconds)
+
+
+@pytest.mark.parametrize('size', STATUS_SIZES)
+def test_get_git_status(size, monkeypatch):
+    output = status_output(STATUS_SIZES[size])
+    monkeypatch.setattr(
+        backend,
+        'read_repo_state',
+        lambda: parse_records(iter_nul_records(io.BytesIO(output))),
+    )
+
+    def status():
+        backend.get_backend().invalidate()
+        return get_git_status()
+
+    seconds = measure(status, repeat=1 if size == '1m' else 5)
+
+    record(f'get_git_status[{size}]', seconds)
+
+
+def test_validate_messages():
+    validator = Validator()
+    seconds = measure(lambda: [validator.validate(m) for m in MESSAGES])
+
+    record('validate[10k]', seconds)
+
+
+def test_commit_regex():
+    pattern = re.compile(COMMIT_REGEX)
+    seconds = measure(lambda: [pattern.match(m) for m in MESSAGES])
+
+    record('commit_regex[10k]', seconds)
+
+
+def test_color_text():
+    texts = [f'📋 path/to/file{index}.py' for index in range(10_000)]
+    seconds = measure(lambda: [color_text(t, 'yellow') for t in texts])
+
+    record('color_text[10k]', seconds)
+
+
+@pytest.mark.parametrize('lang', ['es', 'pt_BR'])
+def test_load_translator(lang):
+    def load():
+        # Loading a catalog again is served from the gettext cache
+        gettext._translations.clear()
+        return load_translator(lang=lang)
+
+    seconds = measure(load, number=100)
+
+    record(f'load_translator[{lang}]', seconds)
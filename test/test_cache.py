@@ -0,0 +1,76 @@
+from task_commit import cache as cache_module
+from task_commit import lint
+from task_commit.cache import LintCache
+
+from .conftest import make_commits
+
+
+def test_lint_cache_round_trip(tmp_path):
+    path = str(tmp_path / 'lint-cache')
+    cache = LintCache(path, 'rules-a')
+    cache.put('a' * 40, None)
+    cache.put('b' * 40, ('Invalid commit message', 'bad\tsubject'))
+    cache.save()
+
+    cache = LintCache(path, 'rules-a')
+    assert len(cache) == 2  # noqa: PLR2004
+    assert cache.get('a' * 40) is None
+    assert cache.get('b' * 40) == ('Invalid commit message', 'bad\tsubject')
+
+    assert not len(LintCache(path, 'rules-b'))
+
+
+def test_lint_cache_keeps_carriage_returns(tmp_path):
+    path = str(tmp_path / 'lint-cache')
+    cache = LintCache(path, 'rules')
+    cache.put('a' * 40, ('Invalid commit message', 'bad\rsubject'))
+    cache.put('b' * 40, None)
+    cache.save()
+
+    cache = LintCache(path, 'rules')
+    assert cache.get('a' * 40) == ('Invalid commit message', 'bad\rsubject')
+    assert 'b' * 40 in cache
+
+
+def test_lint_cache_hits_do_not_rewrite_it(tmp_path, mocker):
+    path = str(tmp_path / 'lint-cache')
+    cache = LintCache(path, 'rules')
+    cache.put('a', None)
+    cache.save()
+    write = mocker.spy(cache_module, 'write_atomic')
+
+    cache = LintCache(path, 'rules')
+    cache.get('a')
+    cache.save()
+    write.assert_not_called()
+
+
+def test_lint_cache_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / 'lint-cache')
+    cache = LintCache(path, 'rules', max_entries=2)
+    for sha in ('a', 'b', 'c'):
+        cache.put(sha, None)
+    cache.get('a')
+    cache.save()
+
+    cache = LintCache(path, 'rules')
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+
+
+def test_run_lint_only_reads_new_commits(git_repo, mocker):
+    make_commits(git_repo, ['feat: initial commit', 'u' * 80])
+    read_messages = mocker.spy(lint, 'read_messages')
+
+    assert lint.run_lint('HEAD') == 1
+    assert len(read_messages.call_args.args[0]) == 2  # noqa: PLR2004
+
+    (new,) = make_commits(git_repo, ['fix: new commit'])
+    read_messages.reset_mock()
+    assert lint.run_lint('HEAD') == 1
+    assert read_messages.call_args.args[0] == [new]
+
+    read_messages.reset_mock()
+    assert lint.run_lint('HEAD') == 1
+    read_messages.assert_not_called()
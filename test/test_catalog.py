@@ -0,0 +1,150 @@
+import gettext
+import io
+import shutil
+
+import pytest
+
+from task_commit.catalog import (
+    CatalogError,
+    compile_catalogs,
+    compile_mo,
+    find_catalogs,
+    parse_po,
+)
+from task_commit.i18n import LOCALE_DIR
+
+PO = r"""# Translator comment
+#, fuzzy
+msgid ""
+msgstr ""
+"POT-Creation-Date: 2025-05-26 09:41-0300\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\n"
+
+#: core.py:1
+msgid "Commit"
+msgstr "Confirmar"
+
+msgid ""
+"Multi "
+"line"
+msgstr "Várias \"linhas\"\tcom\\escapes"
+
+msgctxt "menu"
+msgid "Commit"
+msgstr "Enviar"
+
+msgid "one file"
+msgid_plural "%d files"
+msgstr[0] "um arquivo"
+msgstr[1] "%d arquivos"
+
+#, fuzzy, python-format
+msgid "Fuzzy"
+msgstr "Incerto"
+
+msgid "Untranslated"
+msgstr ""
+
+#~ msgid "Obsolete"
+#~ msgstr "Obsoleto"
+"""
+
+
+def load(messages):
+    return gettext.GNUTranslations(io.BytesIO(compile_mo(messages)))
+
+
+@pytest.mark.parametrize('language', ['es', 'pt_BR'])
+def test_matches_msgfmt(language):
+    catalog = f'{LOCALE_DIR}/{language}/LC_MESSAGES/messages'
+    with open(f'{catalog}.po', encoding='utf-8') as po_file:
+        messages = parse_po(po_file.read())
+    with open(f'{catalog}.mo', 'rb') as mo_file:
+        assert compile_mo(messages) == mo_file.read()
+
+
+def test_parse_po():
+    messages = parse_po(PO)
+
+    assert set(messages) == {
+        '',
+        'Commit',
+        'Multi line',
+        'menu\x04Commit',
+        'one file\0%d files',
+    }
+    assert 'POT-Creation-Date' in messages['']
+
+    translation = load(messages)
+    assert 'POT-Creation-Date' not in translation.gettext('')
+    assert translation.gettext('Commit') == 'Confirmar'
+    assert translation.gettext('Multi line') == 'Várias "linhas"\tcom\\escapes'
+    assert translation.pgettext('menu', 'Commit') == 'Enviar'
+    assert translation.ngettext('one file', '%d files', 2) == '%d arquivos'
+    assert translation.gettext('Fuzzy') == 'Fuzzy'
+
+
+@pytest.mark.parametrize(
+    ('text', 'line'),
+    [
+        ('msgid "a"\nmsgstr "b"\nmsgfoo "c"\n', 3),
+        ('msgid "a"\nmsgstr b\n', 2),
+        ('msgstr "b"\n', 1),
+    ],
+)
+def test_invalid_po(text, line):
+    with pytest.raises(CatalogError, match=f'file.po:{line}:'):
+        parse_po(text, 'file.po')
+
+
+@pytest.fixture
+def locale_dir(git_repo):
+    """Copy of the shipped catalogs, plus a locale without a .mo yet."""
+    locale_dir = git_repo / 'locale'
+    shutil.copytree(LOCALE_DIR, locale_dir)
+    (locale_dir / 'fr' / 'LC_MESSAGES').mkdir(parents=True)
+    (locale_dir / 'fr' / 'LC_MESSAGES' / 'messages.po').write_text(PO)
+    (locale_dir / 'empty').mkdir()
+    return locale_dir
+
+
+def test_catalogs_are_paired_by_locale(locale_dir):
+    catalogs = find_catalogs(str(locale_dir))
+
+    assert list(catalogs) == ['es', 'fr', 'pt_BR']
+    for language, (po_path, mo_path) in catalogs.items():
+        assert f'/{language}/LC_MESSAGES/messages.po' in po_path
+        assert mo_path == po_path[:-3] + '.mo'
+
+
+def test_only_changed_catalogs_are_compiled(locale_dir):
+    po_file = locale_dir / 'fr' / 'LC_MESSAGES' / 'messages.po'
+    mo_file = locale_dir / 'fr' / 'LC_MESSAGES' / 'messages.mo'
+
+    assert compile_catalogs(str(locale_dir), jobs=1) == ['es', 'fr', 'pt_BR']
+    assert compile_catalogs(str(locale_dir), jobs=1) == []
+
+    # A new POT-Creation-Date does not change the compiled catalog
+    po_file.write_text(PO.replace('2025-05-26', '2026-01-01'))
+    assert compile_catalogs(str(locale_dir), jobs=1) == []
+
+    po_file.write_text(PO.replace('Confirmar', 'Fazer commit'))
+    assert compile_catalogs(str(locale_dir), jobs=1) == ['fr']
+    assert load(parse_po(po_file.read_text())).gettext('Commit') == (
+        'Fazer commit'
+    )
+
+    mo_file.write_bytes(b'')
+    assert compile_catalogs(str(locale_dir), jobs=1) == ['fr']
+
+
+def test_catalogs_are_compiled_in_parallel(locale_dir):
+    compiled = compile_catalogs(str(locale_dir), jobs=2, force=True)
+
+    assert compiled == ['es', 'fr', 'pt_BR']
+    for language in ('es', 'pt_BR'):
+        shipped = f'{LOCALE_DIR}/{language}/LC_MESSAGES/messages.mo'
+        built = locale_dir / language / 'LC_MESSAGES' / 'messages.mo'
+        with open(shipped, 'rb') as mo_file:
+            assert built.read_bytes() == mo_file.read()
@@ -2,6 +2,8 @@ import subprocess
 
 import pytest
 
+from task_commit.backend import reset_backend
+from task_commit.status import parse_status
 from task_commit.utils import (
     check_git_status,
     color_text,
@@ -32,36 +34,64 @@ def test_color_text(text, color, expected_output):
 
 # Testando a função get_git_user (simulando uma saída do Git)
 def test_get_git_user(mocker):
-    mocker.patch('subprocess.check_output', return_value='testuser\n')
+    # Subprocess fallback of the repository file reader
+    mocker.patch('task_commit.backend.READ_GIT_FILES', False)
+    mocker.patch(
+        'subprocess.check_output',
+        return_value='core.bare\nfalse\0user.name\ntestuser\0',
+    )
     assert get_git_user() == 'testuser'
 
 
 # Testando a função check_git_status (simulando status do Git)
 def test_check_git_status(mocker):
-    mocker.patch('subprocess.check_output', return_value=' M file1.txt\n')
+    mocker.patch(
+        'task_commit.backend.read_repo_state',
+        return_value=parse_status(
+            '# branch.head main\0'
+            '1 .M N... 100644 100644 100644 0000 0000 file1.txt\0'
+        ),
+    )
     assert check_git_status() is True
 
-    mocker.patch('subprocess.check_output', return_value='')
+    reset_backend()
+    mocker.patch(
+        'task_commit.backend.read_repo_state',
+        return_value=parse_status('# branch.head main\0'),
+    )
     assert check_git_status() is False
 
 
-# Testando a função is_git_flow (simulando um erro no git flow)
+# Testando a função is_git_flow (simulando um erro no git config)
 def test_is_git_flow(mocker):
+    # Subprocess fallback of the repository file reader
+    mocker.patch('task_commit.backend.READ_GIT_FILES', False)
     mocker.patch(
         'subprocess.check_output',
-        side_effect=subprocess.CalledProcessError(1, 'git flow config'),
+        side_effect=subprocess.CalledProcessError(1, 'git config'),
     )
     assert is_git_flow() is False
 
-    mocker.patch('subprocess.check_output', return_value='flow config')
+    mocker.patch('subprocess.check_output', return_value='user.name\nx\0')
+    assert is_git_flow() is False
+
+    reset_backend()
+    mocker.patch(
+        'subprocess.check_output',
+        return_value='gitflow.branch.master\nmain\0'
+        'gitflow.branch.develop\ndevelop\0',
+    )
     assert is_git_flow() is True
 
 
 # Testando a função get_current_branch
 def test_get_current_branch(mocker):
+    # Subprocess fallback of the repository file reader
+    mocker.patch('task_commit.backend.READ_GIT_FILES', False)
     mocker.patch('subprocess.check_output', return_value='feature/1234\n')
     assert get_current_branch() == 'feature/1234'
 
+    reset_backend()
     mocker.patch(
         'subprocess.check_output',
         side_effect=subprocess.CalledProcessError(1, 'git rev-parse'),
@@ -94,11 +124,11 @@ def test_create_commit(mocker):
 
 # Testando a função execute_push
 def test_execute_push(mocker):
-    mocker.patch('subprocess.run')
+    push_all = mocker.patch('task_commit.push.push_all', return_value=[])
     branch = 'main'
 
     execute_push(branch)
 
-    subprocess.run.assert_called_once_with(
-        ['git', 'push', 'origin', branch], check=True
+    push_all.assert_called_once_with(
+        ['origin'], branch, on_progress=mocker.ANY
     )
@@ -0,0 +1,226 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from task_commit.core import (
+    BackgroundFetch,
+    get_pull_command,
+    git_commit_batch,
+    git_commit_non_interactive,
+)
+from task_commit.main import main
+from task_commit.status import read_repo_state
+
+from .conftest import git, make_commits
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_non_interactive_commit_staged_only(git_repo):
+    make_commits(git_repo, ['feat: initial commit'])
+    (git_repo / 'staged.txt').write_text('staged')
+    (git_repo / 'other.txt').write_text('other')
+    git(git_repo, 'add', 'staged.txt')
+
+    status = git_commit_non_interactive(
+        'feat', 'Core  API', 'add  staged file', push=False
+    )
+
+    assert status == 0
+    assert git(git_repo, 'log', '-1', '--format=%s').strip() == (
+        'feat(core_api): add staged file (👤: testuser)'
+    )
+    assert git(git_repo, 'status', '--porcelain').strip() == '?? other.txt'
+
+
+@pytest.mark.parametrize(
+    ('commit_type', 'module', 'commit_message'),
+    [('feature', 'core', 'msg'), ('feat', ' ', 'msg'), ('feat', 'core', '')],
+)
+def test_non_interactive_commit_invalid_arguments(
+    git_repo, commit_type, module, commit_message
+):
+    status = git_commit_non_interactive(
+        commit_type, module, commit_message, push=False
+    )
+
+    assert status == 2  # noqa: PLR2004
+
+
+def test_commit_batch_json_lines(git_repo):
+    make_commits(git_repo, ['feat: initial commit'])
+    (git_repo / 'a.txt').write_text('a')
+    (git_repo / 'b.txt').write_text('b')
+    requests = [
+        {'type': 'feat', 'scope': 'a', 'message': 'add a', 'paths': ['a.txt']},
+        {'type': 'docs', 'scope': 'b', 'message': 'add b', 'paths': ['b.txt']},
+    ]
+    stream = io.StringIO('\n'.join(json.dumps(r) for r in requests))
+
+    assert git_commit_batch(stream, push=False) == 0
+    assert git(git_repo, 'log', '-2', '--format=%s').splitlines() == [
+        'docs(b): add b (👤: testuser)',
+        'feat(a): add a (👤: testuser)',
+    ]
+
+
+def test_commit_batch_invalid_json(git_repo):
+    assert git_commit_batch(io.StringIO('{not json'), push=False) == 2  # noqa: PLR2004
+
+
+def test_failed_push_is_reported_in_exit_status(git_repo, tmp_path):
+    make_commits(git_repo, ['feat: initial commit'])
+    git(git_repo, 'remote', 'add', 'origin', str(tmp_path / 'missing.git'))
+    (git_repo / 'a.txt').write_text('a')
+    (git_repo / 'b.txt').write_text('b')
+    git(git_repo, 'add', 'a.txt')
+    batch = {'type': 'feat', 'scope': 'b', 'message': 'b', 'paths': ['b.txt']}
+
+    assert git_commit_non_interactive('feat', 'a', 'add a') == 1
+    assert git_commit_batch(io.StringIO(json.dumps([batch]))) == 1
+    assert git(git_repo, 'log', '-2', '--format=%s').splitlines() == [
+        'feat(b): b (👤: testuser)',
+        'feat(a): add a (👤: testuser)',
+    ]
+
+
+def test_main_requires_every_commit_argument(capsys):
+    with pytest.raises(SystemExit):
+        main(['--type', 'feat'])
+    assert '--message' in capsys.readouterr().err
+
+
+def test_main_non_interactive_does_not_load_tui(git_repo):
+    make_commits(git_repo, ['feat: initial commit'])
+    (git_repo / 'a.txt').write_text('a')
+    git(git_repo, 'add', 'a.txt')
+    code = (
+        'import sys\n'
+        'from task_commit.main import main\n'
+        'try:\n'
+        '    main(["-t", "fix", "-s", "core", "-m", "msg", "--no-push"])\n'
+        'except SystemExit:\n'
+        '    pass\n'
+        'assert "inquirer" not in sys.modules\n'
+        'assert "prompt_toolkit" not in sys.modules\n'
+    )
+
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        check=False,
+        capture_output=True,
+        text=True,
+        env={**os.environ, 'PYTHONPATH': ROOT_DIR},
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert git(git_repo, 'log', '-1', '--format=%s').startswith('fix(core)')
+
+
+def test_background_fetch_integrates_upstream(git_repo, remote_repo, tmp_path):
+    other = tmp_path / 'other'
+    git(tmp_path, 'clone', '-q', str(remote_repo), str(other))
+    git(other, 'config', 'user.name', 'other')
+    git(other, 'config', 'user.email', 'other@example.com')
+    (upstream_sha,) = make_commits(other, ['fix: upstream change'])
+    git(other, 'push', '-q', 'origin', 'main')
+    (git_repo / 'local.txt').write_text('local')
+
+    fetch = BackgroundFetch(read_repo_state())
+    assert fetch.has_upstream
+    assert fetch.integrate()
+
+    assert git(git_repo, 'rev-parse', 'HEAD').strip() == upstream_sha
+    assert (git_repo / 'local.txt').exists()
+
+
+@pytest.mark.parametrize(
+    ('config', 'command'),
+    [
+        ({}, ['merge', '--ff-only', '@{upstream}']),
+        ({'pull.rebase': 'false'}, ['merge', '--no-edit', '@{upstream}']),
+        ({'pull.rebase': 'true'}, ['rebase', '@{upstream}']),
+        (
+            {'pull.rebase': 'merges'},
+            ['rebase', '--rebase-merges', '@{upstream}'],
+        ),
+        ({'pull.rebase': 'interactive'}, None),
+        (
+            {'pull.rebase': 'true', 'branch.main.rebase': 'false'},
+            ['merge', '--no-edit', '@{upstream}'],
+        ),
+        (
+            {'pull.rebase': 'false', 'branch.main.rebase': 'true'},
+            ['rebase', '@{upstream}'],
+        ),
+        (
+            {'pull.ff': 'only'},
+            ['merge', '--ff-only', '--no-edit', '@{upstream}'],
+        ),
+        (
+            {'pull.ff': 'false'},
+            ['merge', '--no-ff', '--no-edit', '@{upstream}'],
+        ),
+        ({'pull.ff': 'sometimes'}, None),
+    ],
+)
+def test_pull_command_follows_git_pull(git_repo, config, command):
+    for key, value in config.items():
+        git(git_repo, 'config', key, value)
+
+    assert get_pull_command('main') == command
+
+
+def diverge(git_repo, remote_repo, tmp_path):
+    """Pushes an upstream commit and makes a local one on top of the base."""
+    other = tmp_path / 'other'
+    git(tmp_path, 'clone', '-q', str(remote_repo), str(other))
+    git(other, 'config', 'user.name', 'other')
+    git(other, 'config', 'user.email', 'other@example.com')
+    (upstream_sha,) = make_commits(other, ['fix: upstream change'])
+    git(other, 'push', '-q', 'origin', 'main')
+    make_commits(git_repo, ['feat: local change'])
+    return upstream_sha
+
+
+def test_background_fetch_rebases_per_branch(git_repo, remote_repo, tmp_path):
+    upstream_sha = diverge(git_repo, remote_repo, tmp_path)
+    git(git_repo, 'config', 'branch.main.rebase', 'true')
+
+    assert BackgroundFetch(read_repo_state()).integrate()
+
+    assert git(git_repo, 'rev-parse', 'HEAD^').strip() == upstream_sha
+    assert git(git_repo, 'log', '-1', '--format=%s').strip() == (
+        'feat: local change'
+    )
+
+
+def test_background_fetch_fast_forward_only(git_repo, remote_repo, tmp_path):
+    diverge(git_repo, remote_repo, tmp_path)
+    git(git_repo, 'config', 'pull.ff', 'only')
+    head = git(git_repo, 'rev-parse', 'HEAD')
+
+    assert not BackgroundFetch(read_repo_state()).integrate()
+    assert git(git_repo, 'rev-parse', 'HEAD') == head
+
+
+def test_background_fetch_falls_back_to_git_pull(
+    git_repo, remote_repo, mocker
+):
+    git(git_repo, 'config', 'pull.rebase', 'interactive')
+    pull = mocker.patch('task_commit.core.pull_changes', return_value=True)
+
+    assert BackgroundFetch(read_repo_state()).integrate()
+    pull.assert_called_once_with('main')
+
+
+def test_background_fetch_without_upstream(git_repo):
+    make_commits(git_repo, ['feat: initial commit'])
+
+    fetch = BackgroundFetch(read_repo_state())
+
+    assert not fetch.has_upstream
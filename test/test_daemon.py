@@ -0,0 +1,164 @@
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+
+from task_commit import daemon
+from task_commit.daemon import HookChecker, get_hook_client, get_socket_path
+
+from .conftest import git
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Longer than the 72 characters allowed to non-conventional headers
+INVALID = 'u' * 80
+
+pytestmark = pytest.mark.skipif(
+    not daemon.is_supported(), reason='needs Unix domain sockets'
+)
+
+
+@pytest.fixture
+def git_dir(git_repo):
+    return str(git_repo / '.git')
+
+
+@pytest.fixture
+def hook(git_repo, git_dir, monkeypatch):
+    """Installs the daemon client as the commit-msg hook."""
+    monkeypatch.setenv('PYTHONPATH', ROOT_DIR)
+    socket_path = get_socket_path(git_dir)
+    hook_path = git_repo / '.git' / 'hooks' / 'commit-msg'
+    hook_path.write_text(get_hook_client(socket_path), encoding='utf-8')
+    hook_path.chmod(0o755)
+    yield socket_path
+    daemon.stop(socket_path)
+
+
+@pytest.fixture
+def running_daemon(git_dir, hook):
+    thread = threading.Thread(
+        target=daemon.serve, args=(git_dir, hook), daemon=True
+    )
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not daemon.ping(hook):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    yield hook
+    daemon.stop(hook)
+    thread.join(5)
+
+
+def commit(repo, message):
+    return subprocess.run(
+        ['git', 'commit', '--allow-empty', '-q', '-m', message],
+        cwd=repo,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+@pytest.mark.parametrize(
+    ('message', 'status'),
+    [
+        ('feat(api): add endpoint', 0),
+        ('fix: typo', 0),
+        ('!wip', 0),
+        (INVALID, 1),
+        ('   \n', 1),
+    ],
+)
+def test_checker_applies_hook_rules(git_dir, tmp_path, message, status):
+    message_file = tmp_path / 'COMMIT_EDITMSG'
+    message_file.write_text(message, encoding='utf-8')
+
+    assert HookChecker(git_dir).check(str(message_file))[0] == status
+
+
+def test_checker_adds_co_author_on_feature_branches(git_repo, git_dir):
+    message_file = git_repo / '.git' / 'COMMIT_EDITMSG'
+    message_file.write_text('feat: a\n', encoding='utf-8')
+    checker = HookChecker(git_dir)
+
+    checker.check(str(message_file))
+    assert 'Co-authored-by' not in message_file.read_text(encoding='utf-8')
+
+    git(git_repo, 'checkout', '-q', '-b', 'feature/login')
+    checker.check(str(message_file))
+    assert message_file.read_text(encoding='utf-8').endswith(
+        '\nCo-authored-by: testuser\n'
+    )
+
+
+def test_hook_client_asks_the_daemon(git_repo, running_daemon):
+    assert commit(git_repo, 'feat: valid').returncode == 0
+
+    result = commit(git_repo, INVALID)
+    assert result.returncode == 1
+    assert 'Invalid commit message' in result.stderr
+    assert git(git_repo, 'log', '--format=%s') == 'feat: valid\n'
+
+
+def test_hook_client_falls_back_and_starts_the_daemon(git_repo, hook):
+    result = commit(git_repo, INVALID)
+    assert result.returncode == 1
+    assert 'Invalid commit message' in result.stderr
+
+    deadline = time.monotonic() + 10
+    while not daemon.ping(hook):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert commit(git_repo, 'feat: valid').returncode == 0
+
+
+def test_checker_sees_included_config_changes(git_repo, git_dir, tmp_path):
+    included = tmp_path / 'user.gitconfig'
+    included.write_text('[user]\n\tname = Alice\n')
+    git(git_repo, 'config', 'include.path', str(included))
+    git(git_repo, 'checkout', '-q', '-b', 'feature/login')
+    message_file = git_repo / '.git' / 'COMMIT_EDITMSG'
+    checker = HookChecker(git_dir)
+
+    for user in ('Alice', 'Bob'):
+        included.write_text(f'[user]\n\tname = {user}\n')
+        message_file.write_text('feat: a\n', encoding='utf-8')
+        checker.check(str(message_file))
+        assert message_file.read_text(encoding='utf-8').endswith(
+            f'\nCo-authored-by: {user}\n'
+        )
+
+
+def test_long_socket_paths_go_to_a_private_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    git_dir = str(tmp_path / ('repository' * 10) / '.git')
+
+    socket_path = get_socket_path(git_dir)
+
+    assert os.path.dirname(socket_path) == str(tmp_path / 'task_commit')
+    assert os.stat(os.path.dirname(socket_path)).st_mode & 0o777 == 0o700  # noqa: PLR2004
+    assert get_socket_path(git_dir) == socket_path
+
+
+def test_sockets_of_other_users_are_not_trusted(
+    git_dir, running_daemon, monkeypatch
+):
+    uid = os.getuid()
+    with monkeypatch.context() as patch:
+        patch.setattr(os, 'getuid', lambda: uid + 1)
+
+        assert not daemon.ping(running_daemon)
+        assert daemon.serve(git_dir, running_daemon) == 1
+    assert daemon.ping(running_daemon)
+
+
+def test_daemon_does_not_inherit_the_trace(git_dir, monkeypatch, mocker):
+    monkeypatch.setenv('TASK_COMMIT_TRACE', 'trace.json')
+    popen = mocker.patch('subprocess.Popen')
+
+    daemon.start(git_dir)
+
+    assert 'TASK_COMMIT_TRACE' not in popen.call_args.kwargs['env']
+    assert "k != 'TASK_COMMIT_TRACE'" in get_hook_client('daemon.sock')
@@ -0,0 +1,119 @@
+import pytest
+
+from task_commit.catalog import parse_po
+from task_commit.extract import (
+    Message,
+    extract_messages,
+    extract_source,
+    format_pot,
+    format_string,
+    write_pot,
+)
+
+SOURCE = """\
+from gettext import ngettext, pgettext
+
+print(_('first'), f'{_("in f-string")}')
+message = _(
+    'implicit '
+    'concatenation'
+)
+_(variable)
+translator.gettext('attribute')
+ngettext('one file', '%d files', count)
+pgettext('menu', 'Open')
+pgettext(context, 'Skipped')
+"""
+
+
+def test_extract_source():
+    assert extract_source(SOURCE) == [
+        Message(None, 'first', None, 3),
+        Message(None, 'in f-string', None, 3),
+        Message(None, 'implicit concatenation', None, 5),
+        Message(None, 'attribute', None, 9),
+        Message(None, 'one file', '%d files', 10),
+        Message('menu', 'Open', None, 11),
+    ]
+
+
+def test_format_pot(monkeypatch):
+    messages = {
+        'a.py': [
+            Message(None, 'shared', None, 1),
+            Message(None, '%(count)d files', None, 2),
+            Message('menu', 'Open', None, 3),
+        ],
+        'b.py': [
+            Message(None, 'one file', '%d files', 4),
+            Message(None, 'shared', None, 5),
+        ],
+    }
+
+    pot = format_pot(messages)
+    assert 'POT-Creation-Date' not in pot
+    assert pot == format_pot(messages)
+    assert '#: a.py:1 b.py:5\nmsgid "shared"\nmsgstr ""\n' in pot
+    assert '#, python-format\nmsgid "%(count)d files"' in pot
+    assert 'msgctxt "menu"\nmsgid "Open"' in pot
+    assert 'msgid_plural "%d files"\nmsgstr[0] ""\nmsgstr[1] ""\n' in pot
+
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '0')
+    assert '"POT-Creation-Date: 1970-01-01 00:00+0000\\n"' in format_pot({})
+
+
+@pytest.mark.parametrize(
+    'text',
+    [
+        'short',
+        'first line\nsecond line\n',
+        ' '.join(['a long message that has to be wrapped'] * 5),
+        'quotes " and \\ backslashes\tand tabs',
+    ],
+)
+def test_format_string(text):
+    formatted = format_string('msgid', text)
+
+    assert all(len(line) <= 79 for line in formatted.split('\n'))  # noqa: PLR2004
+    assert parse_po(f'{formatted}\nmsgstr "x"\n') == {text: 'x'}
+
+
+@pytest.fixture
+def sources(git_repo):
+    for name in ('a', 'b'):
+        (git_repo / f'{name}.py').write_text(f"_('from {name}')\n")
+    return ['a.py', 'b.py']
+
+
+def test_only_changed_files_are_parsed(git_repo, sources):
+    assert write_pot(sources, 'messages.pot', jobs=1) == sources
+    assert write_pot(sources, 'messages.pot', jobs=1) == []
+    pot = (git_repo / 'messages.pot').read_text()
+
+    (git_repo / 'b.py').write_text("_('changed')\n")
+    assert write_pot(sources, 'messages.pot', jobs=1) == ['b.py']
+    changed = (git_repo / 'messages.pot').read_text()
+    assert 'msgid "from a"' in changed
+    assert 'msgid "changed"' in changed
+    assert 'msgid "from b"' not in changed
+
+    (git_repo / 'b.py').write_text("_('from b')\n")
+    write_pot(sources, 'messages.pot', jobs=1)
+    assert (git_repo / 'messages.pot').read_text() == pot
+
+
+def test_files_are_parsed_in_parallel(sources):
+    messages, parsed = extract_messages(sources, jobs=2)
+
+    assert parsed == sources
+    assert messages == {
+        'a.py': [Message(None, 'from a', None, 1)],
+        'b.py': [Message(None, 'from b', None, 1)],
+    }
+
+
+def test_invalid_source(git_repo, sources):
+    (git_repo / 'a.py').write_text('_(\n')
+
+    with pytest.raises(SyntaxError):
+        extract_messages(sources, jobs=1)
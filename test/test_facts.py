@@ -0,0 +1,92 @@
+from task_commit import facts
+from task_commit.backend import reset_backend
+from task_commit.facts import RepoFacts, load_facts, reset_facts
+
+from .conftest import git, make_commits
+
+
+def reload():
+    """Loads the facts the way a new process would."""
+    reset_backend()
+    reset_facts()
+    return load_facts()
+
+
+def test_facts_are_cached_until_the_config_changes(git_repo, mocker):
+    derive = mocker.spy(facts, 'derive_facts')
+
+    assert reload() == RepoFacts(
+        user='testuser',
+        flow_prefixes={
+            'feature': 'feature/',
+            'hotfix': 'hotfix/',
+            'release': 'release/',
+        },
+        branch='main',
+    )
+    assert reload().user == 'testuser'
+    assert derive.call_count == 1
+
+    git(git_repo, 'config', 'user.name', 'another user')
+    assert reload().user == 'another user'
+    assert derive.call_count == 2  # noqa: PLR2004
+
+
+def test_facts_follow_the_current_branch(remote_repo, git_repo):
+    assert reload().remote == 'origin'
+    assert reload().merge == 'refs/heads/main'
+
+    git(git_repo, 'checkout', '-q', '-b', 'local')
+    current = reload()
+    assert current.branch == 'local'
+    assert current.remote is None
+
+    git(git_repo, 'checkout', '-q', '--detach')
+    assert reload().branch is None
+
+
+def test_git_flow_prefixes(git_repo):
+    make_commits(git_repo, ['feat: initial commit'])
+    assert not reload().git_flow
+
+    git(git_repo, 'config', 'gitflow.branch.main', 'main')
+    git(git_repo, 'config', 'gitflow.branch.develop', 'develop')
+    git(git_repo, 'config', 'gitflow.prefix.feature', 'feat-')
+    current = reload()
+
+    assert current.git_flow
+    assert current.flow_kind('feat-login') == 'feature'
+    assert current.flow_kind('hotfix/crash') == 'hotfix'
+    assert current.flow_kind('feature/login') is None
+
+
+def test_included_and_environment_config_is_stamped(
+    git_repo, tmp_path, monkeypatch
+):
+    home = tmp_path / 'home'
+    home.mkdir()
+    (home / '.gitconfig').write_text('[include]\n\tpath = .gitconfig-work\n')
+    (home / '.gitconfig-work').write_text('[user]\n\tname = Alice\n')
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.setenv('GIT_CONFIG_NOSYSTEM', '1')
+    monkeypatch.delenv('XDG_CONFIG_HOME', raising=False)
+    git(git_repo, 'config', '--unset', 'user.name')
+    assert reload().user == 'Alice'
+
+    (home / '.gitconfig-work').write_text('[user]\n\tname = Bob\n')
+    assert reload().user == 'Bob'
+
+    monkeypatch.setenv('GIT_CONFIG_COUNT', '1')
+    monkeypatch.setenv('GIT_CONFIG_KEY_0', 'user.name')
+    monkeypatch.setenv('GIT_CONFIG_VALUE_0', 'ci')
+    assert reload().user == 'ci'
+
+    monkeypatch.setenv('GIT_CONFIG_VALUE_0', 'other ci')
+    assert reload().user == 'other ci'
+
+
+def test_facts_are_not_cached_when_git_reads_the_config(git_repo, mocker):
+    mocker.patch('task_commit.backend.READ_GIT_FILES', False)
+
+    assert reload().user == 'testuser'
+    assert not (git_repo / '.git' / 'task_commit' / 'facts.json').exists()
@@ -0,0 +1,124 @@
+import subprocess
+
+import pytest
+
+from task_commit.backend import GitBackend
+from task_commit.core import git_commit_non_interactive
+from task_commit.gitindex import GitIndex, StagedChange
+
+from .conftest import git, make_commits
+
+
+def diff_cached(repo) -> list[StagedChange]:
+    fields = git(
+        repo, 'diff', '--cached', '--name-status', '--no-renames', '-z'
+    ).split('\0')
+    return [
+        StagedChange(status, path)
+        for status, path in zip(fields[::2], fields[1::2], strict=False)
+    ]
+
+
+def staged(repo) -> list[StagedChange]:
+    """Reads the staged changes and checks them against Git."""
+    changes = GitBackend().staged()
+    assert changes == diff_cached(repo)
+    return changes
+
+
+@pytest.fixture
+def tree_repo(git_repo):
+    for path in ('a.txt', 'dir/b.txt', 'dir/sub/c.txt', 'z.txt'):
+        (git_repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (git_repo / path).write_text(path)
+    git(git_repo, 'add', '.')
+    git(git_repo, 'commit', '-q', '-m', 'feat: initial commit')
+    return git_repo
+
+
+def test_nothing_staged_reads_only_the_cache_tree(tree_repo, mocker):
+    # The end of index entries extension locates the cache-tree directly
+    git(tree_repo, 'config', 'index.recordEndOfIndexEntries', 'true')
+    git(tree_repo, 'update-index', '--really-refresh')
+    entries = mocker.spy(GitIndex, '__iter__')
+
+    assert staged(tree_repo) == []
+    assert entries.call_count == 0
+
+
+def test_staged_changes_match_git(tree_repo):
+    (tree_repo / 'dir' / 'b.txt').write_text('changed')
+    (tree_repo / 'dir' / 'new.txt').write_text('new')
+    (tree_repo / 'unstaged.txt').write_text('untracked')
+    git(tree_repo, 'add', 'dir')
+    git(tree_repo, 'rm', '-q', 'z.txt')
+    git(tree_repo, 'update-index', '--chmod=+x', 'a.txt')
+
+    assert staged(tree_repo) == [
+        StagedChange('M', 'a.txt'),
+        StagedChange('M', 'dir/b.txt'),
+        StagedChange('A', 'dir/new.txt'),
+        StagedChange('D', 'z.txt'),
+    ]
+
+
+def test_file_replaced_by_directory(tree_repo):
+    git(tree_repo, 'rm', '-q', '-r', 'dir')
+    (tree_repo / 'dir').write_text('now a file')
+    (tree_repo / 'a.txt').unlink()
+    (tree_repo / 'a.txt').mkdir()
+    (tree_repo / 'a.txt' / 'inner').write_text('inner')
+    git(tree_repo, 'add', '-A')
+
+    assert StagedChange('D', 'dir/sub/c.txt') in staged(tree_repo)
+
+
+def test_unborn_head_and_index_version_4(git_repo):
+    (git_repo / 'dir').mkdir()
+    (git_repo / 'dir' / 'a.txt').write_text('a')
+    (git_repo / 'dir' / 'ab.txt').write_text('ab')
+    git(git_repo, 'add', '.')
+    assert len(staged(git_repo)) == 2  # noqa: PLR2004
+
+    git(git_repo, 'update-index', '--index-version', '4')
+    assert len(staged(git_repo)) == 2  # noqa: PLR2004
+
+
+def test_intent_to_add_is_not_staged(tree_repo):
+    (tree_repo / 'later.txt').write_text('later')
+    git(tree_repo, 'add', '-N', 'later.txt')
+
+    assert staged(tree_repo) == []
+
+
+def test_conflicts_are_unmerged(tree_repo):
+    git(tree_repo, 'checkout', '-q', '-b', 'other')
+    (tree_repo / 'a.txt').write_text('other')
+    git(tree_repo, 'commit', '-q', '-am', 'fix: other')
+    git(tree_repo, 'checkout', '-q', 'main')
+    (tree_repo / 'a.txt').write_text('main')
+    git(tree_repo, 'commit', '-q', '-am', 'fix: main')
+    with pytest.raises(subprocess.CalledProcessError):
+        git(tree_repo, 'merge', '-q', 'other')
+
+    assert StagedChange('U', 'a.txt') in staged(tree_repo)
+
+
+def test_split_index_falls_back_to_git(tree_repo, mocker):
+    git(tree_repo, 'update-index', '--split-index')
+    (tree_repo / 'a.txt').write_text('changed')
+    git(tree_repo, 'add', 'a.txt')
+    fallback = mocker.spy(GitBackend, '_diff_cached')
+
+    assert staged(tree_repo) == [StagedChange('M', 'a.txt')]
+    assert fallback.call_count == 1
+
+
+def test_non_interactive_commit_without_changes(git_repo):
+    make_commits(git_repo, ['feat: initial commit'])
+    (git_repo / 'unstaged.txt').write_text('unstaged')
+
+    status = git_commit_non_interactive('feat', 'core', 'msg', push=False)
+
+    assert status == 1
+    assert git(git_repo, 'rev-list', '--count', 'HEAD').strip() == '1'
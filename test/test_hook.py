@@ -0,0 +1,223 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from task_commit.daemon import HookChecker
+from task_commit.hook import compile_hook
+from task_commit.init import main as init_main
+from task_commit.lint import Validator
+from task_commit.rules import Rules
+
+from .conftest import git
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Every distinct shell available, /bin/sh being dash on Debian
+SHELLS = list(
+    {
+        os.path.realpath(path): path
+        for path in map(shutil.which, ('sh', 'dash', 'bash'))
+        if path
+    }.values()
+)
+
+# Headers the shell builtins accept on their own
+FAST_PATH = [
+    'feat: add endpoint',
+    'fix(api): correct status code',
+    'chore(my-deps_2): bump',
+    'feat(api): ' + 'x' * 72,
+    'perf: ' + 'x' * 72,
+    'u' * 72,
+    'short header\n\n' + 'body ' * 40,
+    ' x',
+    'docs: windows\r\n\r\nbody',
+    '!' + 'x' * 100,
+    '!',
+]
+MESSAGES = [
+    *FAST_PATH,
+    'feat(api): ' + 'x' * 73,
+    'u' * 73,
+    'é' * 72,
+    'é' * 73,
+    'feat: ' + 'é' * 72,
+    'feat(a b): ' + 'x' * 70,
+    'feat(): ' + 'x' * 70,
+    'feat(api)' + 'x' * 70,
+    'feat(api):' + 'x' * 70,
+    'feature: ' + 'x' * 70,
+    'feat(api)(ui): ' + 'x' * 70,
+    'feat(é): ' + 'x' * 70,
+    '',
+    '\n',
+    '  \n\t\n',
+    ' ',
+    '\nbody',
+    ' \nbody',
+    'x\r',
+]
+
+
+CUSTOM_RULES = [
+    Rules(types=('feat', 'build'), max_header_length=20),
+    Rules(scopes=('api', 'ui'), subject_case='lower'),
+    Rules(scope_case='lower', conventional_only=True),
+]
+CUSTOM_MESSAGES = [
+    'feat: short',
+    'build(ci): ' + 'x' * 20,
+    'build(ci): ' + 'x' * 21,
+    'fix: not a type here',
+    'x' * 20,
+    'x' * 21,
+    'feat(api): lower',
+    'feat(api): Upper',
+    'feat(api): 1.0 release',
+    'feat(api): (parenthesis)',
+    'feat(db): lower',
+    'fix(API): upper scope',
+    'fix(ui_kit): x',
+    'free-form header',
+    '!skip',
+]
+
+
+@pytest.fixture
+def message_file(git_repo):
+    return git_repo / '.git' / 'COMMIT_EDITMSG'
+
+
+def run_hook(repo, shell, script, env=None):
+    hook_path = repo / '.git' / 'hooks' / 'commit-msg'
+    hook_path.write_text(script, encoding='utf-8')
+    return subprocess.run(
+        [shell, str(hook_path), '.git/COMMIT_EDITMSG'],
+        cwd=repo,
+        capture_output=True,
+        env={**os.environ, 'LC_ALL': 'C.UTF-8', **(env or {})},
+        check=False,
+    )
+
+
+@pytest.mark.parametrize('shell', SHELLS)
+@pytest.mark.parametrize('message', MESSAGES)
+def test_hook_matches_the_python_validator(
+    git_repo, message_file, shell, message
+):
+    message_file.write_bytes(message.encode('utf-8'))
+    expected, _output = HookChecker(str(git_repo / '.git')).check(
+        str(message_file)
+    )
+
+    result = run_hook(git_repo, shell, compile_hook(python=None))
+
+    assert result.returncode == expected
+
+
+@pytest.mark.parametrize('shell', SHELLS)
+@pytest.mark.parametrize('rules', CUSTOM_RULES)
+def test_hook_matches_the_python_validator_with_custom_rules(
+    git_repo, message_file, shell, rules
+):
+    script = compile_hook(rules, python=None)
+    validator = Validator(rules)
+    for message in CUSTOM_MESSAGES:
+        message_file.write_bytes(message.encode('utf-8'))
+        expected = int(validator.validate(message) is not None)
+
+        result = run_hook(git_repo, shell, script)
+
+        assert result.returncode == expected, message
+
+
+@pytest.mark.parametrize('shell', SHELLS)
+@pytest.mark.parametrize('message', FAST_PATH)
+def test_hook_accepts_without_forking(git_repo, message_file, shell, message):
+    message_file.write_bytes(message.encode('utf-8'))
+
+    # Without PATH any external command (grep, git, python) would fail
+    result = run_hook(
+        git_repo, shell, compile_hook(python=None), env={'PATH': ''}
+    )
+
+    assert result.returncode == 0, result.stdout
+
+
+def test_hook_slow_path_uses_the_python_validator(git_repo, message_file):
+    script = compile_hook(python=sys.executable)
+    env = {'PYTHONPATH': ROOT_DIR}
+
+    message_file.write_text('é' * 72, encoding='utf-8')
+    assert run_hook(git_repo, SHELLS[0], script, env).returncode == 0
+
+    message_file.write_text('é' * 73, encoding='utf-8')
+    result = run_hook(git_repo, SHELLS[0], script, env)
+    assert result.returncode == 1
+    assert 'Invalid commit message' in result.stdout.decode('utf-8')
+
+    # Only the validator knows non-ASCII uppercase letters
+    (git_repo / 'pyproject.toml').write_text(
+        '[tool.task_commit]\nsubject_case = "lower"\n', encoding='utf-8'
+    )
+    script = compile_hook(Rules(subject_case='lower'), sys.executable)
+    message_file.write_text('feat: Élan', encoding='utf-8')
+    assert run_hook(git_repo, SHELLS[0], script, env).returncode == 1
+
+
+def test_hook_adds_co_author_on_feature_branches(git_repo, message_file):
+    git(git_repo, 'checkout', '-q', '-b', 'feature/login')
+    message_file.write_text('feat: add login\n', encoding='utf-8')
+
+    result = run_hook(git_repo, SHELLS[0], compile_hook(python=None))
+
+    assert result.returncode == 0
+    assert message_file.read_text(encoding='utf-8') == (
+        'feat: add login\n\nCo-authored-by: testuser\n'
+    )
+
+
+def test_installed_hook_rejects_commits(git_repo, monkeypatch):
+    from task_commit.init import setup_git_hook  # noqa: PLC0415
+
+    monkeypatch.setenv('PYTHONPATH', ROOT_DIR)
+    setup_git_hook(daemon=False)
+
+    rejected = subprocess.run(
+        ['git', 'commit', '-q', '--allow-empty', '-m', 'u' * 80],
+        cwd=git_repo,
+        capture_output=True,
+        check=False,
+    )
+    assert rejected.returncode == 1
+    git(git_repo, 'commit', '-q', '--allow-empty', '-m', 'feat: valid')
+    assert git(git_repo, 'log', '--format=%s') == 'feat: valid\n'
+
+
+@pytest.mark.parametrize(
+    ('argv', 'options'),
+    [
+        ([], {'daemon': False, 'server': False}),
+        (['--daemon'], {'daemon': True, 'server': False}),
+        (['--server'], {'daemon': False, 'server': True}),
+    ],
+)
+def test_init_options(mocker, argv, options):
+    setup_git_hook = mocker.patch('task_commit.init.setup_git_hook')
+
+    init_main(argv)
+
+    setup_git_hook.assert_called_once_with(**options)
+
+
+@pytest.mark.parametrize('argv', [['--deamon'], ['--daemon', '--server']])
+def test_init_rejects_invalid_options(mocker, capsys, argv):
+    setup_git_hook = mocker.patch('task_commit.init.setup_git_hook')
+
+    with pytest.raises(SystemExit):
+        init_main(argv)
+
+    setup_git_hook.assert_not_called()
+    assert 'usage: task_commit_init' in capsys.readouterr().err
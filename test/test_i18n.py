@@ -0,0 +1,29 @@
+from task_commit import i18n
+
+
+def test_english_skips_catalog_loading(mocker):
+    translation = mocker.patch('gettext.translation')
+
+    translate = i18n.load_translator(lang='en_US')
+
+    assert translate('Invalid option') == 'Invalid option'
+    translation.assert_not_called()
+
+
+def test_catalog_is_loaded_once_on_first_lookup(mocker, monkeypatch):
+    monkeypatch.setattr(i18n, '_translate', None)
+    monkeypatch.setenv('LANG', 'pt_BR.UTF-8')
+    load_translator = mocker.spy(i18n, 'load_translator')
+
+    translate = i18n.get_translator()
+    load_translator.assert_not_called()
+
+    assert translate('Invalid option') == 'Opção inválida'
+    assert translate('Invalid option') == 'Opção inválida'
+    load_translator.assert_called_once()
+
+
+def test_missing_catalog_returns_original_text():
+    translate = i18n.get_translator(lang='xx')
+
+    assert translate('Invalid option') == 'Invalid option'
@@ -0,0 +1,115 @@
+import io
+
+import pytest
+
+from task_commit import lint
+from task_commit.lint import (
+    Validator,
+    iter_records,
+    lint_commits,
+    lint_range,
+    lint_range_parallel,
+    run_lint,
+)
+from task_commit.main import build_parser
+
+from .conftest import make_commits
+
+
+@pytest.mark.parametrize(
+    ('message', 'valid'),
+    [
+        ('feat(api): add user authentication', True),
+        ('fix: correct button alignment\n\nbody', True),
+        ('short free-form header', True),
+        ('!skip validation ' + 'x' * 100, True),
+        ('', False),
+        ('\n\n', False),
+        ('x' * 73, False),
+        ('feat(api): ' + 'x' * 73, False),
+    ],
+)
+def test_validator(message, valid):
+    assert (Validator().validate(message) is None) is valid
+
+
+def test_violation_subject_has_no_carriage_return():
+    (violation,) = lint_commits([('a' * 40, 'x' * 80 + '\r\n\r\nbody')])
+
+    assert violation.subject == 'x' * 80
+
+
+def test_fingerprint_covers_language_and_version(monkeypatch):
+    monkeypatch.setenv('LANG', 'en_US.UTF-8')
+    english = Validator().fingerprint
+    assert Validator().fingerprint == english
+
+    monkeypatch.setenv('LANG', 'pt_BR.UTF-8')
+    assert Validator().fingerprint != english
+
+    monkeypatch.setenv('LANG', 'en_US.UTF-8')
+    monkeypatch.setattr(lint, 'VALIDATOR_VERSION', lint.VALIDATOR_VERSION + 1)
+    assert Validator().fingerprint != english
+
+
+def test_iter_records_small_chunks():
+    stream = io.BytesIO(
+        b'a' * 40 + b'\nfeat: one\n\0' + b'b' * 40 + b'\nfix: two\n\nbody\n'
+    )
+
+    records = list(iter_records(stream, chunk_size=7))
+
+    assert records == [
+        ('a' * 40, 'feat: one\n'),
+        ('b' * 40, 'fix: two\n\nbody\n'),
+    ]
+
+
+def test_lint_range(git_repo):
+    first, bad, _last = make_commits(
+        git_repo, ['feat: initial commit', 'y' * 80, 'fix(core): bug']
+    )
+
+    violations = list(lint_range('HEAD'))
+    assert [v.sha for v in violations] == [bad]
+    assert violations[0].subject == 'y' * 80
+
+    assert not list(lint_range(f'{bad}..HEAD'))
+    assert list(lint_range(f'{first}..HEAD'))
+
+
+def test_run_lint_exit_status(git_repo, capsys):
+    make_commits(git_repo, ['feat: initial commit'])
+    assert run_lint('HEAD') == 0
+
+    make_commits(git_repo, ['z' * 100])
+    assert run_lint('HEAD') == 1
+    assert run_lint('does-not-exist') == 2  # noqa: PLR2004
+
+
+def test_lint_range_parallel_keeps_commit_order(git_repo):
+    messages = [f'feat: commit {i}' if i % 3 else 'w' * 90 for i in range(10)]
+    make_commits(git_repo, messages)
+
+    expected = list(lint_range('HEAD'))
+    violations = list(lint_range_parallel('HEAD', jobs=2, batch_size=3))
+
+    assert violations == expected
+    assert len(violations) == 4  # noqa: PLR2004
+
+
+def test_run_lint_parallel(git_repo, capsys):
+    make_commits(git_repo, ['feat: initial commit', 'v' * 100])
+
+    assert run_lint('HEAD', jobs=2) == 1
+    assert 'Commits checked: 2' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('jobs', ['-1', 'many'])
+def test_invalid_jobs_are_rejected(jobs, capsys):
+    with pytest.raises(SystemExit) as error:
+        build_parser().parse_args(['lint', '--jobs', jobs])
+
+    assert error.value.code == 2  # noqa: PLR2004
+    assert 'invalid non-negative int value' in capsys.readouterr().err
+    assert build_parser().parse_args(['lint', '-j', '0']).jobs == 0
@@ -0,0 +1,121 @@
+import subprocess
+import sys
+
+from task_commit import push
+from task_commit.push import get_push_remotes, push_all, push_remote
+from task_commit.utils import execute_push
+
+from .conftest import git, make_commits
+
+
+def make_remotes(git_repo, tmp_path, names):
+    for name in names:
+        remote = tmp_path / f'{name}.git'
+        git(tmp_path, 'init', '-q', '--bare', str(remote))
+        git(git_repo, 'remote', 'add', name, str(remote))
+        git(git_repo, 'config', '--add', 'task-commit.pushRemote', name)
+    return [tmp_path / f'{name}.git' for name in names]
+
+
+def test_execute_push_to_every_configured_remote(git_repo, tmp_path):
+    (sha,) = make_commits(git_repo, ['feat: initial commit'])
+    remotes = make_remotes(git_repo, tmp_path, ['primary', 'mirror'])
+
+    assert get_push_remotes() == ['primary', 'mirror']
+    assert execute_push('main') is True
+
+    for remote in remotes:
+        assert git(remote, 'rev-parse', 'main').strip() == sha
+
+
+def test_push_all_reports_progress_and_order(git_repo, tmp_path):
+    make_commits(git_repo, ['feat: initial commit'])
+    make_remotes(git_repo, tmp_path, ['a', 'b', 'c'])
+    progress = []
+
+    results = push_all(
+        ['a', 'missing', 'c'],
+        'main',
+        on_progress=lambda remote, line, done: progress.append(remote),
+    )
+
+    assert [r.remote for r in results] == ['a', 'missing', 'c']
+    assert [r.ok for r in results] == [True, False, True]
+    assert {'a', 'c'} <= set(progress)
+
+
+def test_push_remote_retries_transient_errors(mocker):
+    push_once = mocker.patch.object(
+        push,
+        '_push_once',
+        side_effect=[
+            (128, 'fatal: the remote end hung up unexpectedly'),
+            (128, 'fatal: unable to access: Could not resolve host: x'),
+            (0, ''),
+        ],
+    )
+    sleep = mocker.patch('time.sleep')
+
+    result = push_remote('origin', 'main', backoff=0.5)
+
+    assert result.ok
+    assert result.attempts == 3  # noqa: PLR2004
+    assert push_once.call_count == 3  # noqa: PLR2004
+    assert [c.args[0] for c in sleep.call_args_list] == [0.5, 1.0]
+
+
+def test_push_remote_does_not_retry_rejections(mocker):
+    mocker.patch.object(
+        push, '_push_once', return_value=(1, '! [rejected] main (fetch first)')
+    )
+
+    result = push_remote('origin', 'main')
+
+    assert not result.ok
+    assert result.attempts == 1
+
+
+def test_progress_updates_are_left_out_of_output(mocker):
+    stderr = (
+        b'Writing objects:  50% (1/2)\rWriting objects: 100% (2/2), done.\n'
+        b' ! [rejected]        main -> main (fetch first)\n'
+    )
+    popen = subprocess.Popen
+    mocker.patch(
+        'subprocess.Popen',
+        side_effect=lambda _args, **kwargs: popen(
+            [
+                sys.executable,
+                '-c',
+                f'import sys; sys.stderr.buffer.write({stderr!r}); exit(1)',
+            ],
+            **kwargs,
+        ),
+    )
+    progress = []
+
+    returncode, output = push._push_once(
+        'origin', 'main', lambda *args: progress.append(args[1:]), 10
+    )
+
+    assert returncode == 1
+    assert output == (
+        'Writing objects: 100% (2/2), done.\n'
+        '! [rejected]        main -> main (fetch first)'
+    )
+    assert progress[0] == ('Writing objects:  50% (1/2)', False)
+    assert [done for _line, done in progress] == [False, True, True]
+
+
+def test_print_progress_redraws_only_on_a_terminal(mocker, capsys):
+    push.print_progress('origin', 'Writing objects:  50% (1/2)', False)
+    push.print_progress('origin', 'Writing objects: 100% (2/2), done.')
+    assert '50%' not in capsys.readouterr().out
+
+    mocker.patch('sys.stdout.isatty', return_value=True)
+    push.print_progress('origin', 'Writing objects:  50% (1/2)', False)
+    push.print_progress('origin', 'Writing objects: 100% (2/2), done.')
+    update, done = capsys.readouterr().out.split('\r\033[K')[1:]
+    assert '50%' in update
+    assert not update.endswith('\n')
+    assert done.endswith('\n')
@@ -0,0 +1,84 @@
+import os
+import subprocess
+
+import pytest
+
+from task_commit import receive
+from task_commit.receive import RefUpdate, check_push, get_server_hook
+
+from .conftest import git, make_commits
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INVALID = 'u' * 80
+
+
+@pytest.fixture
+def server(remote_repo, monkeypatch):
+    """`remote_repo` guarded by the pre-receive hook."""
+    monkeypatch.setenv('PYTHONPATH', ROOT_DIR)
+    hook_path = remote_repo / 'hooks' / 'pre-receive'
+    hook_path.write_text(get_server_hook(), encoding='utf-8')
+    hook_path.chmod(0o755)
+    return remote_repo
+
+
+def push(repo, *refspecs):
+    return subprocess.run(
+        ['git', 'push', '-q', 'origin', *refspecs],
+        cwd=repo,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def test_pre_receive_accepts_valid_pushes(git_repo, server):
+    make_commits(git_repo, ['feat: one', 'fix(api): two'])
+
+    assert push(git_repo, 'main').returncode == 0
+    assert git(server, 'log', '-1', '--format=%s') == 'fix(api): two\n'
+
+
+def test_pre_receive_rejects_any_invalid_commit(git_repo, server):
+    make_commits(git_repo, ['feat: one', INVALID, 'fix: three'])
+    git(git_repo, 'checkout', '-q', '-b', 'other')
+    make_commits(git_repo, ['docs: four'])
+
+    result = push(git_repo, 'main', 'other')
+
+    assert result.returncode != 0
+    assert 'uuuuuuuuuuuu' in result.stderr
+    assert git(server, 'branch', '--format=%(refname:short)') == 'main\n'
+
+
+def test_check_push_lists_new_commits_once(git_repo, server, mocker):
+    base = git(git_repo, 'rev-parse', 'HEAD').strip()
+    *_main, main_tip = make_commits(git_repo, ['feat: a', 'feat: b'])
+    git(git_repo, 'checkout', '-q', '-b', 'topic')
+    (topic_tip,) = make_commits(git_repo, ['feat: c'])
+    git(git_repo, 'push', '-q', str(server), 'HEAD:refs/tmp/x')
+    git(server, 'update-ref', '-d', 'refs/tmp/x')
+    read_messages = mocker.spy(receive, 'read_messages')
+    os.chdir(server)
+
+    status = check_push([
+        RefUpdate(base, main_tip, 'refs/heads/main'),
+        RefUpdate('0' * 40, topic_tip, 'refs/heads/topic'),
+        RefUpdate(base, '0' * 40, 'refs/heads/gone'),
+    ])
+
+    assert status == 0
+    read_messages.assert_called_once()
+    assert len(read_messages.call_args.args[0]) == 3  # noqa: PLR2004
+
+
+def test_server_rules_come_from_the_default_branch(git_repo, server):
+    (git_repo / 'pyproject.toml').write_text(
+        '[tool.task_commit]\nconventional_only = true\n', encoding='utf-8'
+    )
+    git(git_repo, 'add', 'pyproject.toml')
+    git(git_repo, 'commit', '-qm', 'chore: add rules')
+    assert push(git_repo, 'main').returncode == 0
+
+    make_commits(git_repo, ['free-form header'])
+    assert push(git_repo, 'main').returncode != 0
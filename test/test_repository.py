@@ -0,0 +1,143 @@
+import os
+import subprocess
+
+import pytest
+
+from task_commit.backend import GitBackend
+from task_commit.repository import (
+    Unsupported,
+    abbrev_head,
+    discover,
+    read_config,
+)
+
+from .conftest import git, make_commits
+
+CONFIG = r"""
+[core]
+	editor = "vim -c 'set tw=72'"  ; comment
+[alias]
+	lg = log --oneline \
+	--graph
+	quoted = "  keep  spaces  " # comment
+	escapes = tab\there \"q\" back\\slash
+	empty =
+	implicit
+[Remote "Origin"]
+	URL = https://example.com/repo.git
+[branch.Legacy]
+	remote = origin
+[include]
+	path = included.inc
+[includeIf "gitdir:{repo}/"]
+	path = gitdir.inc
+[includeIf "gitdir/i:{git_dir_upper}"]
+	path = gitdir-i.inc
+[includeIf "gitdir:/nowhere/"]
+	path = never.inc
+[includeIf "onbranch:feature/"]
+	path = onbranch.inc
+"""
+
+
+@pytest.fixture
+def isolated_home(tmp_path, monkeypatch):
+    """Keeps the configuration of the machine out of the comparison."""
+    home = tmp_path / 'home'
+    home.mkdir()
+    (home / '.gitconfig').write_text('[user]\n\tname = global user\n')
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.delenv('XDG_CONFIG_HOME', raising=False)
+    monkeypatch.delenv('GIT_CONFIG_GLOBAL', raising=False)
+    monkeypatch.setenv('GIT_CONFIG_NOSYSTEM', '1')
+    return home
+
+
+def git_config_list(repo) -> dict[str, list[str]]:
+    config: dict[str, list[str]] = {}
+    for entry in git(repo, 'config', '--list', '-z').split('\0'):
+        if entry:
+            key, _sep, value = entry.partition('\n')
+            config.setdefault(key, []).append(value)
+    return config
+
+
+def test_config_matches_git(git_repo, isolated_home):
+    make_commits(git_repo, ['feat: initial commit'])
+    git_dir = str(git_repo / '.git')
+    config = git_repo / '.git' / 'config'
+    config.write_text(
+        config.read_text()
+        + CONFIG.replace('{repo}', str(git_repo)).replace(
+            '{git_dir_upper}', git_dir.upper()
+        )
+    )
+    for name in ('included', 'gitdir', 'gitdir-i', 'never', 'onbranch'):
+        (git_repo / '.git' / f'{name}.inc').write_text(
+            f'[test]\n\tfrom = {name}\n'
+        )
+
+    values, files = read_config(discover())
+    assert values == git_config_list(git_repo)
+    assert values['test.from'] == ['included', 'gitdir', 'gitdir-i']
+    assert str(git_repo / '.git' / 'included.inc') in files
+    assert str(git_repo / '.git' / 'never.inc') not in files
+
+    git(git_repo, 'checkout', '-q', '-b', 'feature/x')
+    values, files = read_config(discover())
+    assert values == git_config_list(git_repo)
+    assert values['test.from'][-1] == 'onbranch'
+    assert str(git_repo / '.git' / 'onbranch.inc') in files
+
+
+def test_config_environment(git_repo, isolated_home, monkeypatch):
+    monkeypatch.setenv('GIT_CONFIG_COUNT', '1')
+    monkeypatch.setenv('GIT_CONFIG_KEY_0', 'User.Name')
+    monkeypatch.setenv('GIT_CONFIG_VALUE_0', 'from env')
+
+    assert read_config(discover())[0] == git_config_list(git_repo)
+
+
+def test_unsupported_config_falls_back_to_git(git_repo, isolated_home):
+    with (git_repo / '.git' / 'config').open('a') as config:
+        config.write('[includeIf "hasconfig:remote.*.url:*"]\n\tpath = x\n')
+
+    with pytest.raises(Unsupported):
+        read_config(discover())
+    assert GitBackend().config('user.name') == 'testuser'
+
+
+def test_discover(git_repo, tmp_path):
+    make_commits(git_repo, ['feat: initial commit'])
+    (git_repo / 'sub' / 'dir').mkdir(parents=True)
+
+    paths = discover(str(git_repo / 'sub' / 'dir'))
+    assert paths.toplevel == str(git_repo)
+    assert paths.git_dir == paths.common_dir == str(git_repo / '.git')
+    assert discover(str(git_repo / '.git' / 'refs')).toplevel is None
+
+    worktree = tmp_path / 'worktree'
+    git(git_repo, 'worktree', 'add', '-q', '-b', 'other', str(worktree))
+    paths = discover(str(worktree))
+    assert paths.toplevel == str(worktree)
+    assert paths.common_dir == str(git_repo / '.git')
+    assert abbrev_head(paths.git_dir) == 'other'
+
+    bare = tmp_path / 'bare.git'
+    git(tmp_path, 'init', '-q', '--bare', str(bare))
+    assert discover(str(bare)).toplevel is None
+
+    assert discover(str(tmp_path)) is None
+
+
+def test_backend_reads_without_forking(git_repo, mocker):
+    make_commits(git_repo, ['feat: initial commit'])
+    spawn = mocker.spy(subprocess.Popen, '__init__')
+    backend = GitBackend()
+
+    assert backend.head() == 'main'
+    assert backend.config('user.name') == 'testuser'
+    assert backend.git_dir() == os.path.join(str(git_repo), '.git')
+    assert backend.toplevel() == str(git_repo)
+    assert str(git_repo / '.git' / 'config') in backend.config_files()
+    assert spawn.call_count == 0
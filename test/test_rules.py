@@ -0,0 +1,107 @@
+import pytest
+
+from task_commit import config
+from task_commit.core import git_commit_non_interactive
+from task_commit.lint import Validator
+from task_commit.rules import DEFAULT_RULES, Rules, load_rules
+
+PYPROJECT = """
+[tool.task_commit]
+types = ["feat", "fix", "build"]
+allowed_scopes = ["api", "ui"]
+max_header_length = 50
+subject_case = "lower"
+
+[tool.task_commit.scopes]
+api = "src/api"
+"""
+
+
+@pytest.fixture
+def configured_repo(git_repo):
+    (git_repo / 'pyproject.toml').write_text(PYPROJECT, encoding='utf-8')
+    return git_repo
+
+
+def test_rules_from_config(configured_repo):
+    rules = load_rules()
+
+    assert rules == Rules(
+        types=('feat', 'fix', 'build'),
+        scopes=('api', 'ui'),
+        max_header_length=50,
+        subject_case='lower',
+    )
+
+
+def test_default_rules_without_config(git_repo):
+    assert load_rules() == DEFAULT_RULES
+
+
+@pytest.mark.parametrize(
+    'section',
+    [
+        {'types': []},
+        {'types': ['fe at']},
+        {'allowed_scopes': 'api'},
+        {'max_header_length': 0},
+        {'subject_case': 'title'},
+    ],
+)
+def test_invalid_rules(section):
+    with pytest.raises(ValueError):  # noqa: PT011
+        Rules.from_config(section)
+
+
+@pytest.mark.parametrize(
+    ('message', 'valid'),
+    [
+        ('build(api): bump dependencies', True),
+        ('feat: add endpoint', True),
+        ('docs(api): not an accepted type, free-form', True),
+        ('feat(db): ' + 'x' * 45, False),
+        ('feat(api): Add endpoint', False),
+        ('feat(api): ' + 'x' * 50, True),
+        ('feat(api): ' + 'x' * 51, False),
+    ],
+)
+def test_validator_applies_custom_rules(message, valid):
+    rules = Rules(
+        types=('feat', 'fix', 'build'),
+        scopes=('api', 'ui'),
+        max_header_length=50,
+        subject_case='lower',
+    )
+
+    assert (Validator(rules).validate(message) is None) is valid
+
+
+def test_conventional_only_rejects_free_form_headers():
+    validator = Validator(Rules(conventional_only=True))
+
+    assert validator.validate('fix: short') is None
+    assert validator.validate('short free-form header') is not None
+
+
+def test_config_is_parsed_once(configured_repo, mocker):
+    parse_config = mocker.spy(config, 'parse_config')
+    path = str(configured_repo / 'pyproject.toml')
+    section = config.load_config(path)
+
+    # A new process only reads the cached section back
+    config._loaded.clear()
+    assert config.load_config(path) == section
+    # Touching the file only costs a hash of its contents
+    config._loaded.clear()
+    (configured_repo / 'pyproject.toml').write_text(PYPROJECT)
+    assert config.load_config(path) == section
+    assert parse_config.call_count == 1
+
+    (configured_repo / 'pyproject.toml').write_text('[tool.task_commit]\n')
+    assert not config.load_config(path)
+    assert parse_config.call_count == 2  # noqa: PLR2004
+
+
+def test_non_interactive_commit_follows_the_rules(configured_repo):
+    assert git_commit_non_interactive('ci', 'api', 'msg', push=False) == 2  # noqa: PLR2004
+    assert git_commit_non_interactive('feat', 'db', 'msg', push=False) == 2  # noqa: PLR2004
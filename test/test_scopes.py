@@ -0,0 +1,161 @@
+from task_commit import scopes
+from task_commit.backend import reset_backend
+from task_commit.scopes import (
+    ScopeIndex,
+    ScopePaths,
+    ScopeResolver,
+    ScopeTrie,
+)
+
+from .conftest import git, make_commits
+
+
+def test_scope_trie_deepest_prefix_wins():
+    trie = ScopeTrie()
+    trie.add('src/api', 'api')
+    trie.add('src/api', 'api')
+    trie.add('src/api/auth', 'auth')
+    trie.add('src/ui', 'ui')
+    trie.finalize()
+
+    assert trie.lookup('src/api/auth/login.py') == 'auth'
+    assert trie.lookup('src/api/users.py') == 'api'
+    assert trie.lookup('src/new/file.py') == 'api'
+    assert trie.lookup('README.md') is None
+
+
+def test_configured_prefixes_take_precedence():
+    configured = ScopeTrie()
+    configured.add_prefix('services/billing', 'billing')
+    learned = ScopeTrie()
+    learned.add('services/billing/api', 'api')
+    learned.add('web', 'web')
+    resolver = ScopeResolver(configured, learned)
+
+    assert resolver.infer(['services/billing/api/x.py']) == 'billing'
+    assert resolver.infer(['web/a.js', 'web/b.js', 'docs/c.md']) == 'web'
+    assert resolver.infer(['docs/c.md']) is None
+
+
+def test_resolver_learns_from_history_and_config(git_repo):
+    (git_repo / 'pyproject.toml').write_text(
+        '[tool.task_commit.scopes]\nmodels = ["app/models"]\n'
+    )
+    for path, subject in [
+        ('app/api/views.py', 'feat(api): add views (👤: testuser)'),
+        ('app/api/urls.py', 'fix(api): fix urls'),
+        ('app/models/user.py', 'feat(db): add user'),
+    ]:
+        (git_repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (git_repo / path).write_text(path)
+        git(git_repo, 'add', path)
+        git(git_repo, 'commit', '-qm', subject)
+
+    resolver = ScopeResolver.load()
+
+    assert resolver.infer(['app/api/serializers.py']) == 'api'
+    assert resolver.infer(['app/models/order.py']) == 'models'
+
+
+def test_scope_index_ranks_by_frequency_and_recency():
+    index = ScopeIndex()
+    day = 86_400
+    now = 1000 * day
+    for _commit in range(3):
+        index.add('legacy', now - 720 * day)
+    index.add('api', now - day)
+    index.add('api', now - day)
+    index.add('ui', now)
+
+    assert index.ranked(now) == ['api', 'ui', 'legacy']
+
+
+def test_scope_index_only_reads_new_commits(git_repo, mocker):
+    *_old, indexed = make_commits(
+        git_repo, ['feat(api): a', 'fix(api): b', 'docs: c']
+    )
+    index = ScopeIndex.open()
+    assert index.scopes.keys() == {'api'}
+
+    reset_backend()
+    (new,) = make_commits(git_repo, ['feat(UI): d'])
+    iter_subjects = mocker.spy(scopes, 'iter_subjects')
+    index = ScopeIndex.open()
+
+    assert index.ranked()[0] == 'api'
+    assert index.scopes['ui'][0] == 1
+    assert index.scopes['api'][0] == 2  # noqa: PLR2004
+    iter_subjects.assert_called_once_with(new, indexed)
+
+    reset_backend()
+    iter_subjects.reset_mock()
+    ScopeIndex.open()
+    iter_subjects.assert_not_called()
+
+
+def test_scope_index_rebuilds_after_history_rewrite(git_repo):
+    make_commits(git_repo, ['feat(api): a', 'feat(old): b'])
+    ScopeIndex.open()
+
+    git(git_repo, 'reset', '-q', '--hard', 'HEAD~1')
+    git(git_repo, 'reflog', 'expire', '--expire=now', '--all')
+    git(git_repo, 'gc', '-q', '--prune=now')
+    reset_backend()
+    make_commits(git_repo, ['feat(new): c'])
+
+    assert ScopeIndex.open().scopes.keys() == {'api', 'new'}
+
+
+def test_scope_index_rebuilds_after_switching_branches(git_repo):
+    (fork,) = make_commits(git_repo, ['feat(api): a'])
+    make_commits(git_repo, ['feat(api): b', 'feat(ui): c'])
+    assert ScopeIndex.open().scopes['api'][0] == 2  # noqa: PLR2004
+
+    for branch in ('-b', 'old', fork), ('main',):
+        git(git_repo, 'checkout', '-q', *branch)
+        reset_backend()
+        ScopeIndex.open()
+
+    index = ScopeIndex.open()
+    assert index.scopes['api'][0] == 2  # noqa: PLR2004
+    assert index.scopes['ui'][0] == 1
+
+
+def test_scope_index_skips_malformed_lines(git_repo):
+    make_commits(git_repo, ['feat(api): a', 'feat(bad\tscope): b'])
+    index = ScopeIndex.open()
+    assert index.scopes.keys() == {'api'}
+
+    with open(index.path, 'a', encoding='utf-8') as index_file:
+        index_file.write('bad\tscope\t1\t2\nbroken\n')
+    assert ScopeIndex(index.path).scopes.keys() == {'api'}
+
+
+def test_scope_paths_only_read_new_commits(git_repo, mocker):
+    for path, subject in [
+        ('api/views.py', 'feat(api): add views'),
+        ('ui/app.js', 'feat(ui): add app'),
+    ]:
+        (git_repo / path).parent.mkdir(exist_ok=True)
+        (git_repo / path).write_text(path)
+        git(git_repo, 'add', path)
+        git(git_repo, 'commit', '-qm', subject)
+    indexed = git(git_repo, 'rev-parse', 'HEAD').strip()
+    assert ScopeResolver.load().infer(['api/urls.py']) == 'api'
+
+    reset_backend()
+    (git_repo / 'api' / 'urls.py').write_text('urls')
+    git(git_repo, 'add', 'api/urls.py')
+    git(git_repo, 'commit', '-qm', 'feat(urls): add urls')
+    new = git(git_repo, 'rev-parse', 'HEAD').strip()
+    iter_history_scopes = mocker.spy(scopes, 'iter_history_scopes')
+    paths = ScopePaths.open()
+
+    iter_history_scopes.assert_called_once_with(new, indexed, None)
+    assert paths.directories['api'] == {'api': 1, 'urls': 1}
+    assert paths.trie().finalize().lookup('ui/new.js') == 'ui'
+
+    reset_backend()
+    iter_history_scopes.reset_mock()
+    ScopeResolver.load()
+    iter_history_scopes.assert_not_called()
@@ -0,0 +1,57 @@
+from task_commit.core import select_changes
+from task_commit.status import RepoState, StatusBucket, read_repo_state
+from task_commit.utils import add_changes
+
+from .conftest import git
+
+
+def test_add_changes_only_selected_paths(git_repo, monkeypatch):
+    (git_repo / 'src').mkdir()
+    (git_repo / 'src' / 'gone.py').write_text('gone')
+    git(git_repo, 'add', '.')
+    git(git_repo, 'commit', '-qm', 'feat: initial commit')
+    (git_repo / 'src' / 'gone.py').unlink()
+    (git_repo / 'src' / 'star*.py').write_text('literal name')
+    (git_repo / 'src' / 'starfish.py').write_text('not selected')
+    (git_repo / 'docs dir').mkdir()
+    (git_repo / 'docs dir' / 'a.md').write_text('a')
+    (git_repo / 'junk.tmp').write_text('junk')
+    monkeypatch.chdir(git_repo / 'src')
+
+    add_changes(['src/gone.py', 'src/star*.py', 'docs dir/'])
+
+    state = read_repo_state()
+    assert sorted(state.staged) == [
+        'docs dir/a.md',
+        'src/gone.py',
+        'src/star*.py',
+    ]
+    assert sorted(state.untracked) == ['junk.tmp', 'src/starfish.py']
+
+
+def test_add_changes_many_paths(git_repo):
+    paths = [f'file{i}.txt' for i in range(5000)]
+    for path in paths:
+        (git_repo / path).write_text(path)
+
+    add_changes(paths[::2])
+
+    assert read_repo_state().staged.total == 2500  # noqa: PLR2004
+
+
+def test_select_changes_offers_directories_for_large_buckets(mocker):
+    state = RepoState(
+        not_staged=StatusBucket(['core.py']),
+        untracked=StatusBucket(
+            [f'vendor/pkg{i}.py' for i in range(300)] + ['top.txt']
+        ),
+    )
+    prompt = mocker.patch(
+        'inquirer.prompt', return_value={'paths': ['core.py', 'vendor/']}
+    )
+
+    assert select_changes(state) == ['core.py', 'vendor/']
+
+    (question,) = prompt.call_args.args[0]
+    values = [choice.value for choice in question.choices_generator]
+    assert values == ['core.py', 'top.txt', 'vendor/']
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative import time budget (microseconds) of each console script
+# module, scaled by TASK_COMMIT_STARTUP_BUDGET_SCALE on slow machines
+STARTUP_BUDGETS = {
+    'task_commit.main': 50_000,
+    'task_commit.init': 25_000,
+}
+BUDGET_SCALE = float(os.getenv('TASK_COMMIT_STARTUP_BUDGET_SCALE', '1'))
+RUNS = 3
+HEAVY_MODULES = {'inquirer', 'prompt_toolkit', 'task_commit.core'}
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Cumulative import time of every module loaded by `import module`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line.removeprefix('import time:').split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(('module', 'budget'), STARTUP_BUDGETS.items())
+def test_startup_budget(module, budget):
+    best = min(import_times(module)[module] for _run in range(RUNS))
+
+    assert best <= budget * BUDGET_SCALE, (
+        f'importing {module} took {best} us, budget is {budget} us'
+    )
+
+
+@pytest.mark.parametrize('module', STARTUP_BUDGETS)
+def test_entry_points_do_not_load_tui(module):
+    assert not HEAVY_MODULES.intersection(import_times(module))
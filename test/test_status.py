@@ -0,0 +1,118 @@
+import io
+
+from task_commit import backend
+from task_commit.backend import get_backend
+from task_commit.status import (
+    StatusBucket,
+    iter_nul_records,
+    parse_status,
+    read_repo_state,
+)
+from task_commit.utils import (
+    check_git_status,
+    format_status_bucket,
+    get_git_status,
+)
+
+from .conftest import git, make_commits
+
+OID = 'a' * 40
+
+
+def test_parse_status():
+    output = '\0'.join([
+        f'# branch.oid {OID}',
+        '# branch.head feature/x',
+        '# branch.upstream origin/feature/x',
+        '# branch.ab +2 -3',
+        f'1 M. N... 100644 100644 100644 {OID} {OID} staged file.py',
+        f'1 MM N... 100644 100644 100644 {OID} {OID} both.py',
+        f'1 .D N... 100644 100644 000000 {OID} {OID} deleted.py',
+        f'2 R. N... 100644 100644 100644 {OID} {OID} R100 new name.py',
+        'old name.py',
+        f'u UU N... 100644 100644 100644 100644 {OID} {OID} {OID} conflict.py',
+        '? untracked dir/file.txt',
+        '',
+    ])
+
+    state = parse_status(output)
+
+    assert state.branch == 'feature/x'
+    assert state.oid == OID
+    assert state.upstream == 'origin/feature/x'
+    assert (state.ahead, state.behind) == (2, 3)
+    assert state.staged == ['staged file.py', 'both.py', 'new name.py']
+    assert state.not_staged == ['both.py', 'deleted.py']
+    assert state.unmerged == ['conflict.py']
+    assert state.untracked == ['untracked dir/file.txt']
+    assert state.has_changes
+
+
+def test_parse_status_initial_detached():
+    state = parse_status('# branch.oid (initial)\0# branch.head (detached)\0')
+
+    assert state.oid is None
+    assert state.branch is None
+    assert state.upstream is None
+    assert not state.has_changes
+
+
+def test_status_snapshot_is_reused_until_a_change(git_repo, mocker):
+    make_commits(git_repo, ['feat: initial commit'])
+    (git_repo / 'new.txt').write_text('new')
+    read_state = mocker.spy(backend, 'read_repo_state')
+
+    assert 'new.txt' in get_git_status()
+    assert check_git_status() is True
+    assert get_backend().head() == 'main'
+    assert read_state.call_count == 1
+
+    get_backend().run(['add', '.'], check=True)
+    assert get_backend().status().staged == ['new.txt']
+    assert read_state.call_count == 2  # noqa: PLR2004
+
+    git(git_repo, 'commit', '-qm', 'feat: add file')
+    get_backend().invalidate()
+    assert check_git_status() is False
+
+
+def test_iter_nul_records_small_chunks():
+    stream = io.BytesIO(b'# branch.head main\0? a b.txt\0? c.txt')
+
+    assert list(iter_nul_records(stream, chunk_size=3)) == [
+        b'# branch.head main',
+        b'? a b.txt',
+        b'? c.txt',
+    ]
+
+
+def test_status_bucket_keeps_bounded_paths():
+    bucket = StatusBucket(
+        (f'vendor/pkg{i}/file.py' for i in range(1000)), limit=10
+    )
+    bucket.append('README.md')
+
+    assert len(bucket) == 10  # noqa: PLR2004
+    assert bucket.total == 1001  # noqa: PLR2004
+    assert bucket.truncated
+    assert bucket.directories == {'vendor/': 1000, '.': 1}
+
+    lines = format_status_bucket('Untracked files:', bucket, 'red', limit=5)
+    assert len(lines) == 1 + 5 + 1 + 2 + 1
+    assert '996' in lines[6]
+    assert 'vendor/ (1000)' in lines[7]
+
+
+def test_read_repo_state(git_repo):
+    (git_repo / 'old name.txt').write_text('content')
+    git(git_repo, 'add', '.')
+    git(git_repo, 'commit', '-qm', 'feat: initial commit')
+    git(git_repo, 'mv', 'old name.txt', 'new name.txt')
+    (git_repo / 'untracked file.txt').write_text('new')
+
+    state = read_repo_state()
+
+    assert state.branch == 'main'
+    assert state.upstream is None
+    assert state.staged == ['new name.txt']
+    assert state.untracked == ['untracked file.txt']
@@ -0,0 +1,129 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from task_commit import daemon, receive, trace
+from task_commit.backend import get_backend
+from task_commit.lint import read_messages
+from task_commit.main import build_parser
+
+from .conftest import make_commits
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def _stop_tracing():
+    yield
+    trace.disable()
+
+
+def test_command_name():
+    assert trace.command_name(['git', 'status', '-z']) == 'git status'
+    assert trace.command_name(['/usr/bin/git', '-C', 'repo', 'log']) == (
+        'git log'
+    )
+    assert trace.command_name(['git', '--version']) == 'git'
+
+
+def test_every_kind_of_call_is_traced(git_repo):
+    shas = make_commits(git_repo, ['feat: one', 'fix: two'])
+    trace.enable()
+
+    get_backend().status()
+    messages = read_messages(shas)
+    subprocess.check_output(['git', 'rev-parse', 'HEAD'])
+    subprocess.run(['git', 'cat-file', '-e', 'nothing'], check=False)
+    get_backend().cat_file('HEAD')
+    get_backend().close()
+
+    events = trace.get_events()
+    assert [event['name'] for event in events] == [
+        'git status',
+        'git log',
+        'git rev-parse',
+        'git cat-file',
+        'git cat-file',
+    ]
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+    log = events[1]['args']
+    assert log['returncode'] == 0
+    assert log['output_bytes'] == sum(
+        len(sha) + len(message) + 2 for sha, message in messages
+    )
+    assert events[2]['args']['output_bytes'] == 41  # noqa: PLR2004
+    assert events[3]['args']['returncode'] != 0
+
+
+def test_format_summary():
+    events = [
+        {'name': 'git log', 'dur': 1500, 'args': {'output_bytes': 10}},
+        {'name': 'git status', 'dur': 9000, 'args': {'output_bytes': 5}},
+        {'name': 'git log', 'dur': 2500, 'args': {'output_bytes': 20}},
+    ]
+
+    lines = trace.format_summary(events).splitlines()
+
+    assert lines[1].split() == ['git', 'status', '1', '9.0', '9.0', '5']
+    assert lines[2].split() == ['git', 'log', '2', '4.0', '2.5', '30']
+
+
+def test_trace_file_is_written_at_exit(git_repo, tmp_path):
+    make_commits(git_repo, ['feat: one'])
+    trace_file = tmp_path / 'trace.json'
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            'from task_commit.main import main; main(["lint"])',
+        ],
+        env={
+            **os.environ,
+            'PYTHONPATH': ROOT_DIR,
+            'TASK_COMMIT_TRACE': str(trace_file),
+        },
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    assert result.returncode == 0
+    assert 'git rev-list' in result.stderr
+    events = json.loads(trace_file.read_text())['traceEvents']
+    assert {'git rev-list', 'git log'} <= {event['name'] for event in events}
+
+
+@pytest.mark.parametrize(
+    'argv',
+    [
+        ['--trace', 'trace.json', 'lint'],
+        ['lint', '--trace', 'trace.json'],
+        ['daemon', '--trace', 'trace.json', 'stop'],
+    ],
+)
+def test_trace_option_is_accepted_anywhere(argv):
+    assert build_parser().parse_args(argv).trace == 'trace.json'
+
+
+@pytest.mark.parametrize(
+    'entry_point',
+    [
+        lambda path: daemon.main(['check', path]),
+        lambda _path: receive.main(['update', 'refs/heads/main', 'a', 'b']),
+    ],
+)
+def test_entry_points_trace_from_env(
+    git_repo, tmp_path, monkeypatch, mocker, entry_point
+):
+    message_file = tmp_path / 'message'
+    message_file.write_text('feat(core): add tracing\n')
+    monkeypatch.setenv('TASK_COMMIT_TRACE', str(tmp_path / 'trace.json'))
+    enable = mocker.patch.object(trace, 'enable')
+
+    entry_point(str(message_file))
+
+    enable.assert_called_once_with(str(tmp_path / 'trace.json'))